@@ -1,5 +1,10 @@
 # Author: Sandy Nguyen
 
+import time
+
+import instrumentation
+from interning import intern_string
+
 def get_iso_codes_by_continent(iso_filename):
     """ (str) -> dict
     This function takes a file with format 'ISO country code\tcontinent\n' and returns a dictionary mapping continents'
@@ -27,17 +32,74 @@ def get_iso_codes_by_continent(iso_filename):
         line_strip = line.strip('\n')
         line_list = line_strip.split('\t')
         
+        # Sharing one copy of each continent name and ISO code
+        continent = intern_string(line_list[1].upper())
+        iso_code = intern_string(line_list[0])
+        
         # If the continent key doesn't exist in the dictionary, add the continent-ISO pair into the dictionary
-        if line_list[1].upper() not in continents_dict:
-            continents_dict[line_list[1].upper()] = [line_list[0]]
+        if continent not in continents_dict:
+            continents_dict[continent] = [iso_code]
         
         # If the continent key already exist in the dictionary, append ISO into its key continent.
         else:
-            continents_dict[line_list[1].upper()].append(line_list[0])
+            continents_dict[continent].append(iso_code)
+    
+    fobj.close()
     
     return continents_dict
 
 
+def get_continents_column(continents_dict):
+    
+    """ (dict) -> dict
+    This function takes a dictionary mapping continents to lists of ISO codes (as returned by get_iso_codes_by_continent)
+    and returns a dictionary mapping each ISO code to its continents column (comma separated if there's more than one).
+    
+    >>> get_continents_column({'ASIA': ['RUS', 'QAT'], 'EUROPE': ['RUS']})
+    {'RUS': 'ASIA,EUROPE', 'QAT': 'ASIA'}
+    
+    """
+    
+    countries_dict = {}
+    
+    # Creating the continents column of each ISO code once (comma separated if there's more than one continent),
+    # instead of looking for the ISO code in every continent and joining the continents again on every line
+    for continent, countries in continents_dict.items():
+        
+        for iso_code in countries:
+            
+            # If the country's ISO code is already a key in countries_dict
+            if iso_code in countries_dict:
+                
+                # If the continent is already added as a value for the country's ISO code key
+                if continent not in countries_dict[iso_code].split(','):
+                    countries_dict[iso_code] = intern_string(countries_dict[iso_code] + ',' + continent)
+            
+            # If the country's ISO code is not a key in countries_dict yet 
+            else:
+                countries_dict[iso_code] = continent
+    
+    return countries_dict
+    
+    
+def get_line_with_continents(line, continents_column):
+    
+    """ (str, dict) -> str
+    This function takes a line written by final_clean and the dictionary returned by get_continents_column, and returns
+    the line with the country's continents added after its name (one line of add_continents_to_data).
+    
+    >>> get_line_with_continents("RUS\\tRussia\\t2007\\t1604.778\\t14266000\\n", {'RUS': 'ASIA,EUROPE'})
+    'RUS\\tRussia\\tASIA,EUROPE\\t2007\\t1604.778\\t14266000\\n'
+    
+    """
+    
+    # Creating a list with each country's informations
+    line_list = line.split('\t')
+    line_continent = line_list[:2] + [continents_column[line_list[0]]] + line_list[2:]
+    
+    return '\t'.join(line_continent)
+    
+    
 def add_continents_to_data(input_filename, continents_filename, output_filename): 
     """ (str, str, str) -> int
     This function takes three strings representing files (input_filename, continents_filename, output_filename), reads the
@@ -57,64 +119,29 @@ def add_continents_to_data(input_filename, continents_filename, output_filename)
     """
     
     # Opening files and creating local variables
-    fobj_input = open(input_filename, "r", encoding="utf-8")
-    fobj_continents = open(continents_filename, "r", encoding="utf-8")
+    start_time = time.perf_counter()
     continents_dict = get_iso_codes_by_continent(continents_filename)
     num_of_lines = 0
     
-    countries_dict = {}
-    
-    for line in fobj_input:
-        
-        # Creating a list with each country's informations
-        line_list = line.split('\t')
-        
-        # Creating tuples with continents_dict
-        for continent, countries in continents_dict.items():
-            
-            # If the country's ISO code is in the continent's countries
-            if line_list[0] in countries:
-                
-                # If the country's ISO code is already a key in countries_dict
-                if line_list[0] in countries_dict:
-                    
-                    # If the continent is already added as a value for the country's ISO code key
-                    if continent not in countries_dict[line_list[0]]:
-                        countries_dict[line_list[0]].append(continent)
-                
-                # If the country's ISO code is not a key in countries_dict yet 
-                else:
-                    countries_dict[line_list[0]] = [continent]
-    
-    # Closing files
-    fobj_input.close()
-    fobj_continents.close()
+    countries_dict = get_continents_column(continents_dict)
     
     # Opening files
     fobj_input = open(input_filename, "r", encoding="utf-8")
     fobj_output = open(output_filename, "w", encoding="utf-8")
+    lines_read = 0
                     
     for line in fobj_input:
         
-        # Creating a list with each country's informations
-        line_list = line.split('\t')
-    
-        # If the country only belongs to one continent    
-        if len(countries_dict[line_list[0]]) == 1:
-            line_continent = line_list[:2] + countries_dict[line_list[0]] + line_list[2:]
-            line_continent_tab = '\t'.join(line_continent)
-            fobj_output.write(line_continent_tab)
-            num_of_lines += 1
+        lines_read += 1
         
-        # If the country belongs to more than one continent
-        else:
-            line_continent = line_list[:2] + [','.join(countries_dict[line_list[0]])] + line_list[2:]
-            line_continent_tab = '\t'.join(line_continent)
-            fobj_output.write(line_continent_tab)
-            num_of_lines += 1
+        # Adding the country's continents after its name
+        fobj_output.write(get_line_with_continents(line, countries_dict))
+        num_of_lines += 1
             
     # Closing files 
     fobj_input.close()
     fobj_output.close()
     
+    instrumentation.record_file_stage('add_continents_to_data', lines_read, num_of_lines, time.perf_counter() - start_time)
+    
     return num_of_lines
\ No newline at end of file
@@ -0,0 +1,167 @@
+# Author: Sandy Nguyen
+
+import sys
+
+# Columns of the exported table, one row per country and year with co2 emissions or population
+column_names = ['iso', 'name', 'continents', 'year', 'co2', 'population']
+
+
+def get_pyarrow():
+
+    """ () -> module
+    This function imports and returns pyarrow, which is only needed to export to Arrow, so that the rest of the
+    project works without it.
+
+    """
+
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError('exporting to Arrow needs pyarrow, which can be installed with: pip install pyarrow')
+
+    return pyarrow
+
+
+def get_columns(countries_dict):
+
+    """ (dict) -> dict
+    This function takes a dictionary mapping ISO codes to Country objects and returns the dataset as columns: a
+    dictionary mapping 'iso', 'name' and 'continents' (comma separated) to lists of indices into the lists of distinct
+    strings under 'iso_values', 'name_values' and 'continents_values', and 'year', 'co2' and 'population' to lists of
+    values (None if missing). Rows are sorted by year within each country, countries keep the dictionary's order.
+
+    >>> from build_countries import Country
+    >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+    >>> r.add_yearly_data("1971\\t\\t130831000")
+    >>> c = get_columns({'RUS': r})
+    >>> c['year'], c['co2'], c['continents'], c['continents_values']
+    ([1971, 2007], [None, 1604.778], [0, 0], ['ASIA,EUROPE'])
+
+    """
+
+    columns = {}
+
+    for column_name in column_names:
+        columns[column_name] = []
+
+    # Distinct strings, and the index of each one in them
+    string_indices = {'iso': {}, 'name': {}, 'continents': {}}
+
+    for iso_code, country in countries_dict.items():
+
+        country_strings = [('iso', country.iso_code), ('name', country.name), ('continents', ','.join(country.continents))]
+        country_indices = []
+
+        for column_name, string in country_strings:
+            country_indices.append(string_indices[column_name].setdefault(string, len(string_indices[column_name])))
+
+        years = sorted(set(country.co2_emissions) | set(country.population))
+
+        for column_name, string_index in zip(['iso', 'name', 'continents'], country_indices):
+            columns[column_name].extend([string_index] * len(years))
+
+        columns['year'].extend(years)
+        columns['co2'].extend([country.co2_emissions.get(year) for year in years])
+        columns['population'].extend([country.population.get(year) for year in years])
+
+    for column_name in ['iso', 'name', 'continents']:
+        columns[column_name + '_values'] = list(string_indices[column_name])
+
+    return columns
+
+
+def get_record_batch(countries_dict):
+
+    """ (dict) -> RecordBatch
+    This function takes a dictionary mapping ISO codes to Country objects and returns an Arrow record batch of the
+    dataset, with the ISO codes, names and continents dictionary-encoded (each distinct string stored once).
+
+    >>> from build_countries import Country
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+    >>> batch = get_record_batch({'QAT': q})
+    >>> batch.num_rows, batch.schema.names
+    (1, ['iso', 'name', 'continents', 'year', 'co2', 'population'])
+
+    """
+
+    pyarrow = get_pyarrow()
+    columns = get_columns(countries_dict)
+    arrays = []
+
+    for column_name in ['iso', 'name', 'continents']:
+        arrays.append(pyarrow.DictionaryArray.from_arrays(pyarrow.array(columns[column_name], pyarrow.int32()),
+                                                          pyarrow.array(columns[column_name + '_values'], pyarrow.string())))
+
+    arrays.append(pyarrow.array(columns['year'], pyarrow.int32()))
+    arrays.append(pyarrow.array(columns['co2'], pyarrow.float64()))
+    arrays.append(pyarrow.array(columns['population'], pyarrow.int64()))
+
+    return pyarrow.RecordBatch.from_arrays(arrays, column_names)
+
+
+def write_arrow_file(countries_dict, filename):
+
+    """ (dict, str) -> int
+    This function takes a dictionary mapping ISO codes to Country objects and a string representing a file, writes the
+    dataset to it as an Arrow IPC file (the format of Feather version 2, readable by pandas.read_feather and
+    polars.read_ipc) in one record batch, and returns the number of rows written. The file isn't compressed, so that
+    readers can memory-map it instead of parsing it.
+
+    >>> import os, tempfile
+    >>> from build_countries import get_countries_from_file
+    >>> output_dir = tempfile.TemporaryDirectory()
+    >>> write_arrow_file(get_countries_from_file('data/small_co2_data.tsv'), os.path.join(output_dir.name, 'small_co2_data.arrow'))
+    10
+    >>> output_dir.cleanup()
+
+    """
+
+    pyarrow = get_pyarrow()
+    batch = get_record_batch(countries_dict)
+
+    with pyarrow.OSFile(filename, 'wb') as sink:
+        with pyarrow.ipc.new_file(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+
+    return batch.num_rows
+
+
+def read_arrow_file(filename):
+
+    """ (str) -> tuple
+    This function takes a string representing a file written by write_arrow_file and returns a tuple (Arrow table,
+    memory-mapped source) of it: the columns point into the file instead of being copied. The caller closes the source
+    once it is done with the table, which can't be used after that.
+
+    >>> import os, tempfile
+    >>> from build_countries import get_countries_from_file
+    >>> output_dir = tempfile.TemporaryDirectory()
+    >>> arrow_filename = os.path.join(output_dir.name, 'small_co2_data.arrow')
+    >>> n = write_arrow_file(get_countries_from_file('data/small_co2_data.tsv'), arrow_filename)
+    >>> table, source = read_arrow_file(arrow_filename)
+    >>> table.column('iso').chunk(0).dictionary.to_pylist()[:2]
+    ['QAT', 'CMR']
+    >>> source.close()
+    >>> output_dir.cleanup()
+
+    """
+
+    pyarrow = get_pyarrow()
+    source = pyarrow.memory_map(filename, 'r')
+
+    try:
+        table = pyarrow.ipc.open_file(source).read_all()
+    except Exception:
+        source.close()
+        raise
+
+    return (table, source)
+
+
+if __name__ == '__main__':
+
+    # Usage: python arrow_export.py data_file.tsv output_file.arrow
+    from build_countries import get_countries_from_file
+
+    print(write_arrow_file(get_countries_from_file(sys.argv[1]), sys.argv[2]), 'rows written to', sys.argv[2])
@@ -0,0 +1,279 @@
+# Author: Sandy Nguyen
+
+import argparse
+import asyncio
+import concurrent.futures
+import sys
+import time
+
+import instrumentation
+from data_cleanup import get_tab_separated_line, get_final_clean_line
+from add_continents import get_iso_codes_by_continent, get_continents_column, get_line_with_continents
+
+# Stages in the order of the pipeline, each applied to the lines written by the previous one
+stage_names = ['clean_one', 'final_clean', 'add_continents_to_data']
+
+
+def get_cleaned_chunk(lines, stages, continents_column):
+
+    """ (list, list, dict) -> tuple
+    This function takes a list of lines, the stages to apply to them (in pipeline order) and the continents column of
+    each ISO code (only needed by add_continents_to_data), and returns a tuple (cleaned text, list with the number of
+    lines written by each stage), the same lines and counts the stage functions would write and return.
+
+    >>> get_cleaned_chunk(['QAT,Qatar,2001,41.215,615000\\n'], ['clean_one', 'final_clean', 'add_continents_to_data'], {'QAT': 'ASIA'})
+    ('QAT\\tQatar\\tASIA\\t2001\\t41.215\\t615000\\n', [1, 1, 1])
+
+    """
+
+    counts = []
+
+    for stage in stages:
+
+        if stage == 'clean_one':
+            lines = [get_tab_separated_line(line) for line in lines]
+
+        elif stage == 'final_clean':
+            lines = [clean_line for clean_line in [get_final_clean_line(line) for line in lines] if clean_line != None]
+
+        else:
+            lines = [get_line_with_continents(line, continents_column) for line in lines]
+
+        counts.append(len(lines))
+
+    return ''.join(lines), counts
+
+
+class BufferBudget:
+
+    """
+    Represents the number of characters that the files in flight may hold in their buffers at once. A chunk waits
+    until it fits, except when nothing else is buffered, so that a chunk bigger than the budget can't block forever.
+
+    Instance Attributes: max_chars (int), used_chars (int), condition (Condition)
+
+    """
+
+    def __init__(self, max_chars):
+
+        """ (int) -> void
+        This constructor will initialize an empty budget of max_chars characters.
+
+        """
+
+        self.max_chars = max_chars
+        self.used_chars = 0
+        self.condition = asyncio.Condition()
+
+
+    async def acquire(self, num_chars):
+
+        """ (int) -> void
+        This instance method waits until num_chars characters fit in the budget and reserves them.
+
+        """
+
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.used_chars == 0 or self.used_chars + num_chars <= self.max_chars)
+            self.used_chars += num_chars
+
+
+    async def release(self, num_chars):
+
+        """ (int) -> void
+        This instance method gives num_chars characters back to the budget.
+
+        """
+
+        async with self.condition:
+            self.used_chars -= num_chars
+            self.condition.notify_all()
+
+
+async def clean_file(input_filename, output_filename, stages, continents_column, cpu_executor, files_semaphore, budget, chunk_chars):
+
+    """ (str, str, list, dict, Executor, Semaphore, BufferBudget, int) -> dict
+    This function cleans one file through the given stages, reading chunks of about chunk_chars characters. Reading
+    and writing run in the default thread pool and the cleaning in cpu_executor, so the next chunk is read and
+    cleaned while the previous one is being written. It returns a dictionary mapping each stage to the number of
+    lines it wrote.
+
+    """
+
+    loop = asyncio.get_running_loop()
+
+    async with files_semaphore:
+
+        start_time = time.perf_counter()
+        fobj_input = await loop.run_in_executor(None, lambda: open(input_filename, "r", encoding="utf-8"))
+        fobj_output = await loop.run_in_executor(None, lambda: open(output_filename, "w", encoding="utf-8"))
+        stage_counts = [0] * len(stages)
+        lines_read = 0
+
+        # At most one cleaned chunk waits while another one is written
+        chunks_queue = asyncio.Queue(1)
+
+        async def read_chunks():
+
+            nonlocal lines_read
+
+            while True:
+
+                lines = await loop.run_in_executor(None, fobj_input.readlines, chunk_chars)
+
+                if lines == []:
+                    break
+
+                num_chars = sum([len(line) for line in lines])
+                await budget.acquire(num_chars)
+                lines_read += len(lines)
+
+                try:
+                    cleaned_text, counts = await loop.run_in_executor(cpu_executor, get_cleaned_chunk, lines, stages, continents_column)
+                except BaseException:
+                    await budget.release(num_chars)
+                    raise
+
+                await chunks_queue.put((cleaned_text, num_chars, counts))
+
+            await chunks_queue.put(None)
+
+        async def write_chunks():
+
+            while True:
+
+                chunk = await chunks_queue.get()
+
+                if chunk == None:
+                    break
+
+                cleaned_text, num_chars, counts = chunk
+
+                try:
+                    await loop.run_in_executor(None, fobj_output.write, cleaned_text)
+                finally:
+                    await budget.release(num_chars)
+
+                for i in range(len(stages)):
+                    stage_counts[i] += counts[i]
+
+        try:
+            reader_task = asyncio.ensure_future(read_chunks())
+            writer_task = asyncio.ensure_future(write_chunks())
+            await asyncio.gather(reader_task, writer_task)
+        except BaseException:
+            reader_task.cancel()
+            writer_task.cancel()
+            raise
+        finally:
+            await loop.run_in_executor(None, fobj_input.close)
+            await loop.run_in_executor(None, fobj_output.close)
+
+        # Each stage reads the lines written by the previous one, like the files of the pipeline
+        seconds = time.perf_counter() - start_time
+
+        for i in range(len(stages)):
+            instrumentation.record_file_stage(stages[i], stage_counts[i - 1] if i > 0 else lines_read, stage_counts[i], seconds)
+
+        return dict(zip(stages, stage_counts))
+
+
+async def clean_files(file_pairs, stages=None, continents_filename=None, max_files=4, max_buffer_chars=8000000, chunk_chars=256000, cpu_executor=None):
+
+    """ (list, list, str, int, int, int, Executor) -> list
+    This function takes a list of tuples (input filename, output filename), the stages to apply (every stage of
+    stage_names if None, in pipeline order) and the continents file (needed by add_continents_to_data), cleans every
+    file with at most max_files files in flight and max_buffer_chars characters held in buffers, and returns, in the
+    order of file_pairs, dictionaries mapping each stage to the number of lines it wrote (the values clean_one,
+    final_clean and add_continents_to_data would return). The cleaning runs in cpu_executor (a pool of max_files
+    processes if None).
+
+    """
+
+    if stages == None:
+        stages = list(stage_names)
+
+    for stage in stages:
+        if stage not in stage_names:
+            raise ValueError('unknown stage: ' + str(stage))
+
+    if stages != [stage for stage in stage_names if stage in stages]:
+        raise ValueError('stages must be in pipeline order: ' + ', '.join(stage_names))
+
+    continents_column = {}
+
+    if 'add_continents_to_data' in stages:
+
+        if continents_filename == None:
+            raise ValueError('add_continents_to_data needs a continents file')
+
+        continents_column = get_continents_column(get_iso_codes_by_continent(continents_filename))
+
+    files_semaphore = asyncio.Semaphore(max_files)
+    budget = BufferBudget(max_buffer_chars)
+    own_executor = cpu_executor == None
+
+    if own_executor:
+        cpu_executor = concurrent.futures.ProcessPoolExecutor(max_files)
+
+    try:
+        return await asyncio.gather(*[clean_file(input_filename, output_filename, stages, continents_column, cpu_executor,
+                                                 files_semaphore, budget, chunk_chars)
+                                      for input_filename, output_filename in file_pairs])
+    finally:
+        if own_executor:
+            cpu_executor.shutdown()
+
+
+def run_batch(file_pairs, stages=None, continents_filename=None, max_files=4, max_buffer_chars=8000000, chunk_chars=256000):
+
+    """ (list, list, str, int, int, int) -> list
+    This function runs clean_files from code that isn't asynchronous and returns its result.
+
+    >>> import os, tempfile
+    >>> output_dir = tempfile.TemporaryDirectory()
+    >>> run_batch([('data/small_raw_co2_data.txt', os.path.join(output_dir.name, 'small_co2_data.tsv'))], None, 'data/iso_codes_by_continent.tsv')
+    [{'clean_one': 10, 'final_clean': 10, 'add_continents_to_data': 10}]
+    >>> output_dir.cleanup()
+
+    """
+
+    return asyncio.run(clean_files(file_pairs, stages, continents_filename, max_files, max_buffer_chars, chunk_chars))
+
+
+def main(argv=None):
+
+    """ (list) -> int
+    This function cleans the files given on the command line and prints the number of lines written by each stage
+    for each file.
+
+    """
+
+    parser = argparse.ArgumentParser(description='Clean many raw co2 data files concurrently.')
+    parser.add_argument('files', nargs='+', metavar='INPUT:OUTPUT', help='input and output files, separated by a colon')
+    parser.add_argument('--continents', metavar='FILE', help='ISO codes by continent (needed by add_continents_to_data)')
+    parser.add_argument('--stages', nargs='+', choices=stage_names, help='stages to apply (default: all of them)')
+    parser.add_argument('--max-files', type=int, default=4, help='files cleaned at the same time')
+    parser.add_argument('--max-buffer-chars', type=int, default=8000000, help='characters held in buffers at once')
+    parser.add_argument('--chunk-chars', type=int, default=256000, help='characters read at a time from each file')
+    options = parser.parse_args(argv)
+
+    file_pairs = []
+
+    for file_pair in options.files:
+
+        if ':' not in file_pair:
+            parser.error('files must look like INPUT:OUTPUT, got ' + file_pair)
+
+        file_pairs.append(tuple(file_pair.rsplit(':', 1)))
+
+    results = run_batch(file_pairs, options.stages, options.continents, options.max_files, options.max_buffer_chars, options.chunk_chars)
+
+    for (input_filename, output_filename), stage_counts in zip(file_pairs, results):
+        print(input_filename + ' -> ' + output_filename + ': ' + ', '.join(['%s %d' % item for item in stage_counts.items()]))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
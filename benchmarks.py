@@ -0,0 +1,313 @@
+# Author: Sandy Nguyen
+
+import argparse
+import json
+import math
+import random
+import sys
+import timeit
+from build_countries import Country
+
+continents_list = ['AFRICA', 'ASIA', 'EUROPE', 'NORTH AMERICA', 'OCEANIA', 'SOUTH AMERICA']
+
+# (number of countries, number of years) of the synthetic datasets, from the smallest to the largest
+default_sizes = [(25, 25), (50, 50), (100, 100), (200, 150)]
+
+
+def get_synthetic_iso_code(index):
+
+    """ (int) -> str
+    This function takes a non negative integer (less than 26 ** 3) and returns a distinct 3 letter ISO code for it.
+
+    >>> get_synthetic_iso_code(0), get_synthetic_iso_code(27)
+    ('AAA', 'ABB')
+
+    """
+
+    letters = ''
+
+    for i in range(3):
+        letters = chr(ord('A') + index % 26) + letters
+        index //= 26
+
+    return letters
+
+
+def get_synthetic_countries(num_countries, num_years, first_year=1900, seed=0):
+
+    """ (int, int, int, int) -> dict
+    This function takes a number of countries, a number of years, the first year and a random seed, and returns a
+    dictionary mapping ISO codes to Country objects with random co2 emissions and population for every year. One
+    country out of ten belongs to two continents and about 5% of the values are missing, like in the real data.
+    The same arguments always give the same dataset.
+
+    >>> d = get_synthetic_countries(3, 4)
+    >>> sorted(d)
+    ['AAA', 'AAB', 'AAC']
+    >>> sorted(d['AAA'].co2_emissions)
+    [1900, 1901, 1902, 1903]
+
+    """
+
+    random_generator = random.Random(seed)
+    countries_dict = {}
+
+    for i in range(num_countries):
+
+        iso_code = get_synthetic_iso_code(i)
+        continents = [continents_list[i % len(continents_list)]]
+
+        if i % 10 == 9:
+            continents.append(continents_list[(i + 1) % len(continents_list)])
+
+        country = None
+
+        for year in range(first_year, first_year + num_years):
+
+            country_co2 = round(random_generator.uniform(0.0, 1000.0), 3)
+            country_pop = random_generator.randint(10000, 100000000)
+
+            # Leaving some values missing, except for the first year which creates the Country
+            if country != None and random_generator.random() < 0.05:
+                country_co2 = ''
+
+            if country != None and random_generator.random() < 0.05:
+                country_pop = ''
+
+            if country == None:
+                country = Country(iso_code, 'Country ' + iso_code, continents, year, country_co2, country_pop)
+            else:
+                country.add_yearly_data(str(year) + '\t' + str(country_co2) + '\t' + str(country_pop))
+
+        countries_dict[iso_code] = country
+
+    return countries_dict
+
+
+def get_benchmarks(countries_dict, country_year):
+
+    """ (dict, int) -> list
+    This function takes a dictionary mapping ISO codes to Country objects and a year, and returns a list of tuples
+    (benchmark name, function without arguments) for the aggregate functions of build_countries and the data side of
+    every plot of plot_data (without matplotlib drawing anything).
+
+    """
+
+    # Importing here so that only the plot benchmarks need matplotlib installed
+    import plot_data
+
+    countries_list = list(countries_dict.values())
+    historical_dict = Country.get_historical_co2_emissions(countries_list, country_year)
+    isocodes_list = list(countries_dict)[:5]
+    first_year = min(countries_list[0].co2_emissions)
+
+    return [('get_historical_co2', lambda: [country.get_historical_co2(country_year) for country in countries_list]),
+            ('get_top_n', lambda: Country.get_top_n(historical_dict, 10)),
+            ('get_countries_by_continent', lambda: Country.get_countries_by_continent(countries_list)),
+            ('get_total_historical_co2_emissions', lambda: Country.get_total_historical_co2_emissions(countries_list, country_year)),
+            ('get_co2_emissions_per_capita_by_year', lambda: Country.get_co2_emissions_per_capita_by_year(countries_list, country_year)),
+            ('co2_pc_by_continent_data', lambda: plot_data.get_co2_pc_by_continent_data(countries_dict, country_year)),
+            ('historical_co2_by_continent_data', lambda: plot_data.get_historical_co2_by_continent_data(countries_dict, country_year)),
+            ('co2_pc_top_ten_data', lambda: plot_data.get_co2_pc_top_ten_data(countries_dict, country_year)),
+            ('top_ten_historical_co2_data', lambda: plot_data.get_top_ten_historical_co2_data(countries_dict, country_year)),
+            ('co2_emissions_data', lambda: plot_data.get_co2_emissions_data(countries_dict, isocodes_list, first_year, country_year))]
+
+
+def get_best_time(function, repeat):
+
+    """ (function, int) -> float
+    This function takes a function without arguments and a number of repetitions, and returns the best time in seconds
+    of one call. Each repetition calls the function enough times to last at least 0.2 second, so that fast functions
+    are timed precisely.
+
+    """
+
+    timer = timeit.Timer(function)
+    number, total_time = timer.autorange()
+
+    return min(timer.repeat(repeat, number)) / number
+
+
+def run_benchmarks(sizes, repeat=3, names=None):
+
+    """ (list, int, list) -> dict
+    This function takes a list of tuples (number of countries, number of years), a number of repetitions and an optional
+    list of benchmark names (every benchmark if None), runs every benchmark on a synthetic dataset of each size and
+    returns a dictionary mapping each benchmark name to a dictionary mapping a size key such as '100x50' (countries x
+    years) to the best time in seconds.
+
+    """
+
+    results = {}
+
+    for num_countries, num_years in sizes:
+
+        countries_dict = get_synthetic_countries(num_countries, num_years)
+        size_key = str(num_countries) + 'x' + str(num_years)
+
+        # Every year is recorded in the last year, so historical values go through the whole series
+        for name, function in get_benchmarks(countries_dict, 1900 + num_years - 1):
+            if names == None or name in names:
+                results.setdefault(name, {})[size_key] = get_best_time(function, repeat)
+
+    return results
+
+
+def get_size_points(size_key):
+
+    """ (str) -> int
+    This function takes a size key such as '100x50' and returns its number of data points (countries x years).
+
+    >>> get_size_points('100x50')
+    5000
+
+    """
+
+    num_countries, num_years = size_key.split('x')
+
+    return int(num_countries) * int(num_years)
+
+
+def get_scaling_exponent(size_times):
+
+    """ (dict) -> float
+    This function takes a dictionary mapping size keys to times and returns the exponent k of the curve
+    time ~ (data points) ** k between the smallest and the largest size, None if there are less than 2 sizes.
+    An exponent near 1 means the time grows linearly with the data, near 2 quadratically.
+
+    >>> get_scaling_exponent({'10x10': 0.001, '20x20': 0.004})
+    1.0
+    >>> get_scaling_exponent({'10x10': 0.001})
+
+    """
+
+    size_keys = sorted(size_times, key=get_size_points)
+
+    if len(size_keys) < 2 or get_size_points(size_keys[0]) == get_size_points(size_keys[-1]):
+        return None
+
+    points_ratio = get_size_points(size_keys[-1]) / get_size_points(size_keys[0])
+    time_ratio = size_times[size_keys[-1]] / size_times[size_keys[0]]
+
+    return round(math.log(time_ratio) / math.log(points_ratio), 3)
+
+
+def print_scaling_curves(results, fobj=sys.stdout):
+
+    """ (dict, file) -> void
+    This function takes the dictionary returned by run_benchmarks and writes, for every benchmark, its time in
+    milliseconds at each size and its scaling exponent.
+
+    """
+
+    size_keys = []
+
+    for size_times in results.values():
+        for size_key in size_times:
+            if size_key not in size_keys:
+                size_keys.append(size_key)
+
+    size_keys.sort(key=get_size_points)
+
+    fobj.write('%-38s' % 'benchmark (ms)' + ''.join(['%12s' % size_key for size_key in size_keys]) + '%10s\n' % 'exponent')
+
+    for name, size_times in results.items():
+
+        times = ['%12.3f' % (size_times[size_key] * 1000) if size_key in size_times else '%12s' % '-' for size_key in size_keys]
+        exponent = get_scaling_exponent(size_times)
+        fobj.write('%-38s' % name + ''.join(times) + '%10s\n' % ('-' if exponent == None else '%.2f' % exponent))
+
+
+def get_regressions(results, baseline_results, threshold):
+
+    """ (dict, dict, float) -> list
+    This function takes the results of run_benchmarks, baseline results in the same format and a threshold (0.2 for 20%),
+    and returns a list of tuples (benchmark name, size key, baseline time, time) of every benchmark that got slower than
+    its baseline time by more than the threshold. Benchmarks or sizes missing from the baseline are not compared.
+
+    >>> get_regressions({'get_top_n': {'10x10': 0.0013}}, {'get_top_n': {'10x10': 0.001}}, 0.2)
+    [('get_top_n', '10x10', 0.001, 0.0013)]
+    >>> get_regressions({'get_top_n': {'10x10': 0.0011}}, {'get_top_n': {'10x10': 0.001}}, 0.2)
+    []
+
+    """
+
+    regressions = []
+
+    for name, size_times in results.items():
+        for size_key, seconds in size_times.items():
+
+            baseline_seconds = baseline_results.get(name, {}).get(size_key)
+
+            if baseline_seconds != None and seconds > baseline_seconds * (1 + threshold):
+                regressions.append((name, size_key, baseline_seconds, seconds))
+
+    return regressions
+
+
+def get_size(size_string):
+
+    """ (str) -> tuple
+    This function takes a size such as '100x50' given on the command line and returns (100, 50).
+
+    >>> get_size('100x50')
+    (100, 50)
+
+    """
+
+    try:
+        num_countries, num_years = size_string.split('x')
+        return int(num_countries), int(num_years)
+    except ValueError:
+        raise argparse.ArgumentTypeError('sizes must look like COUNTRIESxYEARS, e.g. 100x50')
+
+
+def main(argv=None):
+
+    """ (list) -> int
+    This function runs the benchmarks from the command line, prints the scaling curves and returns the exit status:
+    1 if a benchmark is slower than the baseline by more than the threshold, 0 otherwise.
+
+    """
+
+    parser = argparse.ArgumentParser(description='Time the aggregate functions and the data side of the plots on '
+                                                 'synthetic datasets of increasing size.')
+    parser.add_argument('--sizes', nargs='+', type=get_size, default=default_sizes, metavar='COUNTRIESxYEARS',
+                        help='dataset sizes, from the smallest to the largest')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timings kept the best of')
+    parser.add_argument('--only', nargs='+', metavar='NAME', help='only run these benchmarks')
+    parser.add_argument('--save', metavar='FILE', help='write the results to a JSON file (usable as a baseline)')
+    parser.add_argument('--baseline', metavar='FILE', help='JSON file of earlier results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='fail when a benchmark is slower than its baseline by more than this fraction')
+    options = parser.parse_args(argv)
+
+    results = run_benchmarks(options.sizes, options.repeat, options.only)
+    print_scaling_curves(results)
+
+    if options.save != None:
+        fobj = open(options.save, "w", encoding="utf-8")
+        json.dump(results, fobj, indent=4)
+        fobj.close()
+
+    if options.baseline == None:
+        return 0
+
+    fobj = open(options.baseline, "r", encoding="utf-8")
+    baseline_results = json.load(fobj)
+    fobj.close()
+
+    regressions = get_regressions(results, baseline_results, options.threshold)
+
+    for name, size_key, baseline_seconds, seconds in regressions:
+        print('REGRESSION %s at %s: %.3f ms -> %.3f ms (%+.0f%%)' % (name, size_key, baseline_seconds * 1000, seconds * 1000,
+                                                                   (seconds / baseline_seconds - 1) * 100))
+
+    if regressions != []:
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,20 +1,25 @@
 # Author: Sandy Nguyen
 
 from copy import copy
+from interning import intern_string, intern_year, get_continents_tuple
 
 class Country:
     
     """
     Represents a country
     
-    Instance Attributes: iso_code (str), name (str), continents (list), co2_emissions (dict), population (dict)
-    Class Attributes: min_year_recorded (int), min_year_recorded (int).
+    Instance Attributes: iso_code (str), name (str), continents (tuple), co2_emissions (dict), population (dict), version (int)
+    Class Attributes: min_year_recorded (int), min_year_recorded (int), data_version (int).
     
     """
     
     min_year_recorded = 1000000
     max_year_recorded = 0
     
+    # Increased every time a Country is created or gets new yearly data, so that cached results can tell they're stale.
+    # Each country keeps the value of its last change in its version
+    data_version = 0
+    
     
     def __init__(self, iso_code, name, continents, year, country_co2, country_pop):
         
@@ -23,7 +28,7 @@ class Country:
         
         >>> r = Country("RUS", "Russia", ["ASIA","EUROPE"], 2007, 1604.778, 14266000)
         >>> r.continents
-        ["ASIA","EUROPE"]
+        ('ASIA', 'EUROPE')
         
         >>> a = Country("AFG", "Afghnistan", ["ASIA"], 1949, 0.015, 7663783)
         >>> Country.min_year_recorded
@@ -35,11 +40,11 @@ class Country:
 
         """
         
-        # Initializing the object attributes
-        self.iso_code = iso_code
-        self.name = name
-        self.year = int(year)
-        self.continents = continents.copy()
+        # Initializing the object attributes (strings, continents and years are shared between countries)
+        self.iso_code = intern_string(iso_code)
+        self.name = intern_string(name)
+        self.year = intern_year(int(year))
+        self.continents = get_continents_tuple(continents)
         self.country_co2 = country_co2
         self.country_pop = country_pop
         
@@ -69,6 +74,8 @@ class Country:
         # If we recorded the country's population that year, add the year-population pair in self.population
         if self.country_pop not in [-1, '']:
             self.population[self.year] = self.country_pop
+        
+        self.update_version()
             
 
     def __str__(self):
@@ -91,11 +98,11 @@ class Country:
 
         """
         
-        # If the country belongs to more than 1 continent
-        if type(self.continents) == list:
+        # If the continents are in a tuple or a list
+        if type(self.continents) != str:
             return self.name + '\t' + ','.join(self.continents) + '\t' + str(self.co2_emissions) + '\t' + str(self.population)
         
-        # If the country belongs to only 1 continent
+        # If the continents are already a string
         else:
             return self.name + '\t' + self.continents + '\t' + str(self.co2_emissions) + '\t' + str(self.population)
     
@@ -124,14 +131,17 @@ class Country:
         """
         
         str_data_list = str_data.split('\t')
+        data_year = intern_year(int(str_data_list[0]))
         
         # Adding the key year and co2 emissions value into the self.co2_emissions dictionary
         if str_data_list[1] != '':
-            self.co2_emissions[int(str_data_list[0])] = float(str_data_list[1])
+            self.co2_emissions[data_year] = float(str_data_list[1])
         
         # Adding the key year and population value into the self.population dictionary
         if str_data_list[2] != '':
-            self.population[int(str_data_list[0])] = int(str_data_list[2])
+            self.population[data_year] = int(str_data_list[2])
+        
+        self.update_version()
         
         # Updating the Country's minimum/maximum year recorded
         if Country.min_year_recorded > self.year:
@@ -139,6 +149,46 @@ class Country:
             
         if Country.max_year_recorded < self.year:
             Country.max_year_recorded = self.year
+    
+    
+    def update_version(self):
+        
+        """ () -> void
+        This instance method records that the country's data changed: Country.data_version is increased and the country's
+        version set to it. Code changing co2_emissions or population directly must call it.
+        
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> version = q.version
+        >>> q.add_yearly_data("1993\\t30.985\\t501000")
+        >>> q.version > version, q.version == Country.data_version
+        (True, True)
+        
+        """
+        
+        Country.data_version += 1
+        self.version = Country.data_version
+    
+    
+    def get_copy(self):
+        
+        """ () -> obj
+        This instance method returns a new Country with the same attributes but its own co2_emissions and population
+        dictionaries, so that adding yearly data to the copy leaves this country unchanged.
+        
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> c = q.get_copy()
+        >>> c.add_yearly_data("1993\\t30.985\\t501000")
+        >>> q.co2_emissions, c.co2_emissions
+        ({2007: 62.899}, {2007: 62.899, 1993: 30.985})
+        
+        """
+        
+        # Strings and the continents tuple are immutable, so only the yearly dictionaries need their own copy
+        country_copy = copy(self)
+        country_copy.co2_emissions = dict(self.co2_emissions)
+        country_copy.population = dict(self.population)
+        
+        return country_copy
         
         
     def get_co2_emissions_by_year(self, country_year):
@@ -250,17 +300,20 @@ class Country:
         'Albania\\tEUROPE\\t{1991: 4.283}\\t{1991: 3280000}'
         
         >>> q = Country.get_country_from_data("QAT\\tQatar\\tASIA\\t2007\\t62.899\\t1218000")
-        "Qatar\\tASIA\\t{'2007': '62.899'}\\t{'2007': '1218000'}"
+        >>> str(q)
+        'Qatar\\tASIA\\t{2007: 62.899}\\t{2007: 1218000}'
         
         >>> r = Country.get_country_from_data("RUS\\tRussia\\tASIA,EUROPE\\t2007\\t1604.778\\t14266000")
-        "Russia\tASIA,EUROPE\t{'2007': '1604.778'}\t{'2007': '14266000'}"
+        >>> str(r)
+        'Russia\\tASIA,EUROPE\\t{2007: 1604.778}\\t{2007: 14266000}'
 
         """
         
         info = country_info.split('\t')
         
+        # Countries belonging to more than one continent have them joined with commas (e.g. 'ASIA,EUROPE')
         if type(info[2]) == str:
-            info[2] = [info[2]]
+            info[2] = info[2].split(',')
         
         # Creating a new Country object with the country's information
         return Country(info[0], info[1], info[2], info[3], info[4], info[5])
@@ -304,9 +357,9 @@ class Country:
             
             country_continents = country.continents
             
-            # If the continents are in a list
-            if type(country_continents) != list:
-                country_continents = country.continents.split(', ')
+            # If the continents are in a string, getting the shared tuple instead of splitting it again
+            if type(country_continents) == str:
+                country_continents = get_continents_tuple(country_continents)
                 
             # Looping through each continent belonging to that country
             for continent in country_continents:
@@ -583,10 +636,49 @@ class Country:
         return tuple_list
 
 
-def get_countries_from_file(filename):
-    """ (str) -> dict
+def add_tracked_row(country, data_list, line_number, duplicate_tracker):
+    """ (Country, list, int, DuplicateTracker) -> void
+    This function takes the Country object of a row already added to it, the columns of the row, its line number and a
+    DuplicateTracker, records the row in the tracker and, if its year was already seen, sets the country's values for
+    that year to the ones the tracker's policy keeps.
+    
+    >>> from duplicates import DuplicateTracker
+    >>> t = DuplicateTracker('keep_first')
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+    >>> add_tracked_row(q, ['QAT', 'Qatar', 'ASIA', '2007', '62.899', '1218000'], 1, t)
+    >>> q.add_yearly_data("2007\\t70.0\\t")
+    >>> add_tracked_row(q, ['QAT', 'Qatar', 'ASIA', '2007', '70.0', ''], 2, t)
+    >>> q.co2_emissions
+    {2007: 62.899}
+    
+    """
+    
+    # Importing here since only tracked loading needs it
+    from duplicates import get_row_value
+    
+    data_year = intern_year(int(data_list[3]))
+    kept_co2, kept_pop = duplicate_tracker.add_row(data_list[0], data_year, get_row_value(data_list[4], False),
+                                                   get_row_value(data_list[5], True), line_number)
+    
+    # add_yearly_data already kept the last values, which is all 'keep_last' needs
+    if duplicate_tracker.policy == 'keep_last' or not duplicate_tracker.is_duplicate(data_list[0], data_year):
+        return
+    
+    for yearly_data, kept_value in [(country.co2_emissions, kept_co2), (country.population, kept_pop)]:
+        if kept_value == None:
+            yearly_data.pop(data_year, None)
+        else:
+            yearly_data[data_year] = kept_value
+    
+    country.update_version()
+
+
+def get_countries_from_file(filename, duplicate_tracker=None):
+    """ (str, DuplicateTracker) -> dict
     This function takes a string representing a filename as input and returns a dictionary mapping the countries' iso codes
     to object of type Country.
+    With a DuplicateTracker, every row is recorded in it as the file is read, and the values of a year repeated on
+    several rows are the ones its policy keeps (the last value of each field without one, like 'keep_last').
     
     >>> d1 = get_countries_from_file("small_co2_data.tsv")
     >>> d2 = get_countries_from_file("large_co2_data.tsv")
@@ -605,12 +697,14 @@ def get_countries_from_file(filename):
     # Opening files and creating local variables
     fobj = open(filename, "r", encoding="utf-8")
     fobj_dict = {}
+    line_number = 0
     
     for line in fobj:
         
         # Striping and spliting line
         new_line = line.strip('\n')
         new_new_line = new_line.split('\t')
+        line_number += 1
         
         # If the Country object hasn't been created yet
         if new_new_line[0] not in fobj_dict:
@@ -621,6 +715,9 @@ def get_countries_from_file(filename):
         else:
             join_new_new_line = (new_new_line[3] + '\t' + new_new_line[4] + '\t' + new_new_line[5])
             fobj_dict[new_new_line[0]].add_yearly_data(join_new_new_line)
+        
+        if duplicate_tracker != None:
+            add_tracked_row(fobj_dict[new_new_line[0]], new_new_line, line_number, duplicate_tracker)
     
     fobj.close()
             
@@ -0,0 +1,183 @@
+# Author: Sandy Nguyen
+
+import hashlib
+import os
+
+# The cache is off by default so interactive runs still show every chart
+enabled = False
+manifest_filename = '.chart_cache.tsv'
+cache_hits = 0
+cache_misses = 0
+
+# Part of every chart key, increased when the way charts are drawn changes so that charts saved before aren't reused
+# (version 2: each figure is closed after being saved, older charts could hold the bars of the charts before them)
+render_version = 2
+
+
+def get_chart_key(chart_type, chart_params, chart_values):
+
+    """ (str, list, list) -> str
+    This function takes a string representing the type of chart (e.g. 'bar' or 'plot'), a list of the chart's parameters
+    (title, labels, file name...) and a list of the series of values passed to plt.bar/plt.plot, and returns a string
+    representing a hash of all of them. Two charts have the same key only if they would draw the exact same values.
+
+    >>> k1 = get_chart_key('bar', ['title'], [['ASIA', 'EUROPE'], [1.5, 2.25]])
+    >>> k2 = get_chart_key('bar', ['title'], [['ASIA', 'EUROPE'], [1.5, 2.25]])
+    >>> k1 == k2
+    True
+
+    >>> k1 == get_chart_key('bar', ['title'], [['ASIA', 'EUROPE'], [1.5, 2.26]])
+    False
+
+    >>> k1 == get_chart_key('plot', ['title'], [['ASIA', 'EUROPE'], [1.5, 2.25]])
+    False
+
+    """
+
+    hasher = hashlib.sha256()
+    hasher.update(str(render_version).encode('utf-8') + b'\x00')
+    hasher.update(chart_type.encode('utf-8'))
+
+    # Hashing the parameters, separated so that ['ab', 'c'] and ['a', 'bc'] don't give the same key
+    for param in chart_params:
+        hasher.update(b'\x00' + repr(param).encode('utf-8'))
+
+    # Hashing the exact values of every series (repr keeps all the digits of a float)
+    for series in chart_values:
+        hasher.update(b'\x01')
+
+        for value in series:
+            hasher.update(b'\x02' + repr(value).encode('utf-8'))
+
+    return hasher.hexdigest()
+
+
+def get_manifest_path(output_filename):
+
+    """ (str) -> str
+    This function takes a string representing the file a chart is saved to and returns the path of the cache manifest
+    kept in the same directory.
+
+    >>> get_manifest_path('co2_pc_by_continent_2000.png')
+    '.chart_cache.tsv'
+
+    >>> get_manifest_path(os.path.join('charts', 'top_10_co2_pc_2000.png')) == os.path.join('charts', '.chart_cache.tsv')
+    True
+
+    """
+
+    return os.path.join(os.path.dirname(output_filename), manifest_filename)
+
+
+def get_cache_manifest(manifest_path):
+
+    """ (str) -> dict
+    This function takes a string representing a cache manifest file with format 'output file name\tchart key\n' and
+    returns a dictionary mapping each output file name to the key of the chart last saved there. A missing manifest
+    gives an empty dictionary.
+
+    >>> get_cache_manifest('no_such_manifest.tsv')
+    {}
+
+    """
+
+    manifest_dict = {}
+
+    # If nothing was ever cached in this directory
+    if not os.path.exists(manifest_path):
+        return manifest_dict
+
+    fobj = open(manifest_path, "r", encoding="utf-8")
+
+    for line in fobj:
+
+        line_list = line.strip('\n').split('\t')
+
+        # Skipping lines that were only partially written
+        if len(line_list) == 2:
+            manifest_dict[line_list[0]] = line_list[1]
+
+    fobj.close()
+
+    return manifest_dict
+
+
+def is_chart_cached(output_filename, chart_key):
+
+    """ (str, str) -> bool
+    This function takes a string representing the file a chart would be saved to and the chart's key, and returns True
+    if that exact chart was already saved there (the file exists and the manifest has the same key), False otherwise.
+    It always returns False when the cache is disabled. Hits and misses are counted in cache_hits and cache_misses.
+
+    >>> is_chart_cached('no_such_chart.png', 'abc')
+    False
+
+    """
+
+    global cache_hits, cache_misses
+
+    if not enabled:
+        return False
+
+    manifest_dict = get_cache_manifest(get_manifest_path(output_filename))
+
+    # The chart is only reused if it was saved with the same key and the file is still there
+    if manifest_dict.get(os.path.basename(output_filename)) == chart_key and os.path.exists(output_filename):
+        cache_hits += 1
+        return True
+
+    cache_misses += 1
+    return False
+
+
+def record_chart(output_filename, chart_key):
+
+    """ (str, str) -> void
+    This function takes a string representing the file a chart was just saved to and the chart's key, and records the
+    pair in the cache manifest so that the next identical chart can be skipped. Does nothing when the cache is disabled.
+
+    """
+
+    if not enabled:
+        return
+
+    manifest_path = get_manifest_path(output_filename)
+    manifest_dict = get_cache_manifest(manifest_path)
+    manifest_dict[os.path.basename(output_filename)] = chart_key
+
+    # Writing to a temporary file first so a crash never leaves a half-written manifest
+    fobj = open(manifest_path + '.tmp', "w", encoding="utf-8")
+
+    for chart_filename, key in manifest_dict.items():
+        fobj.write(chart_filename + '\t' + key + '\n')
+
+    fobj.close()
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+
+def get_cache_stats():
+
+    """ () -> dict
+    This function returns a dictionary with the number of charts that were skipped ('hits') and the number of charts
+    that had to be rendered ('misses') since the last reset.
+
+    >>> reset_cache_stats()
+    >>> get_cache_stats()
+    {'hits': 0, 'misses': 0}
+
+    """
+
+    return {'hits': cache_hits, 'misses': cache_misses}
+
+
+def reset_cache_stats():
+
+    """ () -> void
+    This function sets the cache hits and misses counters back to 0.
+
+    """
+
+    global cache_hits, cache_misses
+
+    cache_hits = 0
+    cache_misses = 0
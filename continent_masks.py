@@ -0,0 +1,204 @@
+# Author: Sandy Nguyen
+
+from add_continents import get_iso_codes_by_continent
+
+# Bit i stands for continents_list[i] (same order as the continent bar plots); other continents get the next bits
+continents_list = ['AFRICA', 'ASIA', 'EUROPE', 'NORTH AMERICA', 'OCEANIA', 'SOUTH AMERICA']
+
+
+def is_single_continent(mask):
+
+    """ (int) -> bool
+    This function takes a continents bitmask and returns True if exactly one bit is set.
+
+    >>> is_single_continent(0b010), is_single_continent(0b110), is_single_continent(0)
+    (True, False, False)
+
+    """
+
+    return mask != 0 and mask & (mask - 1) == 0
+
+
+def get_matching_masks(mask_column, any_of=0, all_of=0, exactly_one=False):
+
+    """ (list, int, int, bool) -> list
+    This function takes a list of continents bitmasks (one per country) and returns the list of the positions of the
+    countries belonging to at least one continent of any_of (ignored if 0), to every continent of all_of (ignored if 0)
+    and, if exactly_one is True, to only one continent. Each position appears once, so a country on two continents of
+    any_of is only counted once.
+
+    >>> get_matching_masks([0b001, 0b110, 0b010, 0b100], any_of=0b011)
+    [0, 1, 2]
+    >>> get_matching_masks([0b001, 0b110, 0b010, 0b100], any_of=0b110, exactly_one=True)
+    [2, 3]
+    >>> get_matching_masks([0b001, 0b110, 0b010, 0b100], all_of=0b110)
+    [1]
+
+    """
+
+    positions = []
+
+    for i in range(len(mask_column)):
+
+        mask = mask_column[i]
+
+        if any_of != 0 and mask & any_of == 0:
+            continue
+
+        if mask & all_of != all_of:
+            continue
+
+        if exactly_one and not is_single_continent(mask):
+            continue
+
+        positions.append(i)
+
+    return positions
+
+
+class ContinentMasks:
+
+    """
+    Represents the continents of every country as bitmasks (one bit per continent), so that continent filters are
+    bitwise operations on integers instead of lists of continents.
+
+    Instance Attributes: continent_bits (dict), iso_masks (dict)
+
+    """
+
+    def __init__(self, continents_dict):
+
+        """ (dict) -> void
+        This constructor takes a dictionary mapping continents to lists of ISO codes (as returned by
+        get_iso_codes_by_continent) and computes the bitmask of every ISO code.
+
+        >>> m = ContinentMasks({'ASIA': ['RUS', 'QAT'], 'EUROPE': ['RUS', 'ALB']})
+        >>> m.iso_masks['RUS'] == m.get_mask(['ASIA', 'EUROPE'])
+        True
+
+        """
+
+        self.continent_bits = {}
+
+        for continent in continents_list + list(continents_dict):
+            if continent not in self.continent_bits:
+                self.continent_bits[continent] = 1 << len(self.continent_bits)
+
+        self.iso_masks = {}
+
+        for continent, iso_codes in continents_dict.items():
+            for iso_code in iso_codes:
+                self.iso_masks[iso_code] = self.iso_masks.get(iso_code, 0) | self.continent_bits[continent]
+
+
+    @classmethod
+    def from_file(cls, continents_filename):
+
+        """ (str) -> ContinentMasks
+        This class method takes a string representing a file with format 'ISO country code\tcontinent\n' (like
+        iso_codes_by_continent.tsv) and returns the continents bitmasks of its countries.
+
+        >>> m = ContinentMasks.from_file('data/iso_codes_by_continent.tsv')
+        >>> m.get_continents(m.iso_masks['RUS'])
+        ('ASIA', 'EUROPE')
+
+        """
+
+        return cls(get_iso_codes_by_continent(continents_filename))
+
+
+    def get_mask(self, continents):
+
+        """ (list or tuple or str) -> int
+        This instance method takes continents (a list, a tuple or a comma separated string such as 'ASIA,EUROPE') and
+        returns their bitmask. A ValueError is raised for an unknown continent.
+
+        >>> m = ContinentMasks({})
+        >>> m.get_mask('ASIA,EUROPE'), m.get_mask(['AFRICA'])
+        (6, 1)
+
+        """
+
+        if type(continents) == str:
+            continents = continents.split(',')
+
+        mask = 0
+
+        for continent in continents:
+
+            if continent not in self.continent_bits:
+                raise ValueError('unknown continent: ' + continent)
+
+            mask |= self.continent_bits[continent]
+
+        return mask
+
+
+    def get_continents(self, mask):
+
+        """ (int) -> tuple
+        This instance method takes a bitmask and returns the tuple of its continents, in bit order.
+
+        >>> ContinentMasks({}).get_continents(0b10100)
+        ('EUROPE', 'OCEANIA')
+
+        """
+
+        return tuple([continent for continent, bit in self.continent_bits.items() if mask & bit])
+
+
+    def get_country_mask(self, country):
+
+        """ (Country) -> int
+        This instance method takes a Country and returns its bitmask from the continents file, or from its own continents
+        if its ISO code isn't in the file.
+
+        """
+
+        if country.iso_code in self.iso_masks:
+            return self.iso_masks[country.iso_code]
+
+        return self.get_mask(country.continents)
+
+
+    def get_mask_column(self, countries_dict):
+
+        """ (dict) -> list
+        This instance method takes a dictionary mapping ISO codes to Country objects and returns the list of their
+        bitmasks, in the order of the dictionary, to be filtered with get_matching_masks.
+
+        """
+
+        return [self.get_country_mask(country) for country in countries_dict.values()]
+
+
+    def get_countries(self, countries_dict, any_of=None, all_of=None, exactly_one=False, mask_column=None):
+
+        """ (dict, list, list, bool, list) -> list
+        This instance method takes a dictionary mapping ISO codes to Country objects, continents (lists, tuples or comma
+        separated strings) of which a country needs at least one (any_of) or all (all_of), and whether countries must
+        belong to exactly one continent, and returns the list of matching Country objects, each once. The list can be
+        passed to Country.get_total_historical_co2_emissions and the other aggregates of build_countries.
+        A mask_column already computed by get_mask_column for the same dictionary can be reused.
+
+        >>> from build_countries import Country
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+        >>> m = ContinentMasks({})
+        >>> c = m.get_countries({'RUS': r, 'QAT': q, 'ALB': b}, any_of='ASIA,EUROPE')
+        >>> Country.get_total_historical_co2_emissions(c, 2007)
+        1671.601
+        >>> [country.iso_code for country in m.get_countries({'RUS': r, 'QAT': q, 'ALB': b}, exactly_one=True)]
+        ['QAT', 'ALB']
+
+        """
+
+        if mask_column == None:
+            mask_column = self.get_mask_column(countries_dict)
+
+        any_of_mask = self.get_mask(any_of) if any_of != None else 0
+        all_of_mask = self.get_mask(all_of) if all_of != None else 0
+        countries_list = list(countries_dict.values())
+
+        return [countries_list[i] for i in get_matching_masks(mask_column, any_of_mask, all_of_mask, exactly_one)]
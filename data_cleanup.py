@@ -1,5 +1,9 @@
 # Author: Sandy Nguyen
 
+import time
+
+import instrumentation
+
 def find_delim(line):
     
     """ (str) -> str
@@ -36,6 +40,83 @@ def find_delim(line):
         return delim[delim_counter.index(max(delim_counter))]
     
     
+def get_tab_separated_line(line):
+    
+    """ (str) -> str
+    This function takes a string representing a raw line as input and returns the line with its most commonly used
+    delimiter replaced by tabs (one line of clean_one).
+    
+    >>> get_tab_separated_line("QAT,Qatar,2001,41.215,615000\\n")
+    'QAT\\tQatar\\t2001\\t41.215\\t615000\\n'
+    
+    """
+    
+    delim = find_delim(line)
+    
+    return line.replace(delim, '\t')
+    
+    
+def get_final_clean_line(line):
+    
+    """ (str) -> str
+    This function takes a string representing a line written by clean_one as input and returns the line with 5
+    tab separated columns and dots instead of decimal commas (one line of final_clean), or None if the line can't
+    be fixed.
+    
+    >>> get_final_clean_line("QAT\\tQatar\\t2001\\t41,215\\t615000\\n")
+    'QAT\\tQatar\\t2001\\t41.215\\t615000\\n'
+    
+    >>> get_final_clean_line("BIH\\tBosnia\\tand\\tHerzegovina\\t2001\\t14.7\\t3800000\\n")
+    'BIH\\tBosnia and Herzegovina\\t2001\\t14.7\\t3800000\\n'
+    
+    >>> get_final_clean_line("CMR\\tCameroon\\t2001\\t3\\t5\\t16000000\\t9\\n") == None
+    True
+    
+    """
+    
+    delim = find_delim(line)
+    line_dot = line.replace(',', '.')
+    line_list = line_dot.split(delim)
+    
+    # If the the list has 5 columns
+    if len(line_list) == 5:
+        return '\t'.join(line_list)
+    
+    # If the deliminiter is a comma, then line wasn't split into parts since they were all replaced by dots
+    elif len(line_list) == 1:
+        line_list = line_dot.split('.')
+        line_list = line_list[:3] + [line_list[3] + '.' + line_list[4]] + [line_list[5]]
+        return '\t'.join(line_list)
+    
+    # If the list has more than 6 columns
+    else:
+    
+        while len(line_list) >= 5:
+            
+            # If the third column is an integer
+            try:
+                if type(int(line_list[2])) == int:
+                    
+                    # If the the list has 5 columns, everything is goodies
+                    if len(line_list) == 5:
+                        return '\t'.join(line_list)
+                    
+                    # If the the list has 6 columns, join the third and fourth column with a dot
+                    elif len(line_list) == 6:
+                        line_list = line_list[:3] + [line_list[3] + '.' + line_list[4]] + [line_list[5]]
+                        return '\t'.join(line_list)
+                    
+                    # Otherwise there are too many columns after the year, so the line can't be fixed
+                    else:
+                        break
+
+            # If the third column isn't an integer, add the third and fourth column together
+            except ValueError:
+                line_list = [line_list[0]] + [line_list[1] + ' ' + line_list[2]] + line_list[3:]
+    
+    return None
+    
+    
 def clean_one(input_filename, output_filename):
     
     """ (str, str) -> int
@@ -56,31 +137,38 @@ def clean_one(input_filename, output_filename):
     """
     
     # Opening all the files and creating local variables
+    start_time = time.perf_counter()
     fobj_input = open(input_filename, "r", encoding="utf-8")
     fobj_output = open(output_filename, "w", encoding="utf-8")
     num_of_lines = 0
+    lines_read = 0
     
     for line in fobj_input:
         
+        lines_read += 1
+        
         # Replace all the delim with a tab and writing it in the output_filename
-        delim = find_delim(line)
-        new_line = line.replace(delim, '\t')
-        fobj_output.write(new_line)
+        fobj_output.write(get_tab_separated_line(line))
         num_of_lines += 1
     
     fobj_input.close()
     fobj_output.close()
+    
+    instrumentation.record_file_stage('clean_one', lines_read, num_of_lines, time.perf_counter() - start_time)
 
     return num_of_lines  
      
 
-def final_clean(input_filename, output_filename):
+def final_clean(input_filename, output_filename, duplicate_tracker=None, quarantine_filename=None):
     
-    """ (str, str) -> int
+    """ (str, str, DuplicateTracker, str) -> int
     This function takes two strings representing files (intput_filename and output_filename), reads the
     input_filename, makes changes to each of the line (each line should have 5 columns and all commas which are
     used to indicate a decimal number should be replace with dots) and write the new version to output_filename.
     It returns an integer indicating the number of lines written to output_filename.
+    With a DuplicateTracker, the clean lines are recorded in it and the redundant ones (see is_redundant_line)
+    aren't written. With a quarantine file, the lines that can't be fixed are appended to it with reason code
+    BAD_COLUMNS instead of being left out silently.
     
     >>> final_clean('books_tab_sep_data.tsv', 'books_clean_data.tsv')
     7
@@ -94,59 +182,42 @@ def final_clean(input_filename, output_filename):
     """
     
     # Opening all the files and creating local variables
+    start_time = time.perf_counter()
     fobj_input = open(input_filename, "r", encoding="utf-8")
     fobj_output = open(output_filename, "w", encoding="utf-8")
     num_of_lines = 0
+    lines_read = 0
+    fobj_quarantine = None
     
-    for line in fobj_input:
+    if quarantine_filename != None:
         
-        delim = find_delim(line)
-        line_dot = line.replace(',', '.')
-        line_list = line_dot.split(delim)
+        # Importing here since validation imports add_continents, which cleaning doesn't need otherwise
+        import validation
         
-        # If the the list has 5 columns
-        if len(line_list) == 5:
-            line_list_tab = '\t'.join(line_list)
-            fobj_output.write(line_list_tab)
-            num_of_lines += 1
+        fobj_quarantine = open(quarantine_filename, "a", encoding="utf-8")
+    
+    for line in fobj_input:
         
-        # If the deliminiter is a comma, then line wasn't split into parts since they were all replaced by dots
-        elif len(line_list) == 1:
-            line_list = line_dot.split('.')
-            line_list = line_list[:3] + [line_list[3] + '.' + line_list[4]] + [line_list[5]]
-            line_list_tab = '\t'.join(line_list)
-            fobj_output.write(line_list_tab)
-            num_of_lines += 1
+        lines_read += 1
+        clean_line = get_final_clean_line(line)
         
-        # If the list has more than 6 columns
-        else:
+        if clean_line == None and fobj_quarantine != None:
+            validation.write_quarantine(fobj_quarantine, 'final_clean', lines_read, validation.reason_bad_columns, line)
         
-            while len(line_list) >= 5:
-                
-                # If the third column is an integer
-                try:
-                    if type(int(line_list[2])) == int:
-                        
-                        # If the the list has 5 columns, everything is goodies
-                        if len(line_list) == 5:
-                            line_list_tab = '\t'.join(line_list)
-                            fobj_output.write(line_list_tab)
-                            num_of_lines += 1
-                            break
-                        
-                        # If the the list has 6 columns, join the third and fourth column with a dot
-                        elif len(line_list) == 6:
-                            line_list = line_list[:3] + [line_list[3] + '.' + line_list[4]] + [line_list[5]]
-                            line_list_tab = '\t'.join(line_list)
-                            fobj_output.write(line_list_tab)
-                            num_of_lines += 1
-                            break
-
-                # If the third column isn't an integer, add the third and fourth column together
-                except ValueError:
-                    line_list = [line_list[0]] + [line_list[1] + ' ' + line_list[2]] + line_list[3:]
+        # Leaving out the lines repeating a year without changing the values kept for it
+        if clean_line != None and duplicate_tracker != None and duplicate_tracker.is_redundant_line(clean_line, lines_read):
+            continue
+        
+        if clean_line != None:
+            fobj_output.write(clean_line)
+            num_of_lines += 1
     
     fobj_input.close()
     fobj_output.close()
     
+    if fobj_quarantine != None:
+        fobj_quarantine.close()
+    
+    instrumentation.record_file_stage('final_clean', lines_read, num_of_lines, time.perf_counter() - start_time)
+    
     return num_of_lines
\ No newline at end of file
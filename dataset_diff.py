@@ -0,0 +1,179 @@
+# Author: Sandy Nguyen
+
+import argparse
+import json
+import sys
+from shard_loader import parse_shard
+
+
+def get_series_from_countries(countries_dict):
+
+    """ (dict) -> dict
+    This function takes a dictionary mapping ISO codes to Country objects and returns a dictionary mapping each ISO code
+    to a list [name, continents, co2 emissions dictionary, population dictionary], the shape parse_shard returns for a
+    file.
+
+    >>> from build_countries import Country
+    >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+    >>> get_series_from_countries({'RUS': r})
+    {'RUS': ['Russia', 'ASIA,EUROPE', {2007: 1604.778}, {2007: 14266000}]}
+
+    """
+
+    series_dict = {}
+
+    for iso_code, country in countries_dict.items():
+        series_dict[iso_code] = [country.name, ','.join(country.continents), country.co2_emissions, country.population]
+
+    return series_dict
+
+
+def get_series_diff(old_series, new_series):
+
+    """ (dict, dict) -> dict
+    This function takes two dictionaries mapping ISO codes to [name, continents, co2 emissions, population] (as returned
+    by parse_shard or get_series_from_countries) and returns the differences between them, going through each data
+    point once:
+    'added' -> list of (ISO code, year, field, new value), 'removed' -> list of (ISO code, year, field, old value),
+    'changed' -> list of (ISO code, year, field, old value, new value), where field is 'co2' or 'population' (or
+    'name' and 'continents' with year None), 'added_countries' and 'removed_countries' -> lists of ISO codes, and
+    'affected_countries' -> dictionary mapping each ISO code with any difference to its first year that differs
+    (None if only its name or continents differ). Values of a country for years before that first year didn't change,
+    so only results from that year on need to be computed again.
+
+    >>> old = {'QAT': ['Qatar', 'ASIA', {2000: 1.0, 2001: 2.0}, {2000: 10}], 'ALB': ['Albania', 'EUROPE', {2000: 3.0}, {}]}
+    >>> new = {'QAT': ['Qatar', 'ASIA', {2000: 1.0, 2001: 2.5, 2002: 3.0}, {}], 'ALB': ['Albania', 'EUROPE', {2000: 3.0}, {}]}
+    >>> d = get_series_diff(old, new)
+    >>> d['added'], d['removed'], d['changed']
+    ([('QAT', 2002, 'co2', 3.0)], [('QAT', 2000, 'population', 10)], [('QAT', 2001, 'co2', 2.0, 2.5)])
+    >>> d['affected_countries']
+    {'QAT': 2000}
+
+    """
+
+    diff = {'added': [], 'removed': [], 'changed': [], 'added_countries': [], 'removed_countries': [], 'affected_countries': {}}
+
+    for iso_code, old_country in old_series.items():
+        if iso_code not in new_series:
+            diff['removed_countries'].append(iso_code)
+
+    for iso_code, new_country in new_series.items():
+        if iso_code not in old_series:
+            diff['added_countries'].append(iso_code)
+
+    for iso_code in list(old_series) + diff['added_countries']:
+
+        old_country = old_series.get(iso_code, [None, None, {}, {}])
+        new_country = new_series.get(iso_code, [None, None, {}, {}])
+
+        # Most countries don't change at all, and comparing whole lists of dictionaries is done in C
+        if old_country == new_country:
+            continue
+
+        changed_years = []
+
+        for field, index in [('name', 0), ('continents', 1)]:
+            if old_country[index] != new_country[index] and old_country[index] != None and new_country[index] != None:
+                diff['changed'].append((iso_code, None, field, old_country[index], new_country[index]))
+
+        for field, index in [('co2', 2), ('population', 3)]:
+
+            old_values = old_country[index]
+            new_values = new_country[index]
+
+            if old_values == new_values:
+                continue
+
+            for year, old_value in old_values.items():
+
+                if year not in new_values:
+                    diff['removed'].append((iso_code, year, field, old_value))
+                    changed_years.append(year)
+
+                elif new_values[year] != old_value:
+                    diff['changed'].append((iso_code, year, field, old_value, new_values[year]))
+                    changed_years.append(year)
+
+            for year, new_value in new_values.items():
+                if year not in old_values:
+                    diff['added'].append((iso_code, year, field, new_value))
+                    changed_years.append(year)
+
+        diff['affected_countries'][iso_code] = min(changed_years) if changed_years != [] else None
+
+    return diff
+
+
+def get_countries_diff(old_countries_dict, new_countries_dict):
+
+    """ (dict, dict) -> dict
+    This function takes two dictionaries mapping ISO codes to Country objects (e.g. from get_countries_from_file) and
+    returns their differences, like get_series_diff.
+
+    """
+
+    return get_series_diff(get_series_from_countries(old_countries_dict), get_series_from_countries(new_countries_dict))
+
+
+def get_files_diff(old_filename, new_filename):
+
+    """ (str, str) -> dict
+    This function takes two strings representing cleaned co2 data files with continents (two versions of the data) and
+    returns their differences, like get_series_diff. The files are read without creating Country objects. A year
+    repeated with different values in the same file keeps its first value, like parse_shard.
+
+    >>> d = get_files_diff('data/small_co2_data.tsv', 'data/small_co2_data.tsv')
+    >>> d['affected_countries']
+    {}
+
+    """
+
+    old_series, old_conflicts = parse_shard(old_filename)
+    new_series, new_conflicts = parse_shard(new_filename)
+
+    return get_series_diff(old_series, new_series)
+
+
+def get_diff_summary(diff):
+
+    """ (dict) -> dict
+    This function takes a diff returned by get_series_diff and returns a dictionary with the number of added, removed
+    and changed data points and of added, removed and affected countries.
+
+    >>> get_diff_summary({'added': [1], 'removed': [], 'changed': [1, 2], 'added_countries': [], 'removed_countries': [], 'affected_countries': {'QAT': 2000}})
+    {'added': 1, 'removed': 0, 'changed': 2, 'added_countries': 0, 'removed_countries': 0, 'affected_countries': 1}
+
+    """
+
+    return dict([(key, len(value)) for key, value in diff.items()])
+
+
+def main(argv=None):
+
+    """ (list) -> int
+    This function prints the differences between the two files given on the command line as JSON, and returns 1 if
+    they differ, 0 otherwise (like diff).
+
+    """
+
+    parser = argparse.ArgumentParser(description='Compare two versions of a cleaned co2 data file with continents.')
+    parser.add_argument('old_file')
+    parser.add_argument('new_file')
+    parser.add_argument('--summary', action='store_true', help='only print the number of differences')
+    options = parser.parse_args(argv)
+
+    diff = get_files_diff(options.old_file, options.new_file)
+
+    if options.summary:
+        print(json.dumps(get_diff_summary(diff), indent=4))
+    else:
+        print(json.dumps(diff, indent=4))
+
+    if diff['affected_countries'] != {}:
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# Author: Sandy Nguyen
+
+# Methods accepted by get_downsampled_points
+downsample_methods = ['lttb', 'minmax']
+
+
+def get_lttb_points(x_values, y_values, max_points):
+
+    """ (list, list, int) -> tuple
+    This function takes two lists of numbers of the same length (the x and y coordinates of a series sorted by x) and an
+    integer representing a point budget, and returns a tuple of two lists keeping at most max_points points picked with
+    the Largest-Triangle-Three-Buckets algorithm. The first and last points are always kept and the kept points follow
+    the shape of the series (peaks and dips aren't dropped like with a fixed step). If the series already fits in the
+    budget, every point is kept.
+
+    >>> get_lttb_points([1990, 1991, 1992], [1.0, 5.0, 2.0], 10)
+    ([1990, 1991, 1992], [1.0, 5.0, 2.0])
+
+    >>> get_lttb_points([0, 1, 2, 3, 4, 5, 6], [0, 0, 0, 9, 0, 0, 0], 3)
+    ([0, 3, 6], [0, 9, 0])
+
+    >>> get_lttb_points(list(range(100)), list(range(100)), 2)
+    ([0, 99], [0, 99])
+
+    """
+
+    num_points = len(x_values)
+
+    # If the series already fits in the budget, every point is kept
+    if max_points >= num_points:
+        return list(x_values), list(y_values)
+
+    # With less than 3 points there are no buckets between the first and the last points
+    if max_points < 3:
+        return [x_values[0], x_values[-1]][:max(max_points, 1)], [y_values[0], y_values[-1]][:max(max_points, 1)]
+
+    sampled_x = [x_values[0]]
+    sampled_y = [y_values[0]]
+    bucket_size = (num_points - 2) / (max_points - 2)
+    previous_index = 0
+
+    for bucket in range(max_points - 2):
+
+        # Averaging the points of the next bucket (the last point when we're at the last bucket)
+        next_start = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, num_points)
+        next_avg_x = sum(x_values[next_start:next_end]) / (next_end - next_start)
+        next_avg_y = sum(y_values[next_start:next_end]) / (next_end - next_start)
+
+        # Picking the point of the current bucket making the largest triangle with the previous kept point and next average
+        bucket_start = int(bucket * bucket_size) + 1
+        bucket_end = int((bucket + 1) * bucket_size) + 1
+        previous_x = x_values[previous_index]
+        previous_y = y_values[previous_index]
+        max_area = -1
+        max_index = bucket_start
+
+        for i in range(bucket_start, bucket_end):
+            area = abs((previous_x - next_avg_x) * (y_values[i] - previous_y) - (previous_x - x_values[i]) * (next_avg_y - previous_y))
+
+            if area > max_area:
+                max_area = area
+                max_index = i
+
+        sampled_x.append(x_values[max_index])
+        sampled_y.append(y_values[max_index])
+        previous_index = max_index
+
+    sampled_x.append(x_values[-1])
+    sampled_y.append(y_values[-1])
+
+    return sampled_x, sampled_y
+
+
+def get_min_max_points(x_values, y_values, max_points):
+
+    """ (list, list, int) -> tuple
+    This function takes two lists of numbers of the same length (the x and y coordinates of a series sorted by x) and an
+    integer representing a point budget, and returns a tuple of two lists keeping at most max_points points. The series
+    is cut into max_points // 2 buckets and the minimum and maximum points of each bucket are kept in x order, so every
+    extreme stays visible. If the series already fits in the budget, every point is kept.
+
+    >>> get_min_max_points([1990, 1991, 1992], [1.0, 5.0, 2.0], 3)
+    ([1990, 1991, 1992], [1.0, 5.0, 2.0])
+
+    >>> get_min_max_points([0, 1, 2, 3, 4, 5, 6, 7], [3, 1, 8, 2, 2, 9, 0, 4], 4)
+    ([1, 2, 5, 6], [1, 8, 9, 0])
+
+    """
+
+    num_points = len(x_values)
+
+    # If the series already fits in the budget, every point is kept
+    if max_points >= num_points:
+        return list(x_values), list(y_values)
+
+    sampled_x = []
+    sampled_y = []
+    num_buckets = max(max_points // 2, 1)
+
+    for bucket in range(num_buckets):
+
+        bucket_start = bucket * num_points // num_buckets
+        bucket_end = (bucket + 1) * num_points // num_buckets
+        min_index = bucket_start
+        max_index = bucket_start
+
+        # Finding the minimum and maximum points of the bucket
+        for i in range(bucket_start, bucket_end):
+
+            if y_values[i] < y_values[min_index]:
+                min_index = i
+
+            if y_values[i] > y_values[max_index]:
+                max_index = i
+
+        # Keeping the two points in x order (only once if they're the same point)
+        for i in sorted(set([min_index, max_index]))[:max_points]:
+            sampled_x.append(x_values[i])
+            sampled_y.append(y_values[i])
+
+    return sampled_x, sampled_y
+
+
+def get_downsampled_points(x_values, y_values, max_points, method='lttb'):
+
+    """ (list, list, int, str) -> tuple
+    This function takes two lists of numbers of the same length, an integer representing a point budget and a string
+    representing the downsampling method ('lttb' or 'minmax') and returns a tuple of the two downsampled lists.
+
+    >>> get_downsampled_points([0, 1, 2, 3, 4, 5, 6], [0, 0, 0, 9, 0, 0, 0], 3, 'lttb')
+    ([0, 3, 6], [0, 9, 0])
+
+    >>> get_downsampled_points([0, 1], [0, 1], 3, 'average')
+    Traceback (most recent call last):
+    ValueError: unknown downsampling method 'average'
+
+    """
+
+    if method == 'lttb':
+        return get_lttb_points(x_values, y_values, max_points)
+
+    elif method == 'minmax':
+        return get_min_max_points(x_values, y_values, max_points)
+
+    else:
+        raise ValueError("unknown downsampling method '" + method + "'")
@@ -0,0 +1,233 @@
+# Author: Sandy Nguyen
+
+# What to keep when the same (ISO code, year) appears on several rows, for each of the co2 emissions and population:
+# the first or last value recorded, the average of the values recorded, or stop with a DuplicateError on different values
+duplicate_policies = ['keep_first', 'keep_last', 'error', 'average']
+
+
+class DuplicateError(ValueError):
+
+    """
+    Raised by the 'error' policy when the same (ISO code, year) has different values on two rows.
+
+    """
+
+    pass
+
+
+def get_row_value(value, is_integer):
+
+    """ (str, bool) -> float or int
+    This function takes a co2 emissions or population column and returns its value, None if it is missing ('' or -1).
+
+    >>> get_row_value('41.215', False), get_row_value('615000\\r', True), get_row_value('', True)
+    (41.215, 615000, None)
+
+    """
+
+    value = value.strip()
+
+    if value in ['', '-1']:
+        return None
+
+    if is_integer:
+        return int(value)
+
+    return float(value)
+
+
+class DuplicateTracker:
+
+    """
+    Represents the (ISO code, year) pairs seen while reading rows once, with the values to keep under a duplicate policy.
+    Each row costs one dictionary lookup. Only repeated pairs are kept in the report, with their line numbers and
+    distinct values.
+
+    Instance Attributes: policy (str), num_of_rows (int), seen (dict), first_lines (dict), duplicates (dict)
+
+    """
+
+    def __init__(self, policy='keep_last'):
+
+        """ (str) -> void
+        This constructor will initialize a tracker with no rows seen. 'keep_last' is what loading did before duplicates
+        were tracked. A ValueError is raised for an unknown policy.
+
+        >>> DuplicateTracker('keep_first').policy
+        'keep_first'
+
+        """
+
+        if policy not in duplicate_policies:
+            raise ValueError('unknown duplicate policy: ' + str(policy))
+
+        self.policy = policy
+        self.num_of_rows = 0
+
+        # (ISO code, year) -> [co2 kept, population kept, co2 sum, co2 count, population sum, population count]
+        self.seen = {}
+        self.first_lines = {}
+
+        # (ISO code, year) -> {'lines': line numbers, 'co2': distinct values, 'population': distinct values}
+        self.duplicates = {}
+
+
+    def add_row(self, iso_code, year, country_co2, country_pop, line_number=None):
+
+        """ (str, int, float, int, int) -> tuple
+        This instance method takes the ISO code, year, co2 emissions and population (None if missing) of a row and its
+        line number, and returns a tuple (co2 emissions, population) to keep for that ISO code and year so far (None if
+        still missing). With the 'error' policy, a DuplicateError is raised if a value differs from one already seen.
+
+        >>> t = DuplicateTracker('average')
+        >>> t.add_row('QAT', 2001, 40.0, 615000, 1)
+        (40.0, 615000)
+        >>> t.add_row('QAT', 2001, 42.0, 615001, 7)
+        (41.0, 615000)
+        >>> t.duplicates
+        {('QAT', 2001): {'lines': [1, 7], 'co2': [40.0, 42.0], 'population': [615000, 615001]}}
+
+        >>> t = DuplicateTracker('error')
+        >>> t.add_row('QAT', 2001, 40.0, 615000, 1)
+        (40.0, 615000)
+        >>> t.add_row('QAT', 2001, 42.0, 615000, 7)
+        Traceback (most recent call last):
+        duplicates.DuplicateError: QAT 2001 has co2 40.0 and 42.0 (lines 1, 7)
+
+        """
+
+        self.num_of_rows += 1
+        key = (iso_code, year)
+
+        if key not in self.seen:
+            self.seen[key] = [country_co2, country_pop, country_co2 or 0.0, int(country_co2 != None), country_pop or 0, int(country_pop != None)]
+            self.first_lines[key] = line_number
+            return (country_co2, country_pop)
+
+        kept = self.seen[key]
+
+        if key not in self.duplicates:
+            self.duplicates[key] = {'lines': [self.first_lines[key]], 'co2': [], 'population': []}
+
+            for field, value in [('co2', kept[0]), ('population', kept[1])]:
+                if value != None:
+                    self.duplicates[key][field].append(value)
+
+        duplicate = self.duplicates[key]
+        duplicate['lines'].append(line_number)
+
+        for field, index, value in [('co2', 0, country_co2), ('population', 1, country_pop)]:
+
+            if value == None:
+                continue
+
+            if value not in duplicate[field]:
+                duplicate[field].append(value)
+
+            if self.policy == 'error' and kept[index] != None and kept[index] != value:
+                raise DuplicateError('%s %d has %s %r and %r (lines %s)' % (iso_code, year, field, kept[index], value,
+                                                                             ', '.join([str(line) for line in duplicate['lines']])))
+
+            # Sums and counts are kept for every policy, so that the average can be reported too
+            kept[2 + 2 * index] += value
+            kept[3 + 2 * index] += 1
+
+            # Populations are counts of people, so their average is rounded
+            if self.policy == 'average' and field == 'population':
+                kept[index] = round(kept[2 + 2 * index] / kept[3 + 2 * index])
+
+            elif self.policy == 'average':
+                kept[index] = kept[2 + 2 * index] / kept[3 + 2 * index]
+
+            elif self.policy == 'keep_last' or kept[index] == None:
+                kept[index] = value
+
+        return (kept[0], kept[1])
+
+
+    def is_conflict(self, key):
+
+        """ ((str, int)) -> bool
+        This instance method takes an (ISO code, year) pair and returns True if its rows have different co2 emissions or
+        different populations (repeated identical rows aren't conflicts).
+
+        """
+
+        return key in self.duplicates and (len(self.duplicates[key]['co2']) > 1 or len(self.duplicates[key]['population']) > 1)
+
+
+    def get_report(self):
+
+        """ () -> dict
+        This instance method returns a compact report of the duplicates: the policy, the number of rows, of distinct
+        (ISO code, year) pairs, of repeated pairs and of conflicting pairs, and for each conflicting pair its line
+        numbers, distinct values and the values kept.
+
+        >>> t = DuplicateTracker()
+        >>> t.add_row('QAT', 2001, 40.0, 615000, 1)
+        (40.0, 615000)
+        >>> t.add_row('QAT', 2001, 42.0, 615000, 7)
+        (42.0, 615000)
+        >>> t.get_report()['conflicts']
+        [{'iso': 'QAT', 'year': 2001, 'lines': [1, 7], 'co2': [40.0, 42.0], 'population': [615000], 'kept': [42.0, 615000]}]
+
+        """
+
+        conflicts = []
+
+        for key, duplicate in self.duplicates.items():
+            if self.is_conflict(key):
+                conflicts.append({'iso': key[0], 'year': key[1], 'lines': duplicate['lines'], 'co2': duplicate['co2'],
+                                  'population': duplicate['population'], 'kept': self.seen[key][:2]})
+
+        return {'policy': self.policy, 'rows': self.num_of_rows, 'distinct_keys': len(self.seen),
+                'duplicate_keys': len(self.duplicates), 'conflicting_keys': len(conflicts), 'conflicts': conflicts}
+
+
+    def is_duplicate(self, iso_code, year):
+
+        """ (str, int) -> bool
+        This instance method returns True if the (ISO code, year) pair was seen on more than one row.
+
+        """
+
+        return (iso_code, year) in self.duplicates
+
+
+    def is_redundant_line(self, line, line_number=None):
+
+        """ (str, int) -> bool
+        This instance method takes a cleaned line (5 columns as written by final_clean, or 6 with the continents) and
+        its line number, records it, and returns True if the line repeats an ISO code and year without changing the
+        values kept by 'keep_first' or 'keep_last', so that it can be left out. Lines whose year or values can't be
+        read aren't recorded (and aren't redundant).
+
+        >>> t = DuplicateTracker('keep_first')
+        >>> lines = ['QAT\\tQatar\\t2001\\t41.215\\t615000\\n', 'QAT\\tQatar\\t2001\\t41.215\\t\\n', 'QAT\\tQatar\\tx\\t40.0\\t\\n']
+        >>> [t.is_redundant_line(lines[i], i + 1) for i in range(3)]
+        [False, True, False]
+
+        """
+
+        record = line.rstrip('\r\n').split('\t')
+
+        if len(record) not in [5, 6]:
+            return False
+
+        column_offset = len(record) - 5
+
+        try:
+            year = int(record[2 + column_offset])
+            country_co2 = get_row_value(record[3 + column_offset], False)
+            country_pop = get_row_value(record[4 + column_offset], True)
+        except ValueError:
+            return False
+
+        kept_values = self.seen.get((record[0], year))
+
+        if kept_values != None:
+            kept_values = tuple(kept_values[:2])
+
+        new_kept_values = self.add_row(record[0], year, country_co2, country_pop, line_number)
+
+        return self.policy in ['keep_first', 'keep_last'] and new_kept_values == kept_values
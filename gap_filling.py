@@ -0,0 +1,212 @@
+# Author: Sandy Nguyen
+
+from collections import OrderedDict
+
+from build_countries import Country
+from rolling_stats import get_year_axis
+
+fill_methods = ['linear', 'ffill', 'none']
+
+# (id of the countries dictionary, method, years) -> (dataset version, countries dictionary, filled series), least
+# recently used first. Keeping the dictionary itself means its id can't be reused by another one while cached, and only
+# the max_cached_series most recently used series are kept
+filled_cache = OrderedDict()
+max_cached_series = 8
+cache_hits = 0
+cache_misses = 0
+
+
+def get_filled_values(yearly_data, years, method):
+
+    """ (dict, list, str) -> list
+    This function takes a dictionary mapping years to values, a sorted list of years and a fill method, and returns the
+    list of values aligned with the years, going through both only once. With 'none' missing years are None, with
+    'ffill' they get the last value recorded before them, and with 'linear' they get the value on the line between
+    the values recorded before and after them. Years before the first value recorded (and after the last one, for
+    'linear') stay None, since nothing is extrapolated.
+
+    >>> get_filled_values({2000: 1.0, 2003: 4.0}, [1999, 2000, 2001, 2002, 2003, 2004], 'linear')
+    [None, 1.0, 2.0, 3.0, 4.0, None]
+    >>> get_filled_values({2000: 1.0, 2003: 4.0}, [1999, 2000, 2001, 2002, 2003, 2004], 'ffill')
+    [None, 1.0, 1.0, 1.0, 4.0, 4.0]
+    >>> get_filled_values({2000: 1.0, 2003: 4.0}, [2000, 2001], 'none')
+    [1.0, None]
+
+    """
+
+    if method not in fill_methods:
+        raise ValueError('unknown fill method: ' + str(method))
+
+    if method == 'none':
+        return [yearly_data.get(year) for year in years]
+
+    recorded_years = sorted(yearly_data)
+    filled_list = []
+
+    # Index of the first recorded year after the current year
+    next_index = 0
+
+    for year in years:
+
+        while next_index < len(recorded_years) and recorded_years[next_index] <= year:
+            next_index += 1
+
+        previous_year = recorded_years[next_index - 1] if next_index > 0 else None
+
+        if previous_year == year:
+            filled_list.append(yearly_data[year])
+
+        elif previous_year == None:
+            filled_list.append(None)
+
+        elif method == 'ffill':
+            filled_list.append(yearly_data[previous_year])
+
+        elif next_index < len(recorded_years):
+            next_year = recorded_years[next_index]
+            slope = (yearly_data[next_year] - yearly_data[previous_year]) / (next_year - previous_year)
+            filled_list.append(yearly_data[previous_year] + slope * (year - previous_year))
+
+        else:
+            filled_list.append(None)
+
+    return filled_list
+
+
+def get_dataset_version(countries_dict):
+
+    """ (dict) -> tuple
+    This function takes a dictionary mapping ISO codes to Country objects and returns a tuple that changes whenever a
+    country is created or gets new yearly data (Country.data_version, increased by Country.update_version) or the
+    dictionary's number of countries changes. It doesn't go through the countries, so a change to any country, even
+    one that isn't in the dictionary, changes it too.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2001, 40.0, 1000000)
+    >>> version = get_dataset_version({'QAT': q})
+    >>> get_dataset_version({'QAT': q}) == version
+    True
+    >>> q.add_yearly_data("2003\\t50.0\\t")
+    >>> get_dataset_version({'QAT': q}) == version
+    False
+
+    """
+
+    return (Country.data_version, len(countries_dict))
+
+
+def get_filled_series(countries_dict, method='linear', years=None):
+
+    """ (dict, str, list) -> dict
+    This function takes a dictionary mapping ISO codes to Country objects, a fill method ('linear', 'ffill' or 'none')
+    and an optional sorted list of years (every year of the dataset if None), and returns a dictionary with the years
+    under 'years' and, under 'co2' and 'population', dictionaries mapping each ISO code to its filled values aligned
+    with the years. Interpolated populations are rounded to integers.
+    Every country is filled at once and the result is cached until a country changes or the number of countries of the
+    dictionary does (see get_dataset_version), so the dictionary must not be modified otherwise.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2001, 40.0, 1000000)
+    >>> q.add_yearly_data("2003\\t50.0\\t")
+    >>> q.add_yearly_data("2004\\t\\t1500000")
+    >>> s = get_filled_series({'QAT': q})
+    >>> s['years'], s['co2']['QAT'], s['population']['QAT']
+    ([2001, 2002, 2003, 2004], [40.0, 45.0, 50.0, None], [1000000, 1166667, 1333333, 1500000])
+    >>> get_filled_series({'QAT': q}, 'ffill')['co2']['QAT']
+    [40.0, 40.0, 50.0, 50.0]
+
+    """
+
+    global cache_hits, cache_misses
+
+    cache_key = (id(countries_dict), method, None if years == None else tuple(years))
+    dataset_version = get_dataset_version(countries_dict)
+
+    if cache_key in filled_cache and filled_cache[cache_key][0] == dataset_version:
+        cache_hits += 1
+        filled_cache.move_to_end(cache_key)
+        return filled_cache[cache_key][2]
+
+    cache_misses += 1
+
+    if years == None:
+        years = get_year_axis(countries_dict)
+
+    co2_dict = {}
+    pop_dict = {}
+
+    for iso_code, country in countries_dict.items():
+
+        co2_dict[iso_code] = get_filled_values(country.co2_emissions, years, method)
+        pop_dict[iso_code] = [country_pop if country_pop == None else round(country_pop)
+                              for country_pop in get_filled_values(country.population, years, method)]
+
+    filled_series = {'years': list(years), 'co2': co2_dict, 'population': pop_dict}
+    filled_cache[cache_key] = (dataset_version, countries_dict, filled_series)
+    filled_cache.move_to_end(cache_key)
+
+    # Dropping the least recently used series, and the dictionaries they keep alive
+    while len(filled_cache) > max_cached_series:
+        filled_cache.popitem(last=False)
+
+    return filled_series
+
+
+def clear_cache():
+
+    """ () -> void
+    This function empties the cache of filled series.
+
+    """
+
+    filled_cache.clear()
+
+
+def get_filled_co2_per_capita_by_continent(countries_dict, country_year, method='linear'):
+
+    """ (dict, int, str) -> dict
+    This function takes a dictionary mapping ISO codes to Country objects, a year and a fill method, and returns a
+    dictionary mapping each continent to its co2 emissions per capita in tonnes that year, like
+    Country.get_total_co2_emissions_per_capita_by_year but with the gaps of each country's series filled first, so
+    that a country missing its population (or co2 emissions) that year still counts.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2001, 40.0, 1000000)
+    >>> q.add_yearly_data("2003\\t60.0\\t3000000")
+    >>> q.add_yearly_data("2002\\t50.0\\t")
+    >>> get_filled_co2_per_capita_by_continent({'QAT': q}, 2002)
+    {'ASIA': 25.0}
+    >>> get_filled_co2_per_capita_by_continent({'QAT': q}, 2002, 'none')
+    {'ASIA': 0.0}
+
+    """
+
+    filled_series = get_filled_series(countries_dict, method)
+
+    if country_year not in filled_series['years']:
+        return {}
+
+    year_index = filled_series['years'].index(country_year)
+    continents_totals = {}
+
+    for iso_code, country in countries_dict.items():
+
+        country_co2 = filled_series['co2'][iso_code][year_index]
+        country_pop = filled_series['population'][iso_code][year_index]
+
+        for continent in country.continents:
+
+            continent_totals = continents_totals.setdefault(continent, [0.0, 0])
+
+            if country_co2 != None and country_pop != None:
+                continent_totals[0] += country_co2
+                continent_totals[1] += country_pop
+
+    co2_per_capita_dict = {}
+
+    for continent, (continent_co2, continent_pop) in continents_totals.items():
+
+        # A continent without population gets 0.0, like get_total_co2_emissions_per_capita_by_year
+        if continent_pop == 0:
+            co2_per_capita_dict[continent] = 0.0
+        else:
+            co2_per_capita_dict[continent] = (continent_co2 / continent_pop) * 1000000
+
+    return co2_per_capita_dict
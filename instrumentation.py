@@ -0,0 +1,204 @@
+# Author: Sandy Nguyen
+
+import json
+import time
+
+from build_countries import Country
+
+# Nothing is counted until enable() is called, so the hot paths run unchanged by default
+enabled = False
+stats = {}
+json_lines_fobj = None
+
+# Country methods wrapped by enable() and restored by disable()
+instrumented_methods = ['__init__', 'add_yearly_data', 'get_countries_by_continent', 'get_total_historical_co2_emissions',
+                        'get_total_co2_emissions_per_capita_by_year', 'get_co2_emissions_per_capita_by_year',
+                        'get_historical_co2_emissions', 'get_top_n']
+original_methods = {}
+
+
+def add_stat(stat_name, field, amount):
+
+    """ (str, str, number) -> void
+    This function takes a string representing what is measured (e.g. 'clean_one' or 'Country.add_yearly_data'), a string
+    representing the counter and a number, and adds the number to that counter.
+
+    >>> reset()
+    >>> add_stat('clean_one', 'lines_read', 3)
+    >>> add_stat('clean_one', 'lines_read', 2)
+    >>> snapshot()
+    {'clean_one': {'lines_read': 5}}
+
+    """
+
+    if stat_name not in stats:
+        stats[stat_name] = {}
+
+    stats[stat_name][field] = stats[stat_name].get(field, 0) + amount
+
+
+def record_file_stage(stage_name, lines_read, lines_written, seconds):
+
+    """ (str, int, int, float) -> void
+    This function takes a string representing a cleaning stage (clean_one, final_clean or add_continents_to_data), the
+    number of lines it read and wrote and how long it took, and adds them to the stage's counters. The lines that were
+    read but not written are counted as rejected. With a JSON lines file, one event is also written for the call.
+    Does nothing when the instrumentation is disabled.
+
+    >>> reset()
+    >>> enable()
+    >>> record_file_stage('final_clean', 10, 8, 0.5)
+    >>> snapshot()['final_clean']['lines_rejected']
+    2
+    >>> disable()
+
+    """
+
+    if not enabled:
+        return
+
+    add_stat(stage_name, 'calls', 1)
+    add_stat(stage_name, 'lines_read', lines_read)
+    add_stat(stage_name, 'lines_written', lines_written)
+    add_stat(stage_name, 'lines_rejected', lines_read - lines_written)
+    add_stat(stage_name, 'seconds', seconds)
+
+    if json_lines_fobj != None:
+        event = {'event': 'stage', 'stage': stage_name, 'lines_read': lines_read, 'lines_written': lines_written,
+                 'lines_rejected': lines_read - lines_written, 'seconds': seconds, 'time': time.time()}
+        json_lines_fobj.write(json.dumps(event) + '\n')
+
+
+def get_instrumented_method(method_name, method):
+
+    """ (str, function) -> function
+    This function takes the name of a Country method and the method itself, and returns a function calling it while
+    counting its calls and cumulative time under 'Country.<method name>'.
+
+    """
+
+    stat_name = 'Country.' + method_name
+
+    def instrumented_method(*args, **kwargs):
+
+        start_time = time.perf_counter()
+
+        try:
+            return method(*args, **kwargs)
+
+        finally:
+            add_stat(stat_name, 'calls', 1)
+            add_stat(stat_name, 'seconds', time.perf_counter() - start_time)
+
+    instrumented_method.__name__ = method.__name__
+    instrumented_method.__doc__ = method.__doc__
+
+    return instrumented_method
+
+
+def enable(json_lines_filename=None):
+
+    """ (str) -> void
+    This function turns the instrumentation on: the cleaning stages start recording their line counts, and the Country
+    constructor, add_yearly_data and the static aggregate methods are wrapped to count their calls and time. If a file
+    name is given, stage events and snapshots are also appended to it as JSON lines (instead of the file given before,
+    which is closed).
+
+    >>> enable()
+    >>> c = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+    >>> c.add_yearly_data("1991\\t4.283\\t3280000")
+    >>> d = Country.get_countries_by_continent([c])
+    >>> s = snapshot()
+    >>> s['Country.__init__']['calls'], s['Country.add_yearly_data']['calls'], s['Country.get_countries_by_continent']['calls']
+    (1, 1, 1)
+    >>> disable()
+
+    """
+
+    global enabled, json_lines_fobj
+
+    if json_lines_filename != None:
+
+        # Enabling again with another file switches to it, without leaving the previous one open
+        if json_lines_fobj != None:
+            json_lines_fobj.close()
+
+        json_lines_fobj = open(json_lines_filename, "a", encoding="utf-8")
+
+    if enabled:
+        return
+
+    enabled = True
+
+    # Wrapping the Country methods only now, so that nothing is paid for them while the instrumentation is off
+    for method_name in instrumented_methods:
+        original_methods[method_name] = Country.__dict__[method_name]
+
+        if type(original_methods[method_name]) == staticmethod:
+            setattr(Country, method_name, staticmethod(get_instrumented_method(method_name, original_methods[method_name].__func__)))
+        else:
+            setattr(Country, method_name, get_instrumented_method(method_name, original_methods[method_name]))
+
+
+def disable():
+
+    """ () -> void
+    This function turns the instrumentation off, puts back the original Country methods and closes the JSON lines file.
+    The counters are kept until reset() is called.
+
+    """
+
+    global enabled, json_lines_fobj
+
+    if enabled:
+
+        for method_name in instrumented_methods:
+            setattr(Country, method_name, original_methods[method_name])
+
+        enabled = False
+
+    if json_lines_fobj != None:
+        json_lines_fobj.close()
+        json_lines_fobj = None
+
+
+def reset():
+
+    """ () -> void
+    This function sets every counter back to 0.
+
+    """
+
+    stats.clear()
+
+
+def snapshot():
+
+    """ () -> dict
+    This function returns a copy of the counters as a dictionary mapping what is measured to a dictionary of its counters
+    (calls, lines_read, lines_written, lines_rejected, seconds).
+
+    >>> reset()
+    >>> snapshot()
+    {}
+
+    """
+
+    snapshot_dict = {}
+
+    for stat_name in stats:
+        snapshot_dict[stat_name] = stats[stat_name].copy()
+
+    return snapshot_dict
+
+
+def emit_snapshot():
+
+    """ () -> void
+    This function writes the current snapshot of the counters as one JSON line in the file given to enable(), if any.
+
+    """
+
+    if json_lines_fobj != None:
+        json_lines_fobj.write(json.dumps({'event': 'snapshot', 'stats': snapshot(), 'time': time.time()}) + '\n')
+        json_lines_fobj.flush()
@@ -0,0 +1,162 @@
+# Author: Sandy Nguyen
+
+import json
+import sys
+import tracemalloc
+
+# When disabled, every Country gets its own strings, continents list and year keys (like before interning)
+enabled = True
+continents_registry = {}
+years_registry = {}
+
+
+def intern_string(string):
+
+    """ (str) -> str
+    This function takes a string (ISO code, country name or continent) and returns the one shared copy of it, so that
+    equal strings read from different lines are stored only once.
+
+    >>> intern_string('ASIA ') is intern_string(' ASIA '.strip() + ' ')
+    True
+
+    """
+
+    if not enabled:
+        return string
+
+    return sys.intern(string)
+
+
+def intern_year(year):
+
+    """ (int) -> int
+    This function takes an integer representing a year and returns the one shared int object for it, so that the year
+    keys of the co2_emissions and population dictionaries of every country are stored only once.
+
+    >>> intern_year(int('2007')) is intern_year(int('2007'))
+    True
+
+    """
+
+    if not enabled:
+        return year
+
+    return years_registry.setdefault(year, year)
+
+
+def get_continents_tuple(continents):
+
+    """ (list or tuple or str) -> tuple
+    This function takes the continents of a country (a list, a tuple or a comma separated string) and returns the shared
+    immutable tuple of interned continents, so that every country of the same continents points to the same tuple.
+    When interning is disabled, a new list is returned instead.
+
+    >>> get_continents_tuple(['ASIA', 'EUROPE'])
+    ('ASIA', 'EUROPE')
+
+    >>> get_continents_tuple('ASIA,EUROPE') is get_continents_tuple(['ASIA', 'EUROPE'])
+    True
+
+    """
+
+    if not enabled:
+
+        if type(continents) == str:
+            return continents.split(',')
+
+        return list(continents)
+
+    # Strings are looked up as they are, so they're only split the first time
+    if type(continents) == str:
+        registry_key = continents
+    else:
+        registry_key = tuple(continents)
+
+    if registry_key not in continents_registry:
+
+        if type(continents) == str:
+            continents = continents.split(',')
+
+        continents_tuple = tuple([intern_string(continent) for continent in continents])
+
+        # Lists and strings of the same continents share the same tuple
+        continents_tuple = continents_registry.setdefault(continents_tuple, continents_tuple)
+        continents_registry[registry_key] = continents_tuple
+
+    return continents_registry[registry_key]
+
+
+def clear_registries():
+
+    """ () -> void
+    This function empties the continents and years registries. Countries already created keep their tuples and years.
+
+    """
+
+    continents_registry.clear()
+    years_registry.clear()
+
+
+def get_load_memory(filename, interning_enabled):
+
+    """ (str, bool) -> tuple
+    This function takes a string representing a cleaned co2 data file with continents and a boolean, loads the file with
+    get_countries_from_file with interning enabled or not, and returns a tuple (number of countries, bytes allocated by
+    the loaded countries, including the registries filled while loading).
+
+    """
+
+    global enabled
+
+    # Importing here since build_countries imports this module
+    from build_countries import get_countries_from_file
+
+    previous_enabled = enabled
+    enabled = interning_enabled
+    clear_registries()
+
+    was_tracing = tracemalloc.is_tracing()
+
+    if not was_tracing:
+        tracemalloc.start()
+
+    memory_before = tracemalloc.get_traced_memory()[0]
+    countries_dict = get_countries_from_file(filename)
+    memory_after = tracemalloc.get_traced_memory()[0]
+
+    if not was_tracing:
+        tracemalloc.stop()
+
+    enabled = previous_enabled
+
+    return len(countries_dict), memory_after - memory_before
+
+
+def get_memory_report(filename):
+
+    """ (str) -> dict
+    This function takes a string representing a cleaned co2 data file with continents, loads it once without and once
+    with interning, and returns a dictionary with the memory used by each load in total and per country, and the savings.
+
+    """
+
+    num_countries, bytes_without = get_load_memory(filename, False)
+    num_countries, bytes_with = get_load_memory(filename, True)
+
+    report = {'filename': filename, 'countries': num_countries,
+              'bytes_without_interning': bytes_without, 'bytes_with_interning': bytes_with,
+              'bytes_saved': bytes_without - bytes_with}
+
+    # Avoiding a division by 0 on an empty file
+    if num_countries > 0:
+        report['bytes_per_country_without_interning'] = bytes_without / num_countries
+        report['bytes_per_country_with_interning'] = bytes_with / num_countries
+        report['bytes_saved_per_country'] = (bytes_without - bytes_with) / num_countries
+
+    return report
+
+
+if __name__ == '__main__':
+
+    # Usage: python interning.py data_file.tsv
+    print(json.dumps(get_memory_report(sys.argv[1]), indent=4))
@@ -0,0 +1,516 @@
+# Author: Sandy Nguyen
+
+import argparse
+import cProfile
+import functools
+import json
+import os
+import pstats
+import sys
+import time
+
+import instrumentation
+from data_cleanup import clean_one, final_clean
+from add_continents import add_continents_to_data
+from build_countries import Country, get_countries_from_file
+from duplicates import DuplicateTracker, duplicate_policies
+from downsample import downsample_methods
+from validation import quarantine_raw_lines, validate_file
+
+
+def count_lines(filename):
+
+    """ (str) -> int
+    This function takes a string representing a file and returns the number of lines in it.
+
+    >>> count_lines(os.path.join('data', 'small_co2_data.tsv'))
+    10
+
+    """
+
+    num_of_lines = 0
+    fobj = open(filename, "rb")
+
+    # Counting newlines in big chunks is a lot faster than looping through each line
+    chunk = fobj.read(1 << 20)
+    last_chunk = b''
+
+    while chunk:
+        num_of_lines += chunk.count(b'\n')
+        last_chunk = chunk
+        chunk = fobj.read(1 << 20)
+
+    fobj.close()
+
+    # The last line may not end with a newline
+    if last_chunk != b'' and not last_chunk.endswith(b'\n'):
+        num_of_lines += 1
+
+    return num_of_lines
+
+
+def run_stage(stage_name, stage_function, stage_args, options, stage_timings, input_filename=None):
+
+    """ (str, function, list, Namespace, list, str) -> object
+    This function takes a string representing the name of a pipeline stage, the function running it and its arguments,
+    the command line options and a list of timings, calls the function and returns its result.
+    With --profile, the stage runs under cProfile and its stats are written to '<profile dir>/<stage name>.pstats'
+    (with a readable '<stage name>.txt' sorted by cumulative time next to it).
+    With --timings, a tuple (stage name, wall time, lines processed) is appended to stage_timings. The lines processed
+    are the lines of input_filename, counted outside of the timed part.
+
+    """
+
+    profiler = None
+
+    if options.profile != None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    start_time = time.perf_counter()
+    result = stage_function(*stage_args)
+    wall_time = time.perf_counter() - start_time
+
+    if profiler != None:
+        profiler.disable()
+        os.makedirs(options.profile, exist_ok=True)
+        profiler.dump_stats(os.path.join(options.profile, stage_name + '.pstats'))
+
+        # Writing a readable report of the 30 most expensive calls next to the raw stats
+        fobj = open(os.path.join(options.profile, stage_name + '.txt'), "w", encoding="utf-8")
+        pstats.Stats(profiler, stream=fobj).sort_stats('cumulative').print_stats(30)
+        fobj.close()
+
+    if options.timings:
+
+        # The cleaning stages return the number of lines they wrote, the others are measured on their input file
+        if type(result) == int:
+            num_of_lines = result
+        elif input_filename != None:
+            num_of_lines = count_lines(input_filename)
+        else:
+            num_of_lines = None
+
+        stage_timings.append((stage_name, wall_time, num_of_lines))
+
+    return result
+
+
+def print_timings(stage_timings, fobj=sys.stderr):
+
+    """ (list, file) -> void
+    This function takes a list of tuples (stage name, wall time, lines processed) and prints one line per stage with its
+    wall time, lines processed and throughput, followed by the total wall time.
+
+    >>> print_timings([('clean_one', 0.5, 1000), ('query', 0.25, None)], sys.stdout)
+    stage                                  time (s)        lines     lines/s
+    clean_one                                0.5000         1000        2000
+    query                                    0.2500            -           -
+    total                                    0.7500
+
+    """
+
+    fobj.write('%-34s %12s %12s %11s\n' % ('stage', 'time (s)', 'lines', 'lines/s'))
+    total_time = 0.0
+
+    for stage_name, wall_time, num_of_lines in stage_timings:
+        total_time += wall_time
+
+        # Queries and plots don't always have lines to report
+        if num_of_lines == None:
+            fobj.write('%-34s %12.4f %12s %11s\n' % (stage_name, wall_time, '-', '-'))
+        elif wall_time > 0:
+            fobj.write('%-34s %12.4f %12d %11d\n' % (stage_name, wall_time, num_of_lines, num_of_lines / wall_time))
+        else:
+            fobj.write('%-34s %12.4f %12d %11s\n' % (stage_name, wall_time, num_of_lines, '-'))
+
+    fobj.write('%-34s %12.4f\n' % ('total', total_time))
+
+
+def run_plots(countries_dict, options, stage_timings, result_cache=None):
+
+    """ (dict, Namespace, list, ResultCache) -> void
+    This function takes a dictionary mapping ISO codes to Country objects, the command line options, a list of timings
+    and a ResultCache (or None), and creates the plots requested with --plot (all of them for 'all'), each one as its own
+    stage. With a ResultCache, the plotted values are taken from it (countries_dict can be None then).
+
+    """
+
+    # Importing matplotlib only when plots are requested, so cleaning and queries work without it
+    import chart_cache
+    import plot_data
+
+    chart_cache.enabled = options.chart_cache
+    plot_data.result_cache = result_cache
+
+    year_plots = [('co2-pc-by-continent', plot_data.get_bar_co2_pc_by_continent),
+                  ('historical-co2-by-continent', plot_data.get_bar_historical_co2_by_continent),
+                  ('co2-pc-top-ten', plot_data.get_bar_co2_pc_top_ten),
+                  ('top-ten-historical-co2', plot_data.get_bar_top_ten_historical_co2)]
+
+    plot_stages = []
+
+    for plot_name, plot_function in year_plots:
+
+        if options.plot in [plot_name, 'all']:
+            plot_stages.append(('plot_' + plot_name, plot_function, [countries_dict, options.year]))
+
+    if options.plot in ['co2-emissions', 'all']:
+        plot_args = [countries_dict, options.iso, options.min_year, options.max_year, options.max_points, options.downsample_method]
+        plot_stages.append(('plot_co2-emissions', plot_data.get_plot_co2_emissions, plot_args))
+
+    for stage_name, plot_function, plot_args in plot_stages:
+
+        # Closing every figure between charts (even if one failed half drawn), so that with 'all' each chart is the
+        # same as when it is plotted alone
+        try:
+            run_stage(stage_name, plot_function, plot_args, options, stage_timings)
+        finally:
+            plot_data.plt.close('all')
+
+    plot_data.result_cache = None
+
+    if options.chart_cache:
+        cache_stats = chart_cache.get_cache_stats()
+        sys.stderr.write('chart cache: ' + str(cache_stats['hits']) + ' hits, ' + str(cache_stats['misses']) + ' misses\n')
+
+
+def get_duplicate_tracker(options):
+
+    """ (Namespace) -> DuplicateTracker
+    This function takes the command line options and returns a new DuplicateTracker with the policy given with
+    --duplicates, or None if duplicates aren't tracked.
+
+    """
+
+    if options.duplicates == None:
+        return None
+
+    return DuplicateTracker(options.duplicates)
+
+
+def report_duplicates(stage_trackers, options):
+
+    """ (list, Namespace) -> void
+    This function takes a list of tuples (stage name, DuplicateTracker or None) and the command line options, prints the
+    number of repeated and conflicting (ISO code, year) pairs found by each stage and, with --duplicates-report, writes
+    the report of each stage to a file as JSON.
+
+    """
+
+    reports = {}
+
+    for stage_name, duplicate_tracker in stage_trackers:
+
+        if duplicate_tracker == None:
+            continue
+
+        reports[stage_name] = duplicate_tracker.get_report()
+        sys.stderr.write(stage_name + ' duplicates: ' + str(reports[stage_name]['duplicate_keys']) + ' repeated, ' +
+                         str(reports[stage_name]['conflicting_keys']) + ' conflicting (' + duplicate_tracker.policy + ')\n')
+
+    if options.duplicates_report != None and reports != {}:
+        fobj = open(options.duplicates_report, "w", encoding="utf-8")
+        fobj.write(json.dumps(reports, indent=4) + '\n')
+        fobj.close()
+
+
+def run_pipeline(options, stage_timings):
+
+    """ (Namespace, list) -> dict
+    This function takes the command line options and a list of timings, runs every cleaning stage on the raw input file,
+    loads the cleaned file and creates the requested plots. It returns the dictionary mapping ISO codes to Country objects.
+    The intermediate files are written as '<prefix>_tab_sep.tsv', '<prefix>_clean.tsv' and '<prefix>_co2_data.tsv'.
+    With --quarantine, bad lines are moved to the quarantine file before clean_one ('<prefix>_raw_checked.txt'), by
+    final_clean (the lines it can't fix) and after final_clean ('<prefix>_valid.tsv') instead of stopping the pipeline.
+    With --duplicates, rows repeating an ISO code and year are resolved with that policy while cleaning (by
+    validate_file, which quarantines the redundant rows, with --quarantine, by final_clean, which leaves them out,
+    without) and again by get_countries_from_file, and reported.
+
+    """
+
+    raw_filename = options.raw_file
+    tab_sep_filename = options.output_prefix + '_tab_sep.tsv'
+    clean_filename = options.output_prefix + '_clean.tsv'
+    data_filename = options.output_prefix + '_co2_data.tsv'
+
+    if options.quarantine != None:
+        raw_filename = options.output_prefix + '_raw_checked.txt'
+        run_stage('quarantine_raw_lines', quarantine_raw_lines, [options.raw_file, raw_filename, options.quarantine], options, stage_timings)
+
+    run_stage('clean_one', clean_one, [raw_filename, tab_sep_filename], options, stage_timings)
+    # Duplicates are tracked while cleaning by validate_file if it runs, by final_clean otherwise
+    clean_tracker = get_duplicate_tracker(options)
+    final_clean_tracker = clean_tracker if options.quarantine == None else None
+    run_stage('final_clean', final_clean, [tab_sep_filename, clean_filename, final_clean_tracker, options.quarantine], options, stage_timings)
+
+    if options.quarantine != None:
+        valid_filename = options.output_prefix + '_valid.tsv'
+        validate_function = functools.partial(validate_file, duplicate_tracker=clean_tracker)
+        run_stage('validate_file', validate_function, [clean_filename, valid_filename, options.quarantine, options.continents_file], options, stage_timings)
+        clean_filename = valid_filename
+
+    run_stage('add_continents_to_data', add_continents_to_data, [clean_filename, options.continents_file, data_filename], options, stage_timings)
+    load_tracker = get_duplicate_tracker(options)
+    countries_dict = run_stage('get_countries_from_file', get_countries_from_file, [data_filename, load_tracker], options, stage_timings, data_filename)
+    clean_stage_name = 'validate_file' if options.quarantine != None else 'final_clean'
+    report_duplicates([(clean_stage_name, clean_tracker), ('get_countries_from_file', load_tracker)], options)
+
+    if options.plot != None:
+        run_plots(countries_dict, options, stage_timings)
+
+    return countries_dict
+
+
+def get_query_result(countries_dict, options):
+
+    """ (dict, Namespace) -> list
+    This function takes a dictionary mapping ISO codes to Country objects and the command line options, and returns a list
+    of tuples (label, value) answering the query named in options.query.
+
+    """
+
+    countries_list = list(countries_dict.values())
+
+    if options.query == 'per-capita':
+        return [(iso, countries_dict[iso].get_co2_per_capita_by_year(options.year)) for iso in options.iso]
+
+    elif options.query == 'historical':
+        return [(iso, countries_dict[iso].get_historical_co2(options.year)) for iso in options.iso]
+
+    elif options.query == 'continent-per-capita':
+        continents_dict = Country.get_countries_by_continent(countries_list)
+        return [(continent, Country.get_total_co2_emissions_per_capita_by_year(continents_dict[continent], options.year))
+                for continent in sorted(continents_dict)]
+
+    elif options.query == 'continent-historical':
+        continents_dict = Country.get_countries_by_continent(countries_list)
+        return [(continent, Country.get_total_historical_co2_emissions(continents_dict[continent], options.year))
+                for continent in sorted(continents_dict)]
+
+    elif options.query == 'top-per-capita':
+        country_co2_dict = Country.get_co2_emissions_per_capita_by_year(countries_list, options.year)
+
+        # Countries without data that year can't be compared with the others
+        for country in countries_list:
+            if country_co2_dict[country] == None:
+                del country_co2_dict[country]
+
+        return Country.get_top_n(country_co2_dict, options.n)
+
+    else:
+        country_co2_dict = Country.get_historical_co2_emissions(countries_list, options.year)
+        return Country.get_top_n(country_co2_dict, options.n)
+
+
+def run_query(options, stage_timings):
+
+    """ (Namespace, list) -> list
+    This function takes the command line options and a list of timings, loads the cleaned data file, answers the query
+    and prints one tab separated line per result. It returns the list of results.
+    With --result-cache, the result is looked up in the cache next to the data file first, and the file is only loaded
+    if the query wasn't answered for its current content yet.
+
+    """
+
+    result_cache = None
+    found = False
+
+    if options.result_cache:
+
+        # Importing here since only cached queries need it
+        from result_cache import ResultCache
+
+        result_cache = ResultCache(options.data_file)
+        cache_args = (options.year, tuple(options.iso), options.n, options.duplicates)
+        found, query_result = run_stage('result_cache_lookup', result_cache.get_cached, ['query_' + options.query, cache_args], options, stage_timings)
+
+    if not found:
+        load_tracker = get_duplicate_tracker(options)
+        countries_dict = run_stage('get_countries_from_file', get_countries_from_file, [options.data_file, load_tracker], options, stage_timings, options.data_file)
+        report_duplicates([('get_countries_from_file', load_tracker)], options)
+        query_result = run_stage('query_' + options.query, get_query_result, [countries_dict, options], options, stage_timings)
+
+    if result_cache != None:
+
+        if not found:
+            result_cache.add_result('query_' + options.query, cache_args, query_result)
+
+        sys.stderr.write('result cache: ' + str(result_cache.hits) + ' hits, ' + str(result_cache.misses) + ' misses\n')
+        result_cache.close()
+
+    for label, value in query_result:
+        sys.stdout.write(str(label) + '\t' + str(value) + '\n')
+
+    return query_result
+
+
+def run_plot(options, stage_timings):
+
+    """ (Namespace, list) -> void
+    This function takes the command line options and a list of timings, loads the cleaned data file and creates the
+    requested plots.
+    With --result-cache, the plotted values are looked up in the cache next to the data file first, and the file is
+    only loaded (while plotting) if some of them weren't computed for its current content yet.
+
+    """
+
+    load_tracker = get_duplicate_tracker(options)
+
+    if not options.result_cache:
+        countries_dict = run_stage('get_countries_from_file', get_countries_from_file, [options.data_file, load_tracker], options, stage_timings, options.data_file)
+        report_duplicates([('get_countries_from_file', load_tracker)], options)
+        run_plots(countries_dict, options, stage_timings)
+        return
+
+    # Importing here since only cached plots need it
+    from result_cache import ResultCache
+
+    result_cache = ResultCache(options.data_file, duplicate_tracker=load_tracker)
+    run_plots(None, options, stage_timings, result_cache)
+
+    # The duplicates are only known if the data file had to be loaded
+    if result_cache.countries_dict != None:
+        report_duplicates([('get_countries_from_file', load_tracker)], options)
+
+    sys.stderr.write('result cache: ' + str(result_cache.hits) + ' hits, ' + str(result_cache.misses) + ' misses\n')
+    result_cache.close()
+
+
+def get_positive_int(value):
+
+    """ (str) -> int
+    This function takes a command line value and returns it as an integer, raising an ArgumentTypeError (reported by
+    the parser) if it isn't an integer above 0.
+
+    >>> get_positive_int('500')
+    500
+
+    >>> get_positive_int('0')
+    Traceback (most recent call last):
+    argparse.ArgumentTypeError: expected an integer above 0, got '0'
+
+    """
+
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+
+    if number <= 0:
+        raise argparse.ArgumentTypeError('expected an integer above 0, got ' + repr(value))
+
+    return number
+
+
+def add_plot_arguments(parser, plot_required):
+
+    """ (ArgumentParser, bool) -> void
+    This function adds the arguments choosing which plots to create to a command line parser.
+
+    """
+
+    plot_choices = ['co2-pc-by-continent', 'historical-co2-by-continent', 'co2-pc-top-ten', 'top-ten-historical-co2', 'co2-emissions', 'all']
+    parser.add_argument('--plot', choices=plot_choices, required=plot_required, help='plot to create')
+    parser.add_argument('--year', type=int, default=2000, help='year of the bar plots')
+    parser.add_argument('--iso', nargs='+', default=['USA', 'CHN', 'RUS', 'DEU', 'GBR'], help='ISO codes of the co2-emissions plot')
+    parser.add_argument('--min-year', type=int, default=1990, help='first year of the co2-emissions plot')
+    parser.add_argument('--max-year', type=int, default=2000, help='last year of the co2-emissions plot')
+    parser.add_argument('--max-points', type=get_positive_int, default=None, help='point budget of each line of the co2-emissions plot')
+    parser.add_argument('--downsample-method', choices=downsample_methods, default='lttb',
+                        help='how the co2-emissions lines are downsampled to --max-points')
+    parser.add_argument('--chart-cache', action='store_true', help='skip charts whose data did not change since they were saved')
+
+
+def add_duplicate_arguments(parser):
+
+    """ (ArgumentParser) -> void
+    This function adds the arguments choosing how rows repeating an ISO code and year are handled to a command line parser.
+
+    """
+
+    parser.add_argument('--duplicates', choices=duplicate_policies, default=None,
+                        help='track rows repeating an ISO code and year, and keep the first, last or average values or stop on conflicts '
+                             '(the pipeline also leaves out or quarantines the redundant rows while cleaning)')
+    parser.add_argument('--duplicates-report', metavar='FILE', default=None, help='write the duplicates found by each stage to FILE as JSON')
+
+
+def get_parser():
+
+    """ () -> ArgumentParser
+    This function returns the command line parser of the project.
+
+    >>> options = get_parser().parse_args(['--timings', 'query', 'data.tsv', 'historical', '--year', '2018', '--iso', 'USA'])
+    >>> options.command, options.query, options.year, options.iso, options.timings
+    ('query', 'historical', 2018, ['USA'], True)
+
+    """
+
+    parser = argparse.ArgumentParser(description='Clean, query and plot the co2 emissions per country data.')
+    parser.add_argument('--timings', action='store_true', help='print the wall time, lines processed and throughput of each stage')
+    parser.add_argument('--profile', metavar='DIR', default=None, help='write cProfile stats of each stage to DIR')
+    parser.add_argument('--stats', metavar='FILE', default=None, help='count lines and Country calls and append them to FILE as JSON lines')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    # Full pipeline, from the raw file to the plots
+    pipeline_parser = subparsers.add_parser('pipeline', help='clean a raw file, add continents, load it and plot it')
+    pipeline_parser.add_argument('raw_file', help='raw co2 data file')
+    pipeline_parser.add_argument('continents_file', help='file with format ISO code\\tcontinent')
+    pipeline_parser.add_argument('output_prefix', help='prefix of the files written by each stage')
+    pipeline_parser.add_argument('--quarantine', metavar='FILE', default=None, help='move invalid lines to FILE with a reason code instead of failing')
+    add_duplicate_arguments(pipeline_parser)
+    add_plot_arguments(pipeline_parser, False)
+
+    # Single query on an already cleaned file
+    query_parser = subparsers.add_parser('query', help='answer a query on a cleaned file with continents')
+    query_parser.add_argument('data_file', help='cleaned co2 data file with continents')
+    query_parser.add_argument('query', choices=['per-capita', 'historical', 'continent-per-capita', 'continent-historical', 'top-per-capita', 'top-historical'])
+    query_parser.add_argument('--year', type=int, required=True, help='year of the query')
+    query_parser.add_argument('--iso', nargs='+', default=[], help='ISO codes of the per-capita and historical queries')
+    query_parser.add_argument('-n', type=int, default=10, help='number of countries of the top queries')
+    add_duplicate_arguments(query_parser)
+    query_parser.add_argument('--result-cache', action='store_true', help='reuse results cached next to the data file while it is unchanged')
+
+    # Plots of an already cleaned file
+    plot_parser = subparsers.add_parser('plot', help='plot a cleaned file with continents')
+    plot_parser.add_argument('data_file', help='cleaned co2 data file with continents')
+    add_duplicate_arguments(plot_parser)
+    add_plot_arguments(plot_parser, True)
+    plot_parser.add_argument('--result-cache', action='store_true', help='reuse plotted values cached next to the data file while it is unchanged')
+
+    return parser
+
+
+def main(argv=None):
+
+    """ (list) -> int
+    This function takes a list of command line arguments (sys.argv[1:] if None), runs the requested command and returns
+    the exit status.
+
+    """
+
+    options = get_parser().parse_args(argv)
+    stage_timings = []
+    
+    if options.stats != None:
+        instrumentation.enable(options.stats)
+
+    if options.command == 'pipeline':
+        run_pipeline(options, stage_timings)
+    elif options.command == 'query':
+        run_query(options, stage_timings)
+    else:
+        run_plot(options, stage_timings)
+
+    if options.timings:
+        print_timings(stage_timings)
+
+    if options.stats != None:
+        instrumentation.emit_snapshot()
+        instrumentation.disable()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
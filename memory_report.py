@@ -0,0 +1,257 @@
+# Author: Sandy Nguyen
+
+import argparse
+import json
+import sys
+import tracemalloc
+
+import interning
+from build_countries import Country, get_countries_from_file
+from query_planner import CountryQuery
+
+representation_names = ['countries', 'countries_without_interning', 'sqlite', 'shared_memory', 'streaming']
+
+
+def add_object(breakdown, seen_ids, category, obj):
+
+    """ (dict, set, str, object) -> void
+    This function adds the size of obj to its category in breakdown, unless the same object (e.g. an interned string
+    or a shared year) was already counted.
+
+    >>> breakdown = {}
+    >>> seen_ids = set()
+    >>> iso_code = 'QAT'
+    >>> add_object(breakdown, seen_ids, 'strings', iso_code)
+    >>> add_object(breakdown, seen_ids, 'strings', iso_code)
+    >>> breakdown['strings']['objects']
+    1
+
+    """
+
+    if id(obj) in seen_ids:
+        return
+
+    seen_ids.add(id(obj))
+    category_totals = breakdown.setdefault(category, {'objects': 0, 'bytes': 0})
+    category_totals['objects'] += 1
+    category_totals['bytes'] += sys.getsizeof(obj)
+
+
+def get_object_breakdown(countries_dict):
+
+    """ (dict) -> dict
+    This function takes a dictionary mapping ISO codes to Country objects and returns a dictionary mapping each category
+    of objects ('country_instances' with their attribute dictionaries, 'yearly_dicts', 'year_keys', 'co2_values',
+    'population_values', 'strings' for ISO codes and names, 'continents' for the continent tuples or lists and their
+    strings, and 'countries_dict' itself) to its number of objects and bytes. Shared objects are counted once.
+
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+    >>> b = get_object_breakdown({'QAT': q})
+    >>> b['yearly_dicts']['objects'], b['co2_values']['objects']
+    (2, 1)
+
+    """
+
+    breakdown = {}
+    seen_ids = set()
+
+    add_object(breakdown, seen_ids, 'countries_dict', countries_dict)
+
+    for iso_code, country in countries_dict.items():
+
+        add_object(breakdown, seen_ids, 'strings', iso_code)
+        add_object(breakdown, seen_ids, 'country_instances', country)
+        add_object(breakdown, seen_ids, 'country_instances', country.__dict__)
+        add_object(breakdown, seen_ids, 'strings', country.iso_code)
+        add_object(breakdown, seen_ids, 'strings', country.name)
+        add_object(breakdown, seen_ids, 'continents', country.continents)
+
+        for continent in country.continents:
+            add_object(breakdown, seen_ids, 'continents', continent)
+
+        for yearly_data, values_category in [(country.co2_emissions, 'co2_values'), (country.population, 'population_values')]:
+
+            add_object(breakdown, seen_ids, 'yearly_dicts', yearly_data)
+
+            for year, value in yearly_data.items():
+                add_object(breakdown, seen_ids, 'year_keys', year)
+                add_object(breakdown, seen_ids, values_category, value)
+
+    breakdown['total'] = {'objects': sum([totals['objects'] for totals in breakdown.values()]),
+                          'bytes': sum([totals['bytes'] for totals in breakdown.values()])}
+
+    return breakdown
+
+
+def get_traced_load(load_function, *args):
+
+    """ (function, object) -> tuple
+    This function calls load_function(*args) while tracing memory allocations and returns a tuple (result, bytes still
+    allocated after the call, peak bytes allocated during the call).
+
+    >>> result, current_bytes, peak_bytes = get_traced_load(list, range(1000))
+    >>> current_bytes > 0 and peak_bytes >= current_bytes
+    True
+
+    """
+
+    was_tracing = tracemalloc.is_tracing()
+
+    if not was_tracing:
+        tracemalloc.start()
+
+    tracemalloc.reset_peak()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    result = load_function(*args)
+    memory_after, memory_peak = tracemalloc.get_traced_memory()
+
+    if not was_tracing:
+        tracemalloc.stop()
+
+    return result, memory_after - memory_before, memory_peak - memory_before
+
+
+def get_query_peaks(countries_dict, country_year):
+
+    """ (dict, int) -> dict
+    This function takes a dictionary mapping ISO codes to Country objects and a year, runs representative aggregate
+    queries and returns a dictionary mapping each query to the peak transient memory (in bytes) it allocated.
+
+    """
+
+    countries_list = list(countries_dict.values())
+    historical_dict = Country.get_historical_co2_emissions(countries_list, country_year)
+
+    queries = [('get_countries_by_continent', lambda: Country.get_countries_by_continent(countries_list)),
+               ('get_co2_emissions_per_capita_by_year', lambda: Country.get_co2_emissions_per_capita_by_year(countries_list, country_year)),
+               ('get_historical_co2_emissions', lambda: Country.get_historical_co2_emissions(countries_list, country_year)),
+               ('get_total_historical_co2_emissions', lambda: Country.get_total_historical_co2_emissions(countries_list, country_year)),
+               ('get_top_n', lambda: Country.get_top_n(historical_dict, 10)),
+               ('query_planner_per_capita_top_n', lambda: CountryQuery().years(country_year, country_year).metrics('total_per_capita').top(10, 'per_capita', country_year).run(countries_dict))]
+
+    query_peaks = {}
+
+    for query_name, query in queries:
+        result, current_bytes, peak_bytes = get_traced_load(query)
+        query_peaks[query_name] = peak_bytes
+
+    return query_peaks
+
+
+def get_representation_bytes(filename, representation, countries_dict):
+
+    """ (str, str, dict) -> int
+    This function takes a cleaned co2 data file with continents, the name of a representation and the countries already
+    loaded from the file, and returns the bytes the dataset takes in that representation: traced Python allocations for
+    the countries (with or without interning) and the streaming totals, database pages for SQLite and the block size
+    for shared memory.
+
+    """
+
+    if representation == 'countries':
+        return interning.get_load_memory(filename, True)[1]
+
+    if representation == 'countries_without_interning':
+        return interning.get_load_memory(filename, False)[1]
+
+    if representation == 'sqlite':
+
+        # Importing here since only this representation needs it
+        from sqlite_store import CountryStore
+
+        store = CountryStore(':memory:')
+        store.load_file(filename)
+        page_count = store.connection.execute('PRAGMA page_count').fetchone()[0]
+        page_size = store.connection.execute('PRAGMA page_size').fetchone()[0]
+        store.close()
+
+        return page_count * page_size
+
+    if representation == 'shared_memory':
+
+        from shared_dataset import publish_countries
+
+        block = publish_countries(countries_dict)
+        block_size = block.size
+        block.close()
+        block.unlink()
+
+        return block_size
+
+    if representation == 'streaming':
+
+        from streaming_aggregates import StreamingAggregator
+
+        aggregator = StreamingAggregator()
+        result, current_bytes, peak_bytes = get_traced_load(aggregator.add_file, filename)
+
+        return current_bytes
+
+    raise ValueError('unknown representation: ' + str(representation))
+
+
+def get_memory_report(filename, country_year=2000, representations=None):
+
+    """ (str, int, list) -> dict
+    This function takes a string representing a cleaned co2 data file with continents, a year for the aggregate queries
+    and the representations to compare (every one of representation_names if None), and returns a dictionary with the
+    memory allocated and peak memory while loading the file with get_countries_from_file, the breakdown of the loaded
+    objects by category, the peak transient memory of each aggregate query and the bytes of each representation.
+
+    >>> r = get_memory_report('data/small_co2_data.tsv', 2001, ['countries'])
+    >>> r['countries'], sorted(r['representations'])
+    (9, ['countries'])
+
+    """
+
+    if representations == None:
+        representations = list(representation_names)
+
+    countries_dict, load_bytes, load_peak_bytes = get_traced_load(get_countries_from_file, filename)
+
+    report = {'filename': filename, 'countries': len(countries_dict),
+              'load': {'bytes': load_bytes, 'peak_bytes': load_peak_bytes},
+              'objects': get_object_breakdown(countries_dict),
+              'query_peak_bytes': get_query_peaks(countries_dict, country_year),
+              'representations': {}}
+
+    for representation in representations:
+
+        representation_bytes = get_representation_bytes(filename, representation, countries_dict)
+        report['representations'][representation] = {'bytes': representation_bytes}
+
+        if len(countries_dict) > 0:
+            report['representations'][representation]['bytes_per_country'] = representation_bytes / len(countries_dict)
+
+    return report
+
+
+def main(argv=None):
+
+    """ (list) -> int
+    This function prints the memory report of the file given on the command line as JSON.
+
+    """
+
+    parser = argparse.ArgumentParser(description='Report the memory used to load and query a cleaned co2 data file.')
+    parser.add_argument('data_file', help='cleaned co2 data file with continents')
+    parser.add_argument('--year', type=int, default=2000, help='year of the aggregate queries')
+    parser.add_argument('--representations', nargs='+', choices=representation_names,
+                        help='representations to compare side by side (default: all of them)')
+    parser.add_argument('--output', metavar='FILE', help='write the JSON report to a file instead')
+    options = parser.parse_args(argv)
+
+    report_json = json.dumps(get_memory_report(options.data_file, options.year, options.representations), indent=4)
+
+    if options.output == None:
+        print(report_json)
+    else:
+        fobj = open(options.output, "w", encoding="utf-8")
+        fobj.write(report_json + '\n')
+        fobj.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,26 +1,41 @@
 # Author: Sandy Nguyen
  
 import matplotlib.pyplot as plt
+import chart_cache
 from build_countries import *
+from downsample import get_downsampled_points
  
-def get_bar_co2_pc_by_continent(countries_dict, country_year):
+# ResultCache of the data file plotted (see main.py --result-cache), None to compute the plotted values every time
+result_cache = None
+ 
+def get_plot_data(data_function, countries_dict, *args):
     
-    """ (dict, int) -> list
-    This function creates a bar plot representing the co2 emissions per capita (in tonnes)
-    produced by all the countries in each continent and returns a list of values being plotted.
+    """ (function, dict, object) -> object
+    This function takes one of the data functions below, a dictionary mapping ISO codes to Country objects and the
+    other arguments of the data function, and returns data_function(countries_dict, *args). With a result_cache, the
+    result is taken from it instead (countries_dict isn't used then, and can be None).
     
-    >>> d = get_countries_from_file("large_co2_data.tsv")
-    >>> data = get_bar_co2_pc_by_continent(d, 2000)
+    >>> d = get_countries_from_file("data/small_co2_data.tsv")
+    >>> get_plot_data(get_co2_pc_top_ten_data, d, 2001)[0]
+    ['QAT', 'POL', 'BGR', 'COL', 'CMR']
     
-    >>> data[:2]
-    [1.0975340644568221, 2.6980486411788904]
+    """
     
-    >>> len(data)
-    6
+    if result_cache != None:
+        return result_cache.call(data_function, *args)
+    
+    return data_function(countries_dict, *args)
+    
+def get_co2_pc_by_continent_data(countries_dict, country_year):
+    
+    """ (dict, int) -> tuple
+    This function returns a tuple (continents, co2 emissions per capita in tonnes) with the values plotted by
+    get_bar_co2_pc_by_continent, without creating the plot.
+    
+    >>> d = get_countries_from_file("data/small_co2_data.tsv")
+    >>> get_co2_pc_by_continent_data(d, 2001)[0]
+    ['AFRICA', 'ASIA', 'EUROPE', 'SOUTH AMERICA']
     
-    >>> round(data[2], 1)
-    8.0
- 
     """
     
     # Assigning local variables
@@ -55,35 +70,65 @@ def get_bar_co2_pc_by_continent(countries_dict, country_year):
             continents_list_copy.append(continents_list[continents_co2_list.index(continent_co2_value)])
             continents_co2_list_copy.append(continent_co2_value)
         
-    # Creating the bar graph
-    plt.bar(continents_list_copy, continents_co2_list_copy)
-    plt.title('CO2 emissions per capital in ' + str(country_year) + ' by sandy.nguyen2@mail.mcgill.ca')
-    plt.ylabel('co2 (in tonnes)')
-    plt.savefig('co2_pc_by_continent_' + str(country_year))
-    plt.show()
-    
-    return continents_co2_list_copy
+    return continents_list_copy, continents_co2_list_copy
     
-def get_bar_historical_co2_by_continent(countries_dict, country_year):
+def get_bar_co2_pc_by_continent(countries_dict, country_year):
     
     """ (dict, int) -> list
-    This function creates a bar plot representing the historical co2 emissions (in millions of tonnes)
+    This function creates a bar plot representing the co2 emissions per capita (in tonnes)
     produced by all the countries in each continent and returns a list of values being plotted.
- 
-    >>> d = get_countries_from_file("large_co2_data.tsv")
-    >>> data = get_bar_historical_co2_by_continent(d, 2018)
+    
+    >>> import os, tempfile
+    >>> d = get_countries_from_file("data/small_co2_data.tsv")
+    >>> current_dir, output_dir = os.getcwd(), tempfile.TemporaryDirectory()
+    >>> os.chdir(output_dir.name)
+    >>> data = get_bar_co2_pc_by_continent(d, 2001)
+    >>> os.chdir(current_dir)
+    >>> output_dir.cleanup()
     
     >>> data[:2]
-    [44731.870999999985, 585465.9030000004]
+    [0.2032033255899254, 67.01626016260164]
     
     >>> len(data)
-    6
+    4
     
     >>> round(data[2], 1)
-    523681.8
+    7.7
  
     """
     
+    continents_list_copy, continents_co2_list_copy = get_plot_data(get_co2_pc_by_continent_data, countries_dict, country_year)
+        
+    chart_title = 'CO2 emissions per capital in ' + str(country_year) + ' by sandy.nguyen2@mail.mcgill.ca'
+    chart_filename = 'co2_pc_by_continent_' + str(country_year) + '.png'
+    chart_key = chart_cache.get_chart_key('bar', [chart_title, 'co2 (in tonnes)', chart_filename], [continents_list_copy, continents_co2_list_copy])
+    
+    # Creating the bar graph, unless the exact same graph was already saved
+    if not chart_cache.is_chart_cached(chart_filename, chart_key):
+        plt.bar(continents_list_copy, continents_co2_list_copy)
+        plt.title(chart_title)
+        plt.ylabel('co2 (in tonnes)')
+        plt.savefig(chart_filename)
+        plt.show()
+        
+        # Closing the figure so that the next chart isn't drawn on top of this one
+        plt.close()
+        chart_cache.record_chart(chart_filename, chart_key)
+    
+    return continents_co2_list_copy
+    
+def get_historical_co2_by_continent_data(countries_dict, country_year):
+    
+    """ (dict, int) -> tuple
+    This function returns a tuple (continents, historical co2 emissions in millions of tonnes) with the values plotted
+    by get_bar_historical_co2_by_continent, without creating the plot.
+    
+    >>> d = get_countries_from_file("data/small_co2_data.tsv")
+    >>> round(get_historical_co2_by_continent_data(d, 2015)[1][2], 1)
+    359.4
+    
+    """
+    
     # Assigning local variables
     continents_list = ['AFRICA', 'ASIA', 'EUROPE', 'NORTH AMERICA', 'OCEANIA', 'SOUTH AMERICA']
     continents_co2_list = [0, 0, 0, 0, 0, 0]
@@ -116,33 +161,63 @@ def get_bar_historical_co2_by_continent(countries_dict, country_year):
             continents_list_copy.append(continents_list[continents_co2_list.index(continent_co2_value)])
             continents_co2_list_copy.append(continent_co2_value)
         
-    # Creating the bar graph
-    plt.bar(continents_list_copy, continents_co2_list_copy)
-    plt.title('Historical CO2 emissions up to ' + str(country_year) + ' by sandy.nguyen2@mail.mcgill.ca')
-    plt.ylabel('co2 (in millions of tonnes)')
-    plt.savefig('hist_co2_pc_by_continent_' + str(country_year))
-    plt.show()
+    return continents_list_copy, continents_co2_list_copy
     
-    return continents_co2_list_copy
- 
-def get_bar_co2_pc_top_ten(countries_dict, country_year):
+def get_bar_historical_co2_by_continent(countries_dict, country_year):
     
     """ (dict, int) -> list
-    This function creates a bar plot representing the co2 emissions per capita (in tonnes) produced by the top 10
-    producing countries in the dictionary and returns a list of values being plotted.
+    This function creates a bar plot representing the historical co2 emissions (in millions of tonnes)
+    produced by all the countries in each continent and returns a list of values being plotted.
  
-    >>> d = get_countries_from_file("large_co2_data.tsv")
-    >>> data = get_bar_co2_pc_top_ten(d, 2000)
+    >>> import os, tempfile
+    >>> d = get_countries_from_file("data/small_co2_data.tsv")
+    >>> current_dir, output_dir = os.getcwd(), tempfile.TemporaryDirectory()
+    >>> os.chdir(output_dir.name)
+    >>> data = get_bar_historical_co2_by_continent(d, 2015)
+    >>> os.chdir(current_dir)
+    >>> output_dir.cleanup()
     
     >>> data[:2]
-    [58.388513513513516, 35.669432035737074]
+    [4.877, 207.54500000000002]
     
     >>> len(data)
-    10
+    4
     
     >>> round(data[2], 1)
-    28.3
+    359.4
+ 
+    """
+    
+    continents_list_copy, continents_co2_list_copy = get_plot_data(get_historical_co2_by_continent_data, countries_dict, country_year)
+        
+    chart_title = 'Historical CO2 emissions up to ' + str(country_year) + ' by sandy.nguyen2@mail.mcgill.ca'
+    chart_filename = 'hist_co2_pc_by_continent_' + str(country_year) + '.png'
+    chart_key = chart_cache.get_chart_key('bar', [chart_title, 'co2 (in millions of tonnes)', chart_filename], [continents_list_copy, continents_co2_list_copy])
+    
+    # Creating the bar graph, unless the exact same graph was already saved
+    if not chart_cache.is_chart_cached(chart_filename, chart_key):
+        plt.bar(continents_list_copy, continents_co2_list_copy)
+        plt.title(chart_title)
+        plt.ylabel('co2 (in millions of tonnes)')
+        plt.savefig(chart_filename)
+        plt.show()
+        
+        # Closing the figure so that the next chart isn't drawn on top of this one
+        plt.close()
+        chart_cache.record_chart(chart_filename, chart_key)
+    
+    return continents_co2_list_copy
  
+def get_co2_pc_top_ten_data(countries_dict, country_year):
+    
+    """ (dict, int) -> tuple
+    This function returns a tuple (ISO codes, co2 emissions per capita in tonnes) of the top 10 countries plotted by
+    get_bar_co2_pc_top_ten, without creating the plot.
+    
+    >>> d = get_countries_from_file("data/small_co2_data.tsv")
+    >>> get_co2_pc_top_ten_data(d, 2001)[0]
+    ['QAT', 'POL', 'BGR', 'COL', 'CMR']
+    
     """
     
     country_dict = {}
@@ -176,32 +251,63 @@ def get_bar_co2_pc_top_ten(countries_dict, country_year):
         
     country_list = country_list[:len(co2_emissions_list)]
     
-    # Creating the bar graph
-    plt.bar(country_list, co2_emissions_list)
-    plt.title('Top 10 countries for CO2 emissions pc in ' + str(country_year) + ' by sandy.nguyen2@mail.mcgill.ca')
-    plt.ylabel('co2 (in tonnes)')
-    plt.savefig('top_10_co2_pc_' + str(country_year))
-    plt.show()
+    return country_list, co2_emissions_list
+    
+def get_bar_co2_pc_top_ten(countries_dict, country_year):
     
-    return co2_emissions_list
- 
- 
-def get_bar_top_ten_historical_co2(countries_dict, country_year):
     """ (dict, int) -> list
-    This function creates a bar plot representing the historical co2 emissions (in millions of tonnes) produced
-    by the top 10 producing countries in the dictionary and returns a list of values being plotted.
+    This function creates a bar plot representing the co2 emissions per capita (in tonnes) produced by the top 10
+    producing countries in the dictionary and returns a list of values being plotted.
  
-    >>> d = get_countries_from_file("large_co2_data.tsv")
-    >>> get_bar_top_ten_historical_co2(d, 2015)
+    >>> import os, tempfile
+    >>> d = get_countries_from_file("data/small_co2_data.tsv")
+    >>> current_dir, output_dir = os.getcwd(), tempfile.TemporaryDirectory()
+    >>> os.chdir(output_dir.name)
+    >>> data = get_bar_co2_pc_top_ten(d, 2001)
+    >>> os.chdir(current_dir)
+    >>> output_dir.cleanup()
     
     >>> data[:2]
-    [388775.708, 180593.26000000004]
+    [67.01626016260164, 7.96840655771779]
     
     >>> len(data)
-    10
+    5
     
     >>> round(data[2], 1)
-    95745.0
+    6.2
+ 
+    """
+    
+    country_list, co2_emissions_list = get_plot_data(get_co2_pc_top_ten_data, countries_dict, country_year)
+        
+    chart_title = 'Top 10 countries for CO2 emissions pc in ' + str(country_year) + ' by sandy.nguyen2@mail.mcgill.ca'
+    chart_filename = 'top_10_co2_pc_' + str(country_year) + '.png'
+    chart_key = chart_cache.get_chart_key('bar', [chart_title, 'co2 (in tonnes)', chart_filename], [country_list, co2_emissions_list])
+    
+    # Creating the bar graph, unless the exact same graph was already saved
+    if not chart_cache.is_chart_cached(chart_filename, chart_key):
+        plt.bar(country_list, co2_emissions_list)
+        plt.title(chart_title)
+        plt.ylabel('co2 (in tonnes)')
+        plt.savefig(chart_filename)
+        plt.show()
+        
+        # Closing the figure so that the next chart isn't drawn on top of this one
+        plt.close()
+        chart_cache.record_chart(chart_filename, chart_key)
+    
+    return co2_emissions_list
+ 
+ 
+def get_top_ten_historical_co2_data(countries_dict, country_year):
+    
+    """ (dict, int) -> tuple
+    This function returns a tuple (ISO codes, historical co2 emissions in millions of tonnes) of the top 10 countries
+    plotted by get_bar_top_ten_historical_co2, without creating the plot.
+    
+    >>> d = get_countries_from_file("data/small_co2_data.tsv")
+    >>> get_top_ten_historical_co2_data(d, 2015)[1][:2]
+    [306.696, 166.33]
     
     """
     
@@ -236,34 +342,65 @@ def get_bar_top_ten_historical_co2(countries_dict, country_year):
         
     country_list = country_list[:len(co2_emissions_list)]
     
-    # Creating the bar graph
-    plt.bar(country_list, co2_emissions_list)
-    plt.title('Top 10 countries for historical CO2 up to ' + str(country_year) + ' by sandy.nguyen2@mail.mcgill.ca')
-    plt.ylabel('co2 (in millions tonnes)')
-    plt.savefig('top_10_hist_co2_' + str(country_year))
-    plt.show()
+    return country_list, co2_emissions_list
     
-    return co2_emissions_list
+def get_bar_top_ten_historical_co2(countries_dict, country_year):
+    """ (dict, int) -> list
+    This function creates a bar plot representing the historical co2 emissions (in millions of tonnes) produced
+    by the top 10 producing countries in the dictionary and returns a list of values being plotted.
  
-def get_plot_co2_emissions(countries_dict, isocodes_list, min_year, max_year):
-    """ (dict, list, int, int) -> 2D list
-    This function will plot the co2 emissions of the selected countries (those whose ISO appears in the input list)
-    from min_year to max_year and return a 2D list where each sublist contains the co2 emissions of a selected country
-    from min_year to max_year.
-    
-    >>> d = get_countries_from_file("large_co2_data.tsv")
-    >>> data = get_plot_co2_emissions(d, ["USA", "CHN", "RUS", "DEU", "GBR"], 1990, 2000)
+    >>> import os, tempfile
+    >>> d = get_countries_from_file("data/small_co2_data.tsv")
+    >>> current_dir, output_dir = os.getcwd(), tempfile.TemporaryDirectory()
+    >>> os.chdir(output_dir.name)
+    >>> data = get_bar_top_ten_historical_co2(d, 2015)
+    >>> os.chdir(current_dir)
+    >>> output_dir.cleanup()
     
-    >>> data[0]
-    [5121.179, 5071.564, 5174.671, 5281.387, 5375.034, 5436.698, 5625.042, 5701.921, 5749.893, 5829.52, 5997.299]
+    >>> data[:2]
+    [306.696, 166.33]
     
     >>> len(data)
-    5
+    9
     
     >>> round(data[2], 1)
-    1957.9
+    149.3
+    
+    """
+    
+    country_list, co2_emissions_list = get_plot_data(get_top_ten_historical_co2_data, countries_dict, country_year)
+        
+    chart_title = 'Top 10 countries for historical CO2 up to ' + str(country_year) + ' by sandy.nguyen2@mail.mcgill.ca'
+    chart_filename = 'top_10_hist_co2_' + str(country_year) + '.png'
+    chart_key = chart_cache.get_chart_key('bar', [chart_title, 'co2 (in millions tonnes)', chart_filename], [country_list, co2_emissions_list])
+    
+    # Creating the bar graph, unless the exact same graph was already saved
+    if not chart_cache.is_chart_cached(chart_filename, chart_key):
+        plt.bar(country_list, co2_emissions_list)
+        plt.title(chart_title)
+        plt.ylabel('co2 (in millions tonnes)')
+        plt.savefig(chart_filename)
+        plt.show()
+        
+        # Closing the figure so that the next chart isn't drawn on top of this one
+        plt.close()
+        chart_cache.record_chart(chart_filename, chart_key)
+    
+    return co2_emissions_list
  
+def get_co2_emissions_data(countries_dict, isocodes_list, min_year, max_year, max_points=None, downsample_method='lttb'):
+    
+    """ (dict, list, int, int, int, str) -> tuple
+    This function returns a tuple (x coordinates, y coordinates, co2 emissions of every year) with the lines plotted by
+    get_plot_co2_emissions and the 2D list it returns, without creating the plot.
+    
+    >>> d = get_countries_from_file("data/small_co2_data.tsv")
+    >>> x_coord, y_coord, data = get_co2_emissions_data(d, ["COL"], 2000, 2002)
+    >>> data
+    [[0.0, 56.259, 0.0]]
+    
     """
+    
     country_min_year = min_year + 0
     
     # Empty lists
@@ -275,20 +412,28 @@ def get_plot_co2_emissions(countries_dict, isocodes_list, min_year, max_year):
     country_x_coord = []
     country_y_coord = []
     
-    # Lines and variables
-    lines = ['-', ':', '--', '-.', '-']
-    markers = ['4', 'o', '|', 'd', 's']
-    
-    steps = round((max_year - min_year) / 10)
+    # The step is at least 1 year, otherwise short ranges would never reach max_year
+    steps = max(round((max_year - min_year) / 10), 1)
     
     for isocode in isocodes_list:
         
-        # Appending the country's year (up by steps) and co2 emissions to their respective sublists
+        # Appending the country's year (up by 1) and co2 emissions for every year to their respective sublists
         while country_min_year <= max_year:
             country_co2 = Country.get_co2_emissions_by_year(countries_dict[isocode], country_min_year)
             country_x_coord.append(country_min_year)
             country_y_coord.append(country_co2)
-            country_min_year += steps
+            country_min_year += 1
+        
+        y_coord_to_return.append(country_y_coord)
+        
+        # Keeping at most max_points points of the country's line while preserving its shape
+        if max_points != None:
+            country_x_coord, country_y_coord = get_downsampled_points(country_x_coord, country_y_coord, max_points, downsample_method)
+        
+        # Keeping the country's year (up by steps) and co2 emissions
+        else:
+            country_x_coord = country_x_coord[::steps]
+            country_y_coord = country_y_coord[::steps]
         
         # Appending and initializing the local variables
         x_coord.append(country_x_coord)
@@ -297,25 +442,58 @@ def get_plot_co2_emissions(countries_dict, isocodes_list, min_year, max_year):
         country_y_coord = []
         country_min_year = min_year + 0
         
-        # Appending the country's co2 emissions for every year (up by 1) to country_y_coord
-        while country_min_year <= max_year:
-            country_co2 = Country.get_co2_emissions_by_year(countries_dict[isocode], country_min_year)
-            country_y_coord.append(country_co2)
-            country_min_year += 1
+    return x_coord, y_coord, y_coord_to_return
+    
+def get_plot_co2_emissions(countries_dict, isocodes_list, min_year, max_year, max_points=None, downsample_method='lttb'):
+    """ (dict, list, int, int, int, str) -> 2D list
+    This function will plot the co2 emissions of the selected countries (those whose ISO appears in the input list)
+    from min_year to max_year and return a 2D list where each sublist contains the co2 emissions of a selected country
+    from min_year to max_year.
+    If max_points is given, each plotted line keeps at most max_points points picked with downsample_method ('lttb' or
+    'minmax') so that peaks stay visible, and every point is kept when the range is short enough. Otherwise one point
+    every tenth of the range is plotted. The returned list always has the co2 emissions of every year.
+    
+    >>> import os, tempfile
+    >>> d = get_countries_from_file("data/small_co2_data.tsv")
+    >>> current_dir, output_dir = os.getcwd(), tempfile.TemporaryDirectory()
+    >>> os.chdir(output_dir.name)
+    >>> data = get_plot_co2_emissions(d, ["COL", "POL", "QAT"], 2000, 2002)
+    >>> os.chdir(current_dir)
+    >>> output_dir.cleanup()
+    
+    >>> data[:2]
+    [[0.0, 56.259, 0.0], [0.0, 306.696, 0.0]]
+    
+    >>> len(data)
+    3
+    
+    >>> data[2]
+    [0.0, 41.215, 0.0]
+ 
+    """
+    
+    x_coord, y_coord, y_coord_to_return = get_plot_data(get_co2_emissions_data, countries_dict, isocodes_list, min_year, max_year, max_points, downsample_method)
+    
+    # Lines and variables
+    lines = ['-', ':', '--', '-.', '-']
+    markers = ['4', 'o', '|', 'd', 's']
         
-        # Appending and initializing the local variables
-        y_coord_to_return.append(country_y_coord)
-        country_x_coord = []
-        country_y_coord = []
-        country_min_year = min_year + 0
+    chart_title = 'CO2 emissions between ' + str(min_year) + ' and ' + str(max_year) + ' by sandy.nguyen2@mail.mcgill.ca'
+    chart_filename = 'co2_emissions_' + str(min_year) + '_' + str(max_year) + '.png'
+    chart_key = chart_cache.get_chart_key('plot', [chart_title, 'co2 (in millions tonnes)', chart_filename, isocodes_list, markers, lines, max_points, downsample_method], x_coord + y_coord)
+    
+    # Creating the line graph, unless the exact same graph was already saved
+    if not chart_cache.is_chart_cached(chart_filename, chart_key):
+        for i in range (len(x_coord)):
+            plt.plot(x_coord[i], y_coord[i], (markers[i % len(markers)] + lines[i % len(lines)]))
+        plt.title(chart_title)
+        plt.ylabel('co2 (in millions tonnes)')
+        plt.legend(isocodes_list)
+        plt.savefig(chart_filename)
+        plt.show()
         
-    # Creating the bar graph
-    for i in range (len(x_coord)):
-        plt.plot(x_coord[i], y_coord[i], (markers[i] + lines[i]))
-    plt.title('CO2 emissions between ' + str(min_year) + ' and ' + str(max_year) + ' by sandy.nguyen2@mail.mcgill.ca')
-    plt.ylabel('co2 (in millions tonnes)')
-    plt.legend(isocodes_list)
-    plt.savefig('co2_emissions_' + str(min_year) + '_' + str(max_year))
-    plt.show()
+        # Closing the figure so that the next chart isn't drawn on top of this one
+        plt.close()
+        chart_cache.record_chart(chart_filename, chart_key)
     
     return y_coord_to_return
\ No newline at end of file
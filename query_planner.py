@@ -0,0 +1,297 @@
+# Author: Sandy Nguyen
+
+import heapq
+from build_countries import Country
+from rolling_stats import get_year_axis
+
+# Metrics of each selected country by year, and totals of the selected countries by year
+country_metrics = ['annual', 'per_capita', 'cumulative']
+total_metrics = ['total_per_capita', 'total_cumulative']
+
+
+class CountryQuery:
+
+    """
+    Represents a query over a dictionary mapping ISO codes to Country objects: filters (ISO codes, continents, year
+    window), metrics and an optional top n. The query is described first and run later, so that the planner can
+    apply the filters before going through the data and compute every metric in a single pass over each country.
+
+    Results have the shapes of the existing functions, by year:
+    'annual' -> {year: {Country: co2 emissions}} (0.0 if missing, like get_co2_emissions_by_year),
+    'per_capita' -> {year: {Country: co2 per capita or None}} (like get_co2_emissions_per_capita_by_year),
+    'cumulative' -> {year: {Country: historical co2}} (like get_historical_co2_emissions),
+    'total_per_capita' -> {year: float} (like get_total_co2_emissions_per_capita_by_year),
+    'total_cumulative' -> {year: float} (like get_total_historical_co2_emissions),
+    'top_n' -> list of tuples (ISO code, value) (like get_top_n, ties sorted by country name).
+
+    Instance Attributes: iso_codes_list (list), continents_list (list), min_year (int), max_year (int),
+    metrics_list (list), top_n (tuple)
+
+    """
+
+    def __init__(self):
+
+        """ () -> void
+        This constructor will initialize a query without filters, metrics or top n.
+
+        >>> CountryQuery().metrics_list
+        []
+
+        """
+
+        self.iso_codes_list = None
+        self.continents_list = None
+        self.min_year = None
+        self.max_year = None
+        self.metrics_list = []
+        self.top_n = None
+
+
+    def iso_codes(self, iso_codes_list):
+
+        """ (list) -> CountryQuery
+        This instance method keeps only the countries of the given ISO codes and returns the query.
+
+        """
+
+        self.iso_codes_list = list(iso_codes_list)
+
+        return self
+
+
+    def continents(self, *continents):
+
+        """ (str) -> CountryQuery
+        This instance method keeps only the countries belonging to at least one of the given continents (each country
+        once, even if it is on several of them) and returns the query.
+
+        """
+
+        self.continents_list = list(continents)
+
+        return self
+
+
+    def years(self, min_year, max_year):
+
+        """ (int, int) -> CountryQuery
+        This instance method keeps only the years from min_year to max_year (inclusive) and returns the query.
+        Cumulative emissions still include the years before min_year.
+
+        """
+
+        if min_year > max_year:
+            raise ValueError('min_year must not be after max_year')
+
+        self.min_year = min_year
+        self.max_year = max_year
+
+        return self
+
+
+    def metrics(self, *metrics):
+
+        """ (str) -> CountryQuery
+        This instance method adds metrics to compute ('annual', 'per_capita', 'cumulative', 'total_per_capita' or
+        'total_cumulative') and returns the query.
+
+        """
+
+        for metric in metrics:
+
+            if metric not in country_metrics + total_metrics:
+                raise ValueError('unknown metric: ' + str(metric))
+
+            if metric not in self.metrics_list:
+                self.metrics_list.append(metric)
+
+        return self
+
+
+    def top(self, n, metric, country_year):
+
+        """ (int, str, int) -> CountryQuery
+        This instance method asks for the n countries with the highest value of a country metric ('annual',
+        'per_capita' or 'cumulative') in the given year, and returns the query.
+
+        """
+
+        if metric not in country_metrics:
+            raise ValueError('top n needs a country metric, not ' + str(metric))
+
+        self.top_n = (n, metric, country_year)
+
+        return self
+
+
+    def get_plan(self, countries_dict):
+
+        """ (dict) -> list
+        This instance method takes a dictionary mapping ISO codes to Country objects and returns the steps the query will
+        run, as strings: filters that look countries up directly come first, then filters that scan them, then one pass
+        computing every metric.
+
+        >>> q = CountryQuery().continents('ASIA').iso_codes(['QAT', 'RUS']).years(2000, 2007).metrics('annual')
+        >>> q.top(1, 'per_capita', 2007).get_plan({})
+        ['look up 2 ISO codes', 'keep continents ASIA', 'keep years 2000 to 2007', 'one pass computing annual, per_capita', 'top 1 by per_capita in 2007']
+
+        """
+
+        plan = []
+
+        if self.iso_codes_list != None:
+            plan.append('look up ' + str(len(self.iso_codes_list)) + ' ISO codes')
+        else:
+            plan.append('scan ' + str(len(countries_dict)) + ' countries')
+
+        if self.continents_list != None:
+            plan.append('keep continents ' + ', '.join(self.continents_list))
+
+        if self.min_year != None:
+            plan.append('keep years ' + str(self.min_year) + ' to ' + str(self.max_year))
+
+        plan.append('one pass computing ' + ', '.join(self.get_required_metrics()))
+
+        if self.top_n != None:
+            plan.append('top ' + str(self.top_n[0]) + ' by ' + self.top_n[1] + ' in ' + str(self.top_n[2]))
+
+        return plan
+
+
+    def get_required_metrics(self):
+
+        """ () -> list
+        This instance method returns the metrics to compute: the ones asked for, plus the one of the top n.
+
+        """
+
+        required_metrics = list(self.metrics_list)
+
+        if self.top_n != None and self.top_n[1] not in required_metrics:
+            required_metrics.append(self.top_n[1])
+
+        return required_metrics
+
+
+    def get_selected_countries(self, countries_dict):
+
+        """ (dict) -> list
+        This instance method takes a dictionary mapping ISO codes to Country objects and returns the list of countries
+        kept by the ISO codes and continents filters, each once.
+
+        """
+
+        # Looking the listed ISO codes up directly instead of scanning every country
+        if self.iso_codes_list != None:
+            countries_list = []
+
+            for iso_code in self.iso_codes_list:
+                if iso_code in countries_dict and countries_dict[iso_code] not in countries_list:
+                    countries_list.append(countries_dict[iso_code])
+        else:
+            countries_list = list(countries_dict.values())
+
+        if self.continents_list != None:
+            continents_set = set(self.continents_list)
+            countries_list = [country for country in countries_list if not continents_set.isdisjoint(country.continents)]
+
+        return countries_list
+
+
+    def run(self, countries_dict):
+
+        """ (dict) -> dict
+        This instance method takes a dictionary mapping ISO codes to Country objects, runs the query and returns a
+        dictionary mapping each metric asked for (and 'top_n' if asked for) to its results.
+
+        >>> b = Country("ALB", "Albania", ["EUROPE"], 2007, 3.924, 3034000)
+        >>> r = Country("RUS", "Russia", ["ASIA", "EUROPE"], 2007, 1604.778, 14266000)
+        >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+        >>> q.add_yearly_data("1993\\t30.985\\t501000")
+        >>> d = {'ALB': b, 'RUS': r, 'QAT': q}
+        >>> result = CountryQuery().continents('ASIA').years(2006, 2007).metrics('cumulative', 'total_cumulative').run(d)
+        >>> result['cumulative'][2007][q], result['total_cumulative'][2007]
+        (93.884, 1698.662)
+        >>> [iso_code for iso_code, value in CountryQuery().top(2, 'per_capita', 2007).run(d)['top_n']]
+        ['RUS', 'QAT']
+
+        """
+
+        required_metrics = self.get_required_metrics()
+        countries_list = self.get_selected_countries(countries_dict)
+
+        if self.min_year != None:
+            years = list(range(self.min_year, self.max_year + 1))
+        else:
+            years = get_year_axis(dict([(country.iso_code, country) for country in countries_list]))
+
+        if self.top_n != None and self.top_n[2] not in years:
+            raise ValueError('the top n year is outside the years of the query')
+
+        result = {}
+
+        for metric in required_metrics:
+            result[metric] = dict([(year, {}) for year in years])
+
+        # Running totals of the selected countries for each year: [co2 having population, population, cumulative co2]
+        totals = [[0.0, 0, 0.0] for year in years]
+
+        # One pass over each selected country computes every metric of every year
+        for country in countries_list:
+
+            co2_emissions = country.co2_emissions
+            population = country.population
+            cumulative_co2 = 0.0
+
+            if years != [] and ('cumulative' in required_metrics or 'total_cumulative' in required_metrics):
+                for key_year, country_co2 in co2_emissions.items():
+                    if key_year < years[0]:
+                        cumulative_co2 += float(country_co2)
+
+            for i in range(len(years)):
+
+                year = years[i]
+                country_co2 = co2_emissions.get(year)
+                country_pop = population.get(year)
+
+                if country_co2 != None:
+                    cumulative_co2 += float(country_co2)
+
+                if 'annual' in result:
+                    result['annual'][year][country] = country_co2 if country_co2 != None else 0.0
+
+                if 'per_capita' in result:
+                    if country_co2 != None and country_pop not in [None, 0]:
+                        result['per_capita'][year][country] = (float(country_co2) / int(country_pop)) * 1000000
+                    else:
+                        result['per_capita'][year][country] = None
+
+                if 'cumulative' in result:
+                    result['cumulative'][year][country] = cumulative_co2
+
+                if country_co2 != None and country_pop != None:
+                    totals[i][0] += float(country_co2)
+                    totals[i][1] += int(country_pop)
+
+                totals[i][2] += cumulative_co2
+
+        for i in range(len(years)):
+
+            if 'total_per_capita' in result:
+                result['total_per_capita'][years[i]] = (totals[i][0] / totals[i][1]) * 1000000 if totals[i][1] != 0 else 0.0
+
+            if 'total_cumulative' in result:
+                result['total_cumulative'][years[i]] = totals[i][2]
+
+        if self.top_n != None:
+            n, metric, country_year = self.top_n
+            year_values = [(value, country.name, country.iso_code) for country, value in result[metric][country_year].items() if value != None]
+
+            # Highest values first and, among equal values, names in alphabetical order (like get_top_n)
+            top_items = heapq.nsmallest(n, year_values, key=lambda item: (-item[0], item[1]))
+            result['top_n'] = [(iso_code, value) for value, name, iso_code in top_items]
+
+            if metric not in self.metrics_list:
+                del result[metric]
+
+        return result
@@ -0,0 +1,327 @@
+# Author: Sandy Nguyen
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import sys
+from urllib.parse import urlsplit, parse_qs
+
+from build_countries import Country, get_countries_from_file
+
+# Dataset loaded once per process (the server process, or each worker of a process pool)
+service_countries = {}
+service_continents = {}
+
+status_messages = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class QueryError(Exception):
+
+    """
+    Represents a query that can't be answered
+
+    Instance Attributes: status (int), message (str)
+
+    """
+
+    def __init__(self, status, message):
+
+        """ (int, str) -> void
+        This constructor will initialize the HTTP status and the message sent back to the client.
+
+        >>> e = QueryError(404, 'unknown ISO code XYZ')
+        >>> e.status
+        404
+
+        """
+
+        # Keeping both in args so the error survives being sent back from a process pool worker
+        Exception.__init__(self, status, message)
+        self.status = status
+        self.message = message
+
+
+    def __str__(self):
+
+        """ obj -> str
+        This string method returns the message of the error.
+
+        >>> str(QueryError(400, 'missing parameter year'))
+        'missing parameter year'
+
+        """
+
+        return self.message
+
+
+def load_dataset(data_filename):
+
+    """ (str) -> int
+    This function takes a string representing a cleaned co2 data file with continents, loads it into the process'
+    dataset (countries and countries by continent) and returns the number of countries loaded. It is also the
+    initializer of the process pool workers.
+
+    """
+
+    global service_countries, service_continents
+
+    service_countries = get_countries_from_file(data_filename)
+    service_continents = Country.get_countries_by_continent(list(service_countries.values()))
+
+    return len(service_countries)
+
+
+def get_country(iso_code):
+
+    """ (str) -> Country
+    This function takes a string representing an ISO code and returns the matching Country of the dataset, raising a
+    QueryError if there is none.
+
+    """
+
+    if iso_code not in service_countries:
+        raise QueryError(404, 'unknown ISO code ' + iso_code)
+
+    return service_countries[iso_code]
+
+
+def get_aggregate(query_name, country_year, continent=None, metric='per-capita', n=10):
+
+    """ (str, int, str, str, int) -> object
+    This function takes a string representing an aggregate query ('continent-total' or 'top-n'), a year, a continent,
+    a metric ('per-capita' or 'historical') and the number of countries of a top-n query, and returns the result computed
+    on the process' dataset. It runs in the executor, since it loops over all the countries.
+
+    """
+
+    if metric not in ['per-capita', 'historical']:
+        raise QueryError(400, 'unknown metric ' + metric)
+
+    if query_name == 'continent-total':
+
+        if continent not in service_continents:
+            raise QueryError(404, 'unknown continent ' + str(continent))
+
+        if metric == 'per-capita':
+            return Country.get_total_co2_emissions_per_capita_by_year(service_continents[continent], country_year)
+        else:
+            return Country.get_total_historical_co2_emissions(service_continents[continent], country_year)
+
+    else:
+        countries_list = list(service_countries.values())
+
+        if metric == 'per-capita':
+            country_co2_dict = Country.get_co2_emissions_per_capita_by_year(countries_list, country_year)
+
+            # Countries without data that year can't be compared with the others
+            for country in countries_list:
+                if country_co2_dict[country] == None:
+                    del country_co2_dict[country]
+
+        else:
+            country_co2_dict = Country.get_historical_co2_emissions(countries_list, country_year)
+
+        return [list(country_tup) for country_tup in Country.get_top_n(country_co2_dict, n)]
+
+
+def get_int_param(params, param_name, default=None):
+
+    """ (dict, str, int) -> int
+    This function takes a dictionary of query string parameters (as returned by parse_qs), the name of a parameter and a
+    default value, and returns the parameter as an integer. A QueryError is raised if it is missing without a default or
+    if it isn't an integer.
+
+    >>> get_int_param({'year': ['2000']}, 'year')
+    2000
+
+    >>> get_int_param({}, 'n', 10)
+    10
+
+    >>> get_int_param({'year': ['20x0']}, 'year')
+    Traceback (most recent call last):
+    query_service.QueryError: year must be an integer
+
+    """
+
+    if param_name not in params:
+
+        if default == None:
+            raise QueryError(400, 'missing parameter ' + param_name)
+
+        return default
+
+    try:
+        return int(params[param_name][0])
+    except ValueError:
+        raise QueryError(400, param_name + ' must be an integer')
+
+
+async def answer_query(path, executor):
+
+    """ (str, Executor) -> dict
+    This function takes the path of a request (with its query string) and the executor of the CPU heavy aggregates, and
+    returns the dictionary sent back as JSON. Single country queries are answered directly, aggregates run in the executor.
+
+    """
+
+    url = urlsplit(path)
+    params = parse_qs(url.query)
+
+    if url.path == '/health':
+        return {'countries': len(service_countries)}
+
+    if url.path not in ['/per-capita', '/historical', '/continent-total', '/top-n']:
+        raise QueryError(404, 'unknown query ' + url.path)
+
+    country_year = get_int_param(params, 'year')
+
+    if url.path == '/per-capita':
+        country = get_country(params.get('iso', [''])[0].upper())
+        return {'iso': country.iso_code, 'year': country_year, 'value': country.get_co2_per_capita_by_year(country_year)}
+
+    elif url.path == '/historical':
+        country = get_country(params.get('iso', [''])[0].upper())
+        return {'iso': country.iso_code, 'year': country_year, 'value': country.get_historical_co2(country_year)}
+
+    elif url.path == '/continent-total':
+        continent = params.get('continent', [''])[0].upper()
+        metric = params.get('metric', ['per-capita'])[0]
+        value = await asyncio.get_running_loop().run_in_executor(executor, get_aggregate, 'continent-total', country_year, continent, metric)
+        return {'continent': continent, 'year': country_year, 'metric': metric, 'value': value}
+
+    else:
+        metric = params.get('metric', ['per-capita'])[0]
+        n = get_int_param(params, 'n', 10)
+        value = await asyncio.get_running_loop().run_in_executor(executor, get_aggregate, 'top-n', country_year, None, metric, n)
+        return {'year': country_year, 'metric': metric, 'n': n, 'value': value}
+
+
+async def handle_client(reader, writer, executor):
+
+    """ (StreamReader, StreamWriter, Executor) -> void
+    This function answers the HTTP requests of one client until it closes the connection (or asks for it to be closed).
+    Only GET requests are supported, and every answer is a JSON object (with status 500 if answering failed).
+
+    """
+
+    try:
+
+        while True:
+            request_line = await reader.readline()
+
+            # The client closed the connection
+            if request_line == b'':
+                break
+
+            # Reading the headers until the empty line, we only need to know if the connection is kept alive
+            keep_alive = request_line.rstrip().endswith(b'HTTP/1.1')
+            header_line = await reader.readline()
+
+            while header_line not in [b'\r\n', b'\n', b'']:
+                header = header_line.decode('latin-1').lower()
+
+                if header.startswith('connection:'):
+                    keep_alive = 'keep-alive' in header
+
+                header_line = await reader.readline()
+
+            request_list = request_line.decode('latin-1').split()
+
+            try:
+                if len(request_list) != 3:
+                    raise QueryError(400, 'malformed request line')
+
+                if request_list[0] != 'GET':
+                    raise QueryError(405, 'only GET is supported')
+
+                status = 200
+                response_dict = await answer_query(request_list[1], executor)
+
+            except QueryError as e:
+                status = e.status
+                response_dict = {'error': e.message}
+
+            # Any other problem still gets an answer, so the client isn't left without one
+            except Exception as e:
+                status = 500
+                response_dict = {'error': type(e).__name__ + ': ' + str(e)}
+                sys.stderr.write('error answering ' + request_line.decode('latin-1').strip() + ': ' + repr(e) + '\n')
+
+            body = json.dumps(response_dict).encode('utf-8')
+            headers = ('HTTP/1.1 ' + str(status) + ' ' + status_messages[status] + '\r\n'
+                       + 'Content-Type: application/json\r\n'
+                       + 'Content-Length: ' + str(len(body)) + '\r\n'
+                       + 'Connection: ' + ('keep-alive' if keep_alive else 'close') + '\r\n\r\n')
+            writer.write(headers.encode('latin-1') + body)
+            await writer.drain()
+
+            if not keep_alive:
+                break
+
+    except ConnectionError:
+        pass
+
+    finally:
+        writer.close()
+
+
+async def serve(data_filename, host='127.0.0.1', port=8765, unix_path=None, max_workers=None, use_processes=False):
+
+    """ (str, str, int, str, int, bool) -> void
+    This function loads the data file once and serves queries on host:port (or on the Unix socket unix_path) until it is
+    cancelled. Aggregates run in a thread pool, or in a process pool where each worker loads the data file once.
+
+    """
+
+    num_countries = load_dataset(data_filename)
+
+    if use_processes:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers, initializer=load_dataset, initargs=(data_filename,))
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+
+    async def client_connected(reader, writer):
+        await handle_client(reader, writer, executor)
+
+    if unix_path != None:
+        server = await asyncio.start_unix_server(client_connected, unix_path)
+        sys.stderr.write('serving ' + str(num_countries) + ' countries on ' + unix_path + '\n')
+    else:
+        server = await asyncio.start_server(client_connected, host, port)
+        sys.stderr.write('serving ' + str(num_countries) + ' countries on http://' + host + ':' + str(port) + '\n')
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        executor.shutdown()
+
+
+def main(argv=None):
+
+    """ (list) -> int
+    This function takes a list of command line arguments (sys.argv[1:] if None), runs the query service and returns the
+    exit status.
+
+    """
+
+    parser = argparse.ArgumentParser(description='Serve co2 emissions queries over a dataset loaded once.')
+    parser.add_argument('data_file', help='cleaned co2 data file with continents')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='port to listen on')
+    parser.add_argument('--unix', default=None, help='listen on this Unix socket instead of host:port')
+    parser.add_argument('--workers', type=int, default=None, help='number of aggregate workers')
+    parser.add_argument('--processes', action='store_true', help='run the aggregates in a process pool instead of threads')
+    options = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(options.data_file, options.host, options.port, options.unix, options.workers, options.processes))
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,375 @@
+# Author: Sandy Nguyen
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import time
+
+# Results are kept until the cache holds more than this many bytes of them, then the least recently used are evicted
+default_max_bytes = 64 * 1024 * 1024
+
+create_tables = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    function_name TEXT NOT NULL,
+    args TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+
+def get_cache_path(data_filename):
+
+    """ (str) -> str
+    This function takes a string representing a data file and returns the path of its result cache, a hidden SQLite
+    file next to it.
+
+    >>> get_cache_path(os.path.join('data', 'large_co2_data.tsv')) == os.path.join('data', '.large_co2_data.tsv.results.sqlite')
+    True
+
+    """
+
+    return os.path.join(os.path.dirname(data_filename), '.' + os.path.basename(data_filename) + '.results.sqlite')
+
+
+def get_file_hash(filename):
+
+    """ (str) -> str
+    This function takes a string representing a file and returns the SHA-256 of its content.
+
+    """
+
+    hasher = hashlib.sha256()
+    fobj = open(filename, "rb")
+    chunk = fobj.read(1 << 20)
+
+    while chunk:
+        hasher.update(chunk)
+        chunk = fobj.read(1 << 20)
+
+    fobj.close()
+
+    return hasher.hexdigest()
+
+
+def get_result_key(fingerprint, function_name, args):
+
+    """ (str, str, tuple) -> str
+    This function takes the fingerprint of a data file, the name of a function and its arguments (besides the data),
+    and returns the key of the result in the cache. Arguments are compared by repr, so they must be plain values
+    (numbers, strings, and lists or tuples of them).
+
+    >>> get_result_key('abc', 'query_historical', (2000, ('USA',))) == get_result_key('abc', 'query_historical', (2000, ('USA',)))
+    True
+
+    >>> get_result_key('abc', 'query_historical', (2000,)) == get_result_key('abd', 'query_historical', (2000,))
+    False
+
+    """
+
+    hasher = hashlib.sha256()
+
+    # Separated so that ('ab', 'c') and ('a', 'bc') don't give the same key
+    for part in [fingerprint, function_name, repr(args)]:
+        hasher.update(part.encode('utf-8') + b'\x00')
+
+    return hasher.hexdigest()
+
+
+class ResultCache:
+
+    """
+    Represents the results of queries on one data file, kept in a SQLite file next to it across runs. Results are only
+    returned for the content the file had when they were computed, and the least recently used ones are evicted once
+    they take more than max_bytes.
+
+    Instance Attributes: data_filename (str), cache_filename (str), max_bytes (int), connection (Connection),
+    fingerprint (str), hits (int), misses (int), countries_dict (dict), duplicate_tracker (DuplicateTracker)
+
+    """
+
+    def __init__(self, data_filename, cache_filename=None, max_bytes=default_max_bytes, duplicate_tracker=None):
+
+        """ (str, str, int, DuplicateTracker) -> void
+        This constructor will open (or create) the result cache of data_filename (next to it if cache_filename is
+        None), fingerprint the data file and drop the results computed for any other content of it. If the data file
+        has to be loaded, its rows are recorded in duplicate_tracker (if not None).
+
+        >>> c = ResultCache('data/small_co2_data.tsv', ':memory:')
+        >>> c.get_stats()['results']
+        0
+
+        """
+
+        self.data_filename = data_filename
+        self.cache_filename = cache_filename if cache_filename != None else get_cache_path(data_filename)
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(self.cache_filename)
+        self.connection.executescript(create_tables)
+        self.hits = 0
+        self.misses = 0
+
+        # Loaded only if a result has to be computed
+        self.countries_dict = None
+        self.duplicate_tracker = duplicate_tracker
+
+        self.fingerprint = self.get_fingerprint()
+
+        with self.connection:
+            self.connection.execute('DELETE FROM results WHERE fingerprint != ?', (self.fingerprint,))
+
+
+    def get_fingerprint(self):
+
+        """ () -> str
+        This instance method returns the SHA-256 of the data file's content. The hash is kept in the cache with the
+        file's size and modification time, so the file is only read again when one of them changed.
+
+        """
+
+        path = os.path.abspath(self.data_filename)
+        file_stat = os.stat(path)
+        row = self.connection.execute('SELECT size, mtime_ns, sha256 FROM fingerprints WHERE path = ?', (path,)).fetchone()
+
+        if row != None and row[0] == file_stat.st_size and row[1] == file_stat.st_mtime_ns:
+            return row[2]
+
+        sha256 = get_file_hash(path)
+
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO fingerprints (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)',
+                                    (path, file_stat.st_size, file_stat.st_mtime_ns, sha256))
+
+        return sha256
+
+
+    def get_countries(self):
+
+        """ () -> dict
+        This instance method returns the dictionary mapping ISO codes to Country objects of the data file, loading it
+        (with the duplicate tracker) the first time.
+
+        """
+
+        if self.countries_dict == None:
+
+            # Importing here since cache hits don't need to load anything
+            from build_countries import get_countries_from_file
+
+            self.countries_dict = get_countries_from_file(self.data_filename, self.duplicate_tracker)
+
+        return self.countries_dict
+
+
+    def get_cached(self, function_name, args):
+
+        """ (str, tuple) -> tuple
+        This instance method takes the name of a function and its arguments, and returns a tuple (True, result) if a
+        result is cached for the current content of the data file, (False, None) otherwise.
+
+        >>> c = ResultCache('data/small_co2_data.tsv', ':memory:')
+        >>> c.get_cached('square', (3,))
+        (False, None)
+
+        """
+
+        key = get_result_key(self.fingerprint, function_name, args)
+        row = self.connection.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+
+        if row == None:
+            self.misses += 1
+            return (False, None)
+
+        self.hits += 1
+
+        with self.connection:
+            self.connection.execute('UPDATE results SET last_used = ? WHERE key = ?', (time.time(), key))
+
+        return (True, pickle.loads(row[0]))
+
+
+    def add_result(self, function_name, args, result):
+
+        """ (str, tuple, object) -> void
+        This instance method stores the (picklable) result of function_name for args and the current content of the
+        data file, then evicts the least recently used results if the cache is over max_bytes.
+
+        """
+
+        key = get_result_key(self.fingerprint, function_name, args)
+        value = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO results (key, fingerprint, function_name, args, value, size, last_used) '
+                                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                    (key, self.fingerprint, function_name, repr(args), value, len(value), time.time()))
+
+        self.evict()
+
+
+    def get_result(self, function_name, args, compute_function):
+
+        """ (str, tuple, function) -> object
+        This instance method takes the name of a function, its arguments and a function without arguments computing
+        the result, and returns the cached result for the current content of the data file, or computes it with
+        compute_function, stores it and returns it.
+
+        >>> c = ResultCache('data/small_co2_data.tsv', ':memory:')
+        >>> c.get_result('square', (3,), lambda: 3 * 3), c.get_result('square', (3,), lambda: None)
+        (9, 9)
+        >>> c.hits, c.misses
+        (1, 1)
+
+        """
+
+        found, result = self.get_cached(function_name, args)
+
+        if not found:
+            result = compute_function()
+            self.add_result(function_name, args, result)
+
+        return result
+
+
+    def call(self, data_function, *args):
+
+        """ (function, object) -> object
+        This instance method takes a function whose first argument is a dictionary mapping ISO codes to Country
+        objects (such as the data functions of plot_data) and its other arguments, and returns
+        data_function(countries of the data file, *args), cached by the function's module and name. The duplicate
+        policy is part of the arguments cached, since it changes the values loaded.
+
+        >>> import plot_data
+        >>> c = ResultCache('data/small_co2_data.tsv', ':memory:')
+        >>> c.call(plot_data.get_co2_pc_top_ten_data, 2001) == plot_data.get_co2_pc_top_ten_data(c.get_countries(), 2001)
+        True
+
+        """
+
+        function_name = data_function.__module__ + '.' + data_function.__qualname__
+        duplicate_policy = self.duplicate_tracker.policy if self.duplicate_tracker != None else None
+
+        return self.get_result(function_name, args + (duplicate_policy,), lambda: data_function(self.get_countries(), *args))
+
+
+    def evict(self):
+
+        """ () -> int
+        This instance method deletes the least recently used results until the others take at most max_bytes, and
+        returns the number of results deleted.
+
+        >>> c = ResultCache('data/small_co2_data.tsv', ':memory:', 100)
+        >>> for i in range(5):
+        ...     n = c.get_result('range', (i,), lambda: list(range(10)))
+        >>> c.get_stats()['results'], c.get_stats()['bytes'] <= 100
+        (2, True)
+
+        """
+
+        total_bytes = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+
+        if total_bytes <= self.max_bytes:
+            return 0
+
+        evicted_keys = []
+
+        for key, size in self.connection.execute('SELECT key, size FROM results ORDER BY last_used'):
+
+            if total_bytes <= self.max_bytes:
+                break
+
+            evicted_keys.append((key,))
+            total_bytes -= size
+
+        with self.connection:
+            self.connection.executemany('DELETE FROM results WHERE key = ?', evicted_keys)
+
+        return len(evicted_keys)
+
+
+    def invalidate(self, function_name=None):
+
+        """ (str) -> int
+        This instance method deletes the cached results of function_name (every result if None) and returns the
+        number of results deleted.
+
+        >>> c = ResultCache('data/small_co2_data.tsv', ':memory:')
+        >>> n = c.get_result('square', (3,), lambda: 9)
+        >>> c.invalidate('cube'), c.invalidate('square')
+        (0, 1)
+
+        """
+
+        with self.connection:
+            if function_name == None:
+                cursor = self.connection.execute('DELETE FROM results')
+            else:
+                cursor = self.connection.execute('DELETE FROM results WHERE function_name = ?', (function_name,))
+
+        return cursor.rowcount
+
+
+    def get_stats(self):
+
+        """ () -> dict
+        This instance method returns a dictionary with the number of results cached, the bytes they take, the limit,
+        and the hits and misses since the cache was opened.
+
+        """
+
+        num_results, total_bytes = self.connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+
+        return {'results': num_results, 'bytes': total_bytes, 'max_bytes': self.max_bytes, 'hits': self.hits, 'misses': self.misses}
+
+
+    def close(self):
+
+        """ () -> void
+        This instance method closes the connection to the cache.
+
+        """
+
+        self.connection.close()
+
+
+def main(argv=None):
+
+    """ (list) -> int
+    This function prints the statistics of the result cache of the data file given on the command line as JSON, after
+    invalidating its results with --invalidate.
+
+    """
+
+    parser = argparse.ArgumentParser(description='Inspect or clear the cached query results of a cleaned co2 data file.')
+    parser.add_argument('data_file', help='cleaned co2 data file with continents')
+    parser.add_argument('--invalidate', nargs='?', const='', default=None, metavar='FUNCTION',
+                        help='delete the cached results of FUNCTION (of every function if not given)')
+    options = parser.parse_args(argv)
+
+    cache = ResultCache(options.data_file)
+
+    if options.invalidate != None:
+        cache.invalidate(options.invalidate if options.invalidate != '' else None)
+
+    print(json.dumps(cache.get_stats(), indent=4))
+    cache.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+# Author: Sandy Nguyen
+
+def get_year_axis(countries_dict):
+
+    """ (dict) -> list
+    This function takes a dictionary mapping ISO codes to Country objects and returns the list of every year from the
+    first to the last year recorded in any country (co2 emissions or population).
+
+    >>> from build_countries import Country
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+    >>> q.add_yearly_data("2004\\t30.985\\t501000")
+    >>> get_year_axis({'QAT': q})
+    [2004, 2005, 2006, 2007]
+
+    """
+
+    min_year = None
+    max_year = None
+
+    for country in countries_dict.values():
+        for yearly_data in [country.co2_emissions, country.population]:
+            for year in yearly_data:
+
+                if min_year == None or year < min_year:
+                    min_year = year
+
+                if max_year == None or year > max_year:
+                    max_year = year
+
+    # If there is no data at all
+    if min_year == None:
+        return []
+
+    return list(range(min_year, max_year + 1))
+
+
+def get_country_rolling_stats(country, years, window, per_capita_window):
+
+    """ (Country, list, int, int) -> dict
+    This function takes a Country, a list of consecutive years and two window sizes (in years), and returns a dictionary
+    of lists aligned with the years, computed in one pass over the years:
+    'co2' (the co2 emissions, None if missing), 'moving_average' (average of the co2 emissions recorded in the last
+    window years), 'yoy_growth' (growth in % of the co2 emissions since the previous year), 'rolling_per_capita' (co2
+    emissions per capita in tonnes over the last per_capita_window years, using the years that have both co2 emissions
+    and population) and 'peak_year' (year of the highest co2 emissions so far). Values that can't be computed are None.
+
+    >>> from build_countries import Country
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2001, 40.0, 1000000)
+    >>> q.add_yearly_data("2002\\t50.0\\t1000000")
+    >>> q.add_yearly_data("2003\\t45.0\\t")
+    >>> s = get_country_rolling_stats(q, [2000, 2001, 2002, 2003], 2, 2)
+    >>> s['moving_average']
+    [None, 40.0, 45.0, 47.5]
+    >>> s['yoy_growth']
+    [None, None, 25.0, -10.0]
+    >>> s['rolling_per_capita']
+    [None, 40.0, 45.0, 50.0]
+    >>> s['peak_year']
+    [None, 2001, 2002, 2002]
+
+    """
+
+    co2_list = []
+    moving_average_list = []
+    yoy_growth_list = []
+    rolling_per_capita_list = []
+    peak_year_list = []
+
+    # Running sums of the values inside each window
+    window_co2_sum = 0.0
+    window_co2_count = 0
+    per_capita_co2_sum = 0.0
+    per_capita_pop_sum = 0
+    per_capita_pairs = []
+    peak_co2 = None
+    peak_year = None
+
+    for i in range(len(years)):
+
+        country_co2 = country.co2_emissions.get(years[i])
+        country_pop = country.population.get(years[i])
+        co2_list.append(country_co2)
+
+        # Adding the year to the moving average window and removing the year that just left it
+        if country_co2 != None:
+            window_co2_sum += country_co2
+            window_co2_count += 1
+
+        if i >= window and co2_list[i - window] != None:
+            window_co2_sum -= co2_list[i - window]
+            window_co2_count -= 1
+
+        if window_co2_count > 0:
+            moving_average_list.append(window_co2_sum / window_co2_count)
+        else:
+            moving_average_list.append(None)
+
+        # Growth since the previous year, if both years are recorded
+        if i > 0 and country_co2 != None and co2_list[i - 1] not in [None, 0]:
+            yoy_growth_list.append((country_co2 - co2_list[i - 1]) / co2_list[i - 1] * 100)
+        else:
+            yoy_growth_list.append(None)
+
+        # Only the years with both co2 emissions and population count in the per capita window
+        if country_co2 != None and country_pop != None:
+            per_capita_pairs.append((country_co2, country_pop))
+            per_capita_co2_sum += country_co2
+            per_capita_pop_sum += country_pop
+        else:
+            per_capita_pairs.append(None)
+
+        if i >= per_capita_window and per_capita_pairs[i - per_capita_window] != None:
+            per_capita_co2_sum -= per_capita_pairs[i - per_capita_window][0]
+            per_capita_pop_sum -= per_capita_pairs[i - per_capita_window][1]
+
+        if per_capita_pop_sum > 0:
+            rolling_per_capita_list.append((per_capita_co2_sum / per_capita_pop_sum) * 1000000)
+        else:
+            rolling_per_capita_list.append(None)
+
+        # Keeping the year of the highest co2 emissions so far
+        if country_co2 != None and (peak_co2 == None or country_co2 > peak_co2):
+            peak_co2 = country_co2
+            peak_year = years[i]
+
+        peak_year_list.append(peak_year)
+
+    return {'co2': co2_list, 'moving_average': moving_average_list, 'yoy_growth': yoy_growth_list,
+            'rolling_per_capita': rolling_per_capita_list, 'peak_year': peak_year_list}
+
+
+def get_rolling_stats(countries_dict, window=5, per_capita_window=None, years=None):
+
+    """ (dict, int, int, list) -> dict
+    This function takes a dictionary mapping ISO codes to Country objects, the window of the moving average, the window of
+    the rolling per capita emissions (same as window if None) and an optional list of consecutive years (every year of the
+    dataset if None), and returns a dictionary with the year axis under 'years' and, under 'countries', a dictionary
+    mapping each ISO code to the lists returned by get_country_rolling_stats, all aligned with the year axis.
+    Each country's series is gone through only once.
+
+    >>> from build_countries import Country
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2001, 40.0, 1000000)
+    >>> q.add_yearly_data("2002\\t50.0\\t1000000")
+    >>> s = get_rolling_stats({'QAT': q}, 3)
+    >>> s['years']
+    [2001, 2002]
+    >>> s['countries']['QAT']['moving_average']
+    [40.0, 45.0]
+
+    """
+
+    if years == None:
+        years = get_year_axis(countries_dict)
+
+    if per_capita_window == None:
+        per_capita_window = window
+
+    if window < 1 or per_capita_window < 1:
+        raise ValueError('the windows must be at least 1 year')
+
+    stats_dict = {}
+
+    for iso_code, country in countries_dict.items():
+        stats_dict[iso_code] = get_country_rolling_stats(country, years, window, per_capita_window)
+
+    return {'years': years, 'countries': stats_dict}
+
+
+def get_peak_years(countries_dict):
+
+    """ (dict) -> dict
+    This function takes a dictionary mapping ISO codes to Country objects and returns a dictionary mapping each ISO code to
+    a tuple (year, co2 emissions) of the country's highest co2 emissions, None if it has none.
+
+    >>> from build_countries import Country
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2001, 40.0, 1000000)
+    >>> q.add_yearly_data("2002\\t50.0\\t1000000")
+    >>> get_peak_years({'QAT': q})
+    {'QAT': (2002, 50.0)}
+
+    """
+
+    peak_dict = {}
+
+    for iso_code, country in countries_dict.items():
+
+        peak_dict[iso_code] = None
+
+        for year, country_co2 in sorted(country.co2_emissions.items()):
+            if peak_dict[iso_code] == None or country_co2 > peak_dict[iso_code][1]:
+                peak_dict[iso_code] = (year, country_co2)
+
+    return peak_dict
@@ -0,0 +1,230 @@
+# Author: Sandy Nguyen
+
+import concurrent.futures
+import sys
+from build_countries import Country
+from interning import intern_year
+
+
+def parse_shard(filename):
+
+    """ (str) -> tuple
+    This function takes a string representing a cleaned co2 data file with continents (one shard of the dataset) and
+    returns a tuple (shard dictionary, conflicts). The shard dictionary maps each ISO code to a list
+    [name, continents, co2 emissions dictionary, population dictionary] of plain values, so that it can be sent back
+    from another process. Missing values ('' or -1) are left out, like for Country. When the same year of a country
+    appears twice with different values, the first value is kept and the conflict is returned as a tuple
+    (ISO code, year, field, kept value, other value).
+
+    >>> shard, conflicts = parse_shard('data/small_co2_data.tsv')
+    >>> shard['QAT'][:2]
+    ['Qatar', 'ASIA']
+    >>> conflicts
+    []
+
+    """
+
+    shard_dict = {}
+    conflicts = []
+    fobj = open(filename, "r", encoding="utf-8")
+
+    for line in fobj:
+
+        line_list = line.rstrip('\r\n').split('\t')
+        iso_code = line_list[0]
+        year = int(line_list[3])
+
+        if iso_code not in shard_dict:
+            shard_dict[iso_code] = [line_list[1], line_list[2], {}, {}]
+
+        country_data = shard_dict[iso_code]
+
+        for field, index, value in [('co2', 2, line_list[4]), ('population', 3, line_list[5])]:
+
+            if value in ['', '-1']:
+                continue
+
+            value = float(value) if field == 'co2' else int(value)
+
+            if year not in country_data[index]:
+                country_data[index][year] = value
+            elif country_data[index][year] != value:
+                conflicts.append((iso_code, year, field, country_data[index][year], value))
+
+    fobj.close()
+
+    return shard_dict, conflicts
+
+
+class ShardedDataset:
+
+    """
+    Represents one countries dictionary merged from several shards (per region or per decade files). Shards are parsed
+    concurrently and merged in the order they were given; a shard added later is merged into the countries already
+    loaded, without reading the other shards again.
+
+    Values are never silently overwritten: when a shard has a different value for a year already loaded, the value
+    loaded first is kept and the conflict is recorded as a tuple (ISO code, year, field, kept value, kept shard, other
+    value, other shard). The field is 'co2', 'population', 'name' or 'continents' (with year None).
+
+    Instance Attributes: countries_dict (dict), shard_filenames (list), conflicts (list), max_workers (int),
+    use_processes (bool)
+
+    """
+
+    def __init__(self, max_workers=None, use_processes=True):
+
+        """ (int, bool) -> void
+        This constructor will initialize an empty dataset. Shards are parsed by max_workers worker processes, or threads
+        if use_processes is False.
+
+        >>> s = ShardedDataset()
+        >>> s.countries_dict, s.shard_filenames
+        ({}, [])
+
+        """
+
+        self.countries_dict = {}
+        self.shard_filenames = []
+        self.conflicts = []
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+
+        # (ISO code, field, year) -> shard the value was loaded from, to report both sides of a conflict
+        self.value_shards = {}
+
+
+    def add_shards(self, filenames):
+
+        """ (list) -> int
+        This instance method takes a list of strings representing shard files, parses them concurrently, merges them
+        into countries_dict and returns the number of conflicts found.
+
+        >>> s = ShardedDataset(use_processes=False)
+        >>> s.add_shards(['data/small_co2_data.tsv'])
+        0
+        >>> s.countries_dict['QAT'].co2_emissions[2001]
+        41.215
+
+        """
+
+        if self.use_processes and len(filenames) > 1:
+            executor = concurrent.futures.ProcessPoolExecutor(self.max_workers)
+        else:
+            executor = concurrent.futures.ThreadPoolExecutor(self.max_workers)
+
+        num_conflicts = len(self.conflicts)
+
+        # map keeps the order of the filenames, so the merge doesn't depend on which shard is parsed first
+        with executor:
+            for filename, (shard_dict, shard_conflicts) in zip(filenames, executor.map(parse_shard, filenames)):
+
+                for iso_code, year, field, kept_value, other_value in shard_conflicts:
+                    self.conflicts.append((iso_code, year, field, kept_value, filename, other_value, filename))
+
+                self.merge_shard(filename, shard_dict)
+
+        return len(self.conflicts) - num_conflicts
+
+
+    def add_shard(self, filename):
+
+        """ (str) -> int
+        This instance method takes a string representing one new shard file, merges it into countries_dict and returns the
+        number of conflicts found. The shards already loaded aren't read again.
+
+        """
+
+        return self.add_shards([filename])
+
+
+    def merge_shard(self, filename, shard_dict):
+
+        """ (str, dict) -> void
+        This instance method takes the name of a shard and the shard dictionary returned by parse_shard and merges it into
+        countries_dict, recording the conflicts.
+
+        >>> s = ShardedDataset()
+        >>> s.merge_shard('a.tsv', {'QAT': ['Qatar', 'ASIA', {2001: 41.215}, {}]})
+        >>> s.merge_shard('b.tsv', {'QAT': ['Qatar', 'ASIA', {2001: 41.3, 2002: 42.0}, {2001: 615000}]})
+        >>> sorted(s.countries_dict['QAT'].co2_emissions.items())
+        [(2001, 41.215), (2002, 42.0)]
+        >>> s.conflicts
+        [('QAT', 2001, 'co2', 41.215, 'a.tsv', 41.3, 'b.tsv')]
+
+        """
+
+        self.shard_filenames.append(filename)
+
+        for iso_code, (name, continents, co2_dict, pop_dict) in shard_dict.items():
+
+            country = self.countries_dict.get(iso_code)
+
+            if country == None:
+                years = list(co2_dict) + list(pop_dict)
+
+                # A country without any value has no year to give, and mustn't move the years recorded for every country
+                if years != []:
+                    country = Country(iso_code, name, continents, min(years), '', '')
+                else:
+                    years_recorded = (Country.min_year_recorded, Country.max_year_recorded)
+                    country = Country(iso_code, name, continents, 0, '', '')
+                    Country.min_year_recorded, Country.max_year_recorded = years_recorded
+
+                self.countries_dict[country.iso_code] = country
+                self.value_shards[(iso_code, 'name', None)] = filename
+
+            else:
+                kept_shard = self.value_shards[(iso_code, 'name', None)]
+
+                if name != country.name:
+                    self.conflicts.append((iso_code, None, 'name', country.name, kept_shard, name, filename))
+
+                if continents.split(',') != list(country.continents):
+                    self.conflicts.append((iso_code, None, 'continents', ','.join(country.continents), kept_shard, continents, filename))
+
+            for field, shard_values, country_values in [('co2', co2_dict, country.co2_emissions), ('population', pop_dict, country.population)]:
+                for year, value in shard_values.items():
+
+                    if year not in country_values:
+                        country_values[intern_year(year)] = value
+                        self.value_shards[(iso_code, field, year)] = filename
+                        country.update_version()
+
+                    elif country_values[year] != value:
+                        self.conflicts.append((iso_code, year, field, country_values[year], self.value_shards[(iso_code, field, year)], value, filename))
+
+                    # Keeping the Country's minimum/maximum year recorded up to date, like add_yearly_data
+                    if Country.min_year_recorded > year:
+                        Country.min_year_recorded = year
+
+                    if Country.max_year_recorded < year:
+                        Country.max_year_recorded = year
+
+
+def get_countries_from_shards(filenames, max_workers=None, use_processes=True):
+
+    """ (list, int, bool) -> tuple
+    This function takes a list of strings representing shard files and returns a tuple (dictionary mapping ISO codes to
+    Country objects merged from every shard, list of conflicts), like get_countries_from_file for a single file.
+
+    >>> d, conflicts = get_countries_from_shards(['data/small_co2_data.tsv', 'data/small_co2_data.tsv'])
+    >>> len(d), conflicts
+    (9, [])
+
+    """
+
+    dataset = ShardedDataset(max_workers, use_processes)
+    dataset.add_shards(filenames)
+
+    return dataset.countries_dict, dataset.conflicts
+
+
+if __name__ == '__main__':
+
+    # Usage: python shard_loader.py shard_1.tsv shard_2.tsv ...
+    countries_dict, conflicts = get_countries_from_shards(sys.argv[1:])
+    print(len(countries_dict), 'countries loaded from', len(sys.argv) - 1, 'shards')
+
+    for conflict in conflicts:
+        print('CONFLICT %s %s %s: %r (%s) kept, %r (%s) ignored' % conflict)
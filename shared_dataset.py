@@ -0,0 +1,540 @@
+# Author: Sandy Nguyen
+
+import bisect
+import struct
+from multiprocessing import shared_memory
+
+# Header: magic, number of countries, number of continents, number of yearly rows, size of the strings block
+header_format = '<8sqqqq'
+header_size = struct.calcsize(header_format)
+magic = b'CO2SHM01'
+
+# Missing population is stored as -1 and missing co2 emissions as NaN
+missing_population = -1
+
+
+def get_layout(num_countries, num_continents, num_rows, strings_size):
+
+    """ (int, int, int, int) -> dict
+    This function takes the number of countries, of continents, of yearly rows and the size of the strings block, and
+    returns a dictionary mapping each array of a shared block to a tuple (offset, size in bytes). The arrays are:
+    'row_starts' (int64, one more than the number of countries), 'continent_masks' (int64 per country), 'string_ends'
+    (int64 per ISO code, name and continent), 'co2' (float64 per row), 'population' (int64 per row), 'years' (int32 per
+    row) and 'strings' (utf-8 block). The 8 byte arrays come first so that every array stays aligned.
+
+    >>> layout = get_layout(2, 1, 3, 10)
+    >>> layout['years']
+    (168, 12)
+    >>> layout['strings']
+    (180, 10)
+
+    """
+
+    layout = {}
+    offset = header_size
+
+    for array_name, array_size in [('row_starts', 8 * (num_countries + 1)), ('continent_masks', 8 * num_countries),
+                                   ('string_ends', 8 * (2 * num_countries + num_continents)), ('co2', 8 * num_rows),
+                                   ('population', 8 * num_rows), ('years', 4 * num_rows), ('strings', strings_size)]:
+        layout[array_name] = (offset, array_size)
+        offset += array_size
+
+    return layout
+
+
+def get_array(buf, layout, array_name, type_code, read_only=False):
+
+    """ (memoryview, dict, str, str, bool) -> memoryview
+    This function takes the buffer of a shared block, its layout, the name of an array and its struct type code
+    ('q', 'i' or 'd'), and returns a memoryview of the array without copying it, which can't be written to if
+    read_only is True.
+
+    >>> from multiprocessing import shared_memory
+    >>> block = shared_memory.SharedMemory(create=True, size=8)
+    >>> array = get_array(block.buf, {'co2': (0, 8)}, 'co2', 'd', True)
+    >>> array[0] = 1.0
+    Traceback (most recent call last):
+    TypeError: cannot modify read-only memory
+    >>> array.release()
+    >>> block.close()
+    >>> block.unlink()
+
+    """
+
+    offset, array_size = layout[array_name]
+    array = buf[offset:offset + array_size].cast(type_code)
+
+    if not read_only:
+        return array
+
+    # Only publish_countries writes to the block, workers attached to it get views they can't change
+    read_only_array = array.toreadonly()
+    array.release()
+
+    return read_only_array
+
+
+def get_continents_list(continents):
+
+    """ (list or str) -> list
+    This function takes the continents of a country (a list, or a comma separated string) and returns them as a list.
+
+    >>> get_continents_list('ASIA,EUROPE')
+    ['ASIA', 'EUROPE']
+
+    >>> get_continents_list(['AFRICA'])
+    ['AFRICA']
+
+    """
+
+    if type(continents) == str:
+        return continents.split(',')
+
+    return list(continents)
+
+
+def publish_countries(countries_dict, name=None):
+
+    """ (dict, str) -> SharedMemory
+    This function takes a dictionary mapping ISO codes to Country objects and an optional name, copies the dataset once
+    into a new shared memory block of fixed-layout arrays (ISO codes and names, continent membership as bitmasks, and the
+    years, co2 emissions and population of every country sorted by year) and returns the block. Workers attach to it by
+    name with SharedDataset. The caller must close() and unlink() the block once every worker is done.
+
+    >>> from build_countries import Country
+    >>> q = Country("QAT", "Qatar", ["ASIA"], 2007, 62.899, 1218000)
+    >>> q.add_yearly_data("1993\\t30.985\\t501000")
+    >>> block = publish_countries({'QAT': q})
+    >>> dataset = SharedDataset(block.name)
+    >>> dataset['QAT'].co2_emissions[1993]
+    30.985
+    >>> str(dataset['QAT'])
+    'Qatar\\tASIA\\t{1993: 30.985, 2007: 62.899}\\t{1993: 501000, 2007: 1218000}'
+    >>> dataset.close()
+    >>> block.close()
+    >>> block.unlink()
+
+    """
+
+    # Every continent gets a bit, in sorted order
+    continents_list = []
+
+    for country in countries_dict.values():
+        for continent in get_continents_list(country.continents):
+            if continent not in continents_list:
+                continents_list.append(continent)
+
+    continents_list.sort()
+
+    # Counting the yearly rows (a year with only co2 emissions or only population still takes a row)
+    num_rows = 0
+
+    for country in countries_dict.values():
+        num_rows += len(set(country.co2_emissions) | set(country.population))
+
+    # The strings block has the ISO code and name of each country, followed by the continents
+    strings_list = []
+
+    for iso_code, country in countries_dict.items():
+        strings_list.append(iso_code)
+        strings_list.append(country.name)
+
+    encoded_list = [string.encode('utf-8') for string in strings_list + continents_list]
+    strings_size = sum([len(encoded) for encoded in encoded_list])
+
+    layout = get_layout(len(countries_dict), len(continents_list), num_rows, strings_size)
+    block = shared_memory.SharedMemory(name=name, create=True, size=layout['strings'][0] + strings_size)
+    struct.pack_into(header_format, block.buf, 0, magic, len(countries_dict), len(continents_list), num_rows, strings_size)
+
+    row_starts = get_array(block.buf, layout, 'row_starts', 'q')
+    continent_masks = get_array(block.buf, layout, 'continent_masks', 'q')
+    string_ends = get_array(block.buf, layout, 'string_ends', 'q')
+    co2 = get_array(block.buf, layout, 'co2', 'd')
+    population = get_array(block.buf, layout, 'population', 'q')
+    years = get_array(block.buf, layout, 'years', 'i')
+
+    # Writing every country's rows sorted by year, so that a year can be found with a binary search
+    row = 0
+
+    for country_index, country in enumerate(countries_dict.values()):
+
+        row_starts[country_index] = row
+        continent_mask = 0
+
+        for continent in get_continents_list(country.continents):
+            continent_mask |= 1 << continents_list.index(continent)
+
+        continent_masks[country_index] = continent_mask
+
+        for year in sorted(set(country.co2_emissions) | set(country.population)):
+            years[row] = year
+            co2[row] = float(country.co2_emissions.get(year, float('nan')))
+            population[row] = int(country.population.get(year, missing_population))
+            row += 1
+
+    row_starts[len(countries_dict)] = row
+
+    # Writing the strings one after the other and where each one ends
+    strings_start = layout['strings'][0]
+    string_end = 0
+
+    for string_index, encoded in enumerate(encoded_list):
+        block.buf[strings_start + string_end:strings_start + string_end + len(encoded)] = encoded
+        string_end += len(encoded)
+        string_ends[string_index] = string_end
+
+    for array in [row_starts, continent_masks, string_ends, co2, population, years]:
+        array.release()
+
+    return block
+
+
+class SharedYearlyData:
+
+    """
+    Represents the read-only co2 emissions or population of a country in a shared block. It can be used like the
+    co2_emissions and population dictionaries of a Country (years as keys).
+
+    Instance Attributes: years (memoryview), values (memoryview), start (int), end (int), is_co2 (bool)
+
+    """
+
+    def __init__(self, years, values, start, end, is_co2):
+
+        """ (memoryview, memoryview, int, int, bool) -> void
+        This constructor will initialize the view over the rows start to end (excluded) of the shared arrays.
+
+        """
+
+        self.years = years
+        self.values = values
+        self.start = start
+        self.end = end
+        self.is_co2 = is_co2
+
+
+    def find_row(self, year):
+
+        """ (int) -> int
+        This instance method takes a year and returns the row holding its value, -1 if the value is missing.
+
+        """
+
+        row = bisect.bisect_left(self.years, year, self.start, self.end)
+
+        if row < self.end and self.years[row] == year and not self.is_missing(row):
+            return row
+
+        return -1
+
+
+    def is_missing(self, row):
+
+        """ (int) -> bool
+        This instance method takes a row and returns True if its value is missing (NaN co2 emissions or -1 population).
+
+        """
+
+        value = self.values[row]
+
+        if self.is_co2:
+            return value != value
+
+        return value == missing_population
+
+
+    def __getitem__(self, year):
+
+        """ (int) -> float
+        This method returns the value of the year, raising a KeyError if it is missing (like a dictionary).
+
+        """
+
+        row = self.find_row(year)
+
+        if row == -1:
+            raise KeyError(year)
+
+        return self.values[row]
+
+
+    def __contains__(self, year):
+
+        """ (int) -> bool
+        This method returns True if the year has a value.
+
+        """
+
+        return self.find_row(year) != -1
+
+
+    def __iter__(self):
+
+        """ () -> iterator
+        This method iterates over the years that have a value, in increasing order.
+
+        """
+
+        for row in range(self.start, self.end):
+            if not self.is_missing(row):
+                yield self.years[row]
+
+
+    def __len__(self):
+
+        """ () -> int
+        This method returns the number of years that have a value.
+
+        """
+
+        return len(self.items())
+
+
+    def get(self, year, default=None):
+
+        """ (int, object) -> object
+        This instance method returns the value of the year, default if it is missing (like a dictionary).
+
+        """
+
+        row = self.find_row(year)
+
+        if row == -1:
+            return default
+
+        return self.values[row]
+
+
+    def keys(self):
+
+        """ () -> list
+        This instance method returns the years that have a value.
+
+        """
+
+        return list(self)
+
+
+    def items(self):
+
+        """ () -> list
+        This instance method returns a list of tuples (year, value) for the years that have a value.
+
+        """
+
+        return [(self.years[row], self.values[row]) for row in range(self.start, self.end) if not self.is_missing(row)]
+
+
+class SharedCountry:
+
+    """
+    Represents a read-only country of a shared block. It has the same attributes and query methods as Country, so it can
+    be passed to the Country static methods and the plot_data functions.
+
+    Instance Attributes: iso_code (str), name (str), continents (list), co2_emissions (SharedYearlyData),
+    population (SharedYearlyData)
+
+    """
+
+    def __init__(self, iso_code, name, continents, co2_emissions, population):
+
+        """ (str, str, list, SharedYearlyData, SharedYearlyData) -> void
+        This constructor will initialize the object's attributes.
+
+        """
+
+        self.iso_code = iso_code
+        self.name = name
+        self.continents = continents
+        self.co2_emissions = co2_emissions
+        self.population = population
+
+
+    def __str__(self):
+
+        """ obj -> str
+        This string method returns the same representation as Country.__str__.
+
+        """
+
+        return self.name + '\t' + ','.join(self.continents) + '\t' + str(dict(self.co2_emissions.items())) + '\t' + str(dict(self.population.items()))
+
+
+    def get_co2_emissions_by_year(self, country_year):
+
+        """ (int) -> float
+        This instance method works like Country.get_co2_emissions_by_year.
+
+        """
+
+        return self.co2_emissions.get(country_year, 0.0)
+
+
+    def get_co2_per_capita_by_year(self, country_year):
+
+        """ (int) -> float
+        This instance method works like Country.get_co2_per_capita_by_year.
+
+        """
+
+        try:
+            return (self.co2_emissions[country_year] / self.population[country_year]) * 1000000
+        except KeyError:
+            return None
+
+
+    def get_historical_co2(self, country_year):
+
+        """ (int) -> float
+        This instance method works like Country.get_historical_co2.
+
+        """
+
+        sum_co2_emissions = 0.0
+
+        for key_year, country_co2 in self.co2_emissions.items():
+            if key_year <= country_year:
+                sum_co2_emissions += country_co2
+
+        return sum_co2_emissions
+
+
+class SharedDataset:
+
+    """
+    Represents a dataset published with publish_countries and attached without copying its arrays. It can be used like
+    the dictionary returned by get_countries_from_file (ISO codes as keys, SharedCountry objects as values).
+
+    Instance Attributes: block (SharedMemory), countries (dict), arrays (list)
+
+    """
+
+    def __init__(self, name):
+
+        """ (str) -> void
+        This constructor will attach to the shared block called name and create one SharedCountry per country. Only the
+        strings are decoded, the yearly data is read straight from the shared block.
+
+        """
+
+        self.block = shared_memory.SharedMemory(name=name)
+        block_magic, num_countries, num_continents, num_rows, strings_size = struct.unpack_from(header_format, self.block.buf, 0)
+
+        if block_magic != magic:
+            self.block.close()
+            raise ValueError("shared block '" + name + "' doesn't hold a co2 dataset")
+
+        layout = get_layout(num_countries, num_continents, num_rows, strings_size)
+        row_starts = get_array(self.block.buf, layout, 'row_starts', 'q', True)
+        continent_masks = get_array(self.block.buf, layout, 'continent_masks', 'q', True)
+        string_ends = get_array(self.block.buf, layout, 'string_ends', 'q', True)
+        co2 = get_array(self.block.buf, layout, 'co2', 'd', True)
+        population = get_array(self.block.buf, layout, 'population', 'q', True)
+        years = get_array(self.block.buf, layout, 'years', 'i', True)
+        self.arrays = [row_starts, continent_masks, string_ends, co2, population, years]
+
+        # Decoding the ISO codes, names and continents
+        strings_start = layout['strings'][0]
+        strings_bytes = bytes(self.block.buf[strings_start:strings_start + strings_size])
+        string_starts = [0] + list(string_ends)
+        strings_list = [strings_bytes[string_starts[i]:string_starts[i + 1]].decode('utf-8') for i in range(len(string_ends))]
+        continents_list = strings_list[2 * num_countries:]
+
+        self.countries = {}
+
+        for country_index in range(num_countries):
+
+            iso_code = strings_list[2 * country_index]
+            start = row_starts[country_index]
+            end = row_starts[country_index + 1]
+            continents = [continents_list[bit] for bit in range(num_continents) if continent_masks[country_index] & (1 << bit)]
+
+            self.countries[iso_code] = SharedCountry(iso_code, strings_list[2 * country_index + 1], continents,
+                                                     SharedYearlyData(years, co2, start, end, True),
+                                                     SharedYearlyData(years, population, start, end, False))
+
+
+    def __getitem__(self, iso_code):
+
+        """ (str) -> SharedCountry
+        This method returns the country with that ISO code.
+
+        """
+
+        return self.countries[iso_code]
+
+
+    def __contains__(self, iso_code):
+
+        """ (str) -> bool
+        This method returns True if there is a country with that ISO code.
+
+        """
+
+        return iso_code in self.countries
+
+
+    def __iter__(self):
+
+        """ () -> iterator
+        This method iterates over the ISO codes.
+
+        """
+
+        return iter(self.countries)
+
+
+    def __len__(self):
+
+        """ () -> int
+        This method returns the number of countries.
+
+        """
+
+        return len(self.countries)
+
+
+    def keys(self):
+
+        """ () -> iterable
+        This instance method returns the ISO codes.
+
+        """
+
+        return self.countries.keys()
+
+
+    def values(self):
+
+        """ () -> iterable
+        This instance method returns the SharedCountry objects.
+
+        """
+
+        return self.countries.values()
+
+
+    def items(self):
+
+        """ () -> iterable
+        This instance method returns tuples (ISO code, SharedCountry).
+
+        """
+
+        return self.countries.items()
+
+
+    def close(self):
+
+        """ () -> void
+        This instance method detaches from the shared block. The SharedCountry objects can't be used afterwards.
+
+        """
+
+        self.countries = {}
+
+        for array in self.arrays:
+            array.release()
+
+        self.arrays = []
+        self.block.close()
@@ -0,0 +1,268 @@
+# Author: Sandy Nguyen
+
+import threading
+import types
+from build_countries import Country
+
+
+class DatasetSnapshot:
+
+    """
+    Represents one consistent, read-only version of the countries dataset. The countries dictionary can't be modified
+    and its Country objects are never changed once the snapshot is published (writers change copies), so readers
+    don't need any lock. Readers must not call add_yearly_data on its countries.
+
+    Instance Attributes: version (int), countries_dict (mappingproxy)
+
+    """
+
+    def __init__(self, version, countries_dict):
+
+        """ (int, dict) -> void
+        This constructor will initialize a snapshot of the given version over a read-only view of countries_dict.
+
+        >>> s = DatasetSnapshot(0, {})
+        >>> s.version, len(s.countries_dict)
+        (0, 0)
+
+        """
+
+        self.version = version
+        self.countries_dict = types.MappingProxyType(countries_dict)
+
+
+class SnapshotWriter:
+
+    """
+    Represents the changes building the next version of a SnapshotStore. A country is copied the first time it is
+    changed (copy on write); the others are shared with the current snapshot. Nothing is visible to readers until
+    commit() swaps the new version in. Only one writer can be open at a time.
+
+    Instance Attributes: store (SnapshotStore), base_snapshot (DatasetSnapshot), countries_dict (dict),
+    copied_iso_codes (set), is_open (bool)
+
+    """
+
+    def __init__(self, store, base_snapshot):
+
+        """ (SnapshotStore, DatasetSnapshot) -> void
+        This constructor will initialize a writer starting from base_snapshot. It is created by SnapshotStore.get_writer.
+
+        """
+
+        self.store = store
+        self.base_snapshot = base_snapshot
+
+        # Shallow copy: the new dictionary points to the same Country objects until they are changed
+        self.countries_dict = dict(base_snapshot.countries_dict)
+        self.copied_iso_codes = set()
+        self.is_open = True
+
+
+    def get_country_for_update(self, iso_code):
+
+        """ (str) -> Country
+        This instance method takes an ISO code and returns the country of the next version that can be changed, copying
+        it from the current snapshot the first time. A KeyError is raised if there is no such country.
+
+        """
+
+        if not self.is_open:
+            raise RuntimeError('this writer was already committed or aborted')
+
+        if iso_code not in self.copied_iso_codes:
+            self.countries_dict[iso_code] = self.countries_dict[iso_code].get_copy()
+            self.copied_iso_codes.add(iso_code)
+
+        return self.countries_dict[iso_code]
+
+
+    def add_country(self, country):
+
+        """ (Country) -> void
+        This instance method adds a new Country (or replaces the one of the same ISO code) in the next version.
+
+        """
+
+        if not self.is_open:
+            raise RuntimeError('this writer was already committed or aborted')
+
+        self.countries_dict[country.iso_code] = country
+        self.copied_iso_codes.add(country.iso_code)
+
+
+    def remove_country(self, iso_code):
+
+        """ (str) -> void
+        This instance method removes a country from the next version.
+
+        """
+
+        if not self.is_open:
+            raise RuntimeError('this writer was already committed or aborted')
+
+        del self.countries_dict[iso_code]
+        self.copied_iso_codes.discard(iso_code)
+
+
+    def add_yearly_data(self, iso_code, str_data):
+
+        """ (str, str) -> void
+        This instance method takes an ISO code and a string 'year\tco2\tpopulation' and adds the yearly data to the
+        country in the next version, like Country.add_yearly_data.
+
+        """
+
+        self.get_country_for_update(iso_code).add_yearly_data(str_data)
+
+
+    def add_line(self, line):
+
+        """ (str) -> void
+        This instance method takes a line of a cleaned co2 data file with continents and adds it to the next version,
+        creating the country if it is new (like get_countries_from_file).
+
+        """
+
+        line_list = line.rstrip('\r\n').split('\t')
+
+        if line_list[0] in self.countries_dict:
+            self.add_yearly_data(line_list[0], line_list[3] + '\t' + line_list[4] + '\t' + line_list[5])
+        else:
+            self.add_country(Country.get_country_from_data('\t'.join(line_list)))
+
+
+    def add_file(self, filename):
+
+        """ (str) -> int
+        This instance method takes a string representing a cleaned co2 data file with continents, adds every line of it to
+        the next version and returns the number of lines read.
+
+        """
+
+        num_of_lines = 0
+        fobj = open(filename, "r", encoding="utf-8")
+
+        for line in fobj:
+            self.add_line(line)
+            num_of_lines += 1
+
+        fobj.close()
+
+        return num_of_lines
+
+
+    def commit(self):
+
+        """ () -> DatasetSnapshot
+        This instance method publishes the next version atomically, closes the writer and returns the new snapshot.
+
+        """
+
+        if not self.is_open:
+            raise RuntimeError('this writer was already committed or aborted')
+
+        snapshot = DatasetSnapshot(self.base_snapshot.version + 1, self.countries_dict)
+        self.is_open = False
+        self.store.publish(snapshot)
+
+        return snapshot
+
+
+    def abort(self):
+
+        """ () -> void
+        This instance method drops the changes and closes the writer. The current snapshot is left unchanged.
+
+        """
+
+        if self.is_open:
+            self.is_open = False
+            self.store.writer_lock.release()
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        # Committing only if the block finished without an exception
+        if exc_type == None and self.is_open:
+            self.commit()
+        else:
+            self.abort()
+
+
+class SnapshotStore:
+
+    """
+    Represents a countries dataset that can be read while new data is loaded. Readers call get_snapshot() and keep
+    using the same consistent version for as long as they need; writers build the next version with get_writer()
+    and commit it, which replaces the current snapshot in one assignment.
+
+    Instance Attributes: current_snapshot (DatasetSnapshot), writer_lock (Lock)
+
+    >>> store = SnapshotStore()
+    >>> with store.get_writer() as writer:
+    ...     n = writer.add_file('data/small_co2_data.tsv')
+    >>> before = store.get_snapshot()
+    >>> with store.get_writer() as writer:
+    ...     writer.add_yearly_data('QAT', '2019\\t100.0\\t2800000')
+    >>> after = store.get_snapshot()
+    >>> before.version, 2019 in before.countries_dict['QAT'].co2_emissions
+    (1, False)
+    >>> after.version, 2019 in after.countries_dict['QAT'].co2_emissions
+    (2, True)
+    >>> before.countries_dict['CMR'] is after.countries_dict['CMR']
+    True
+
+    """
+
+    def __init__(self, countries_dict=None):
+
+        """ (dict) -> void
+        This constructor will initialize the store with version 0 of the dataset (empty if countries_dict is None). The
+        store then owns the countries of countries_dict, which must not be changed directly anymore.
+
+        """
+
+        self.current_snapshot = DatasetSnapshot(0, dict(countries_dict) if countries_dict != None else {})
+        self.writer_lock = threading.Lock()
+
+
+    def get_snapshot(self):
+
+        """ () -> DatasetSnapshot
+        This instance method returns the current snapshot. It never waits for writers.
+
+        """
+
+        return self.current_snapshot
+
+
+    def get_writer(self):
+
+        """ () -> SnapshotWriter
+        This instance method waits until no other writer is open and returns a writer building the next version from
+        the current snapshot.
+
+        """
+
+        self.writer_lock.acquire()
+
+        return SnapshotWriter(self, self.current_snapshot)
+
+
+    def publish(self, snapshot):
+
+        """ (DatasetSnapshot) -> void
+        This instance method makes snapshot the current one and lets the next writer in. It is called by
+        SnapshotWriter.commit.
+
+        """
+
+        # Replacing one attribute is atomic, so readers get either the old or the new version, never a mix
+        self.current_snapshot = snapshot
+        self.writer_lock.release()
@@ -0,0 +1,353 @@
+# Author: Sandy Nguyen
+
+import sqlite3
+import sys
+
+create_tables = """
+CREATE TABLE IF NOT EXISTS countries (
+    iso TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS country_continents (
+    iso TEXT NOT NULL,
+    continent TEXT NOT NULL,
+    UNIQUE (iso, continent)
+);
+CREATE TABLE IF NOT EXISTS yearly_data (
+    iso TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    co2 REAL,
+    population INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS yearly_data_iso_year ON yearly_data (iso, year);
+CREATE INDEX IF NOT EXISTS country_continents_continent ON country_continents (continent, iso);
+"""
+
+# Like add_yearly_data, a repeated (iso, year) row only replaces the values it has
+insert_yearly_data = """
+INSERT INTO yearly_data (iso, year, co2, population) VALUES (?, ?, ?, ?)
+ON CONFLICT (iso, year) DO UPDATE SET co2 = COALESCE(excluded.co2, co2), population = COALESCE(excluded.population, population)
+"""
+
+
+class CountryStore:
+
+    """
+    Represents the co2 emissions data stored in a SQLite database, so that it can be queried without loading every
+    country in memory
+
+    Instance Attributes: db_filename (str), connection (Connection)
+
+    """
+
+    def __init__(self, db_filename):
+
+        """ (str) -> void
+        This constructor will open (or create) the SQLite database db_filename and create its tables and indexes.
+
+        >>> s = CountryStore(':memory:')
+        >>> s.get_num_countries()
+        0
+
+        """
+
+        self.db_filename = db_filename
+        self.connection = sqlite3.connect(db_filename)
+        self.connection.executescript(create_tables)
+
+
+    def load_file(self, filename, batch_size=10000):
+
+        """ (str, int) -> int
+        This instance method takes a string representing a cleaned co2 data file with continents (same format as for
+        get_countries_from_file) and an integer, inserts its rows in the database with executemany by batches of
+        batch_size rows, all in one transaction, and returns the number of lines read. Only one batch is kept in memory,
+        so files larger than memory can be loaded.
+
+        >>> s = CountryStore(':memory:')
+        >>> s.load_file('data/small_co2_data.tsv')
+        10
+        >>> s.get_num_countries()
+        9
+
+        """
+
+        num_of_lines = 0
+        country_rows = []
+        continent_rows = []
+        yearly_rows = []
+
+        fobj = open(filename, "r", encoding="utf-8")
+
+        # Everything is inserted in a single transaction, rolled back if anything goes wrong
+        with self.connection:
+
+            for line in fobj:
+
+                line_list = line.strip('\n').split('\t')
+                num_of_lines += 1
+
+                country_rows.append((line_list[0], line_list[1]))
+
+                for continent in line_list[2].split(','):
+                    continent_rows.append((line_list[0], continent))
+
+                # Empty co2 emissions or population are stored as NULL
+                country_co2 = float(line_list[4]) if line_list[4] != '' else None
+                country_pop = int(line_list[5]) if line_list[5] != '' else None
+                yearly_rows.append((line_list[0], int(line_list[3]), country_co2, country_pop))
+
+                if len(yearly_rows) >= batch_size:
+                    self.insert_rows(country_rows, continent_rows, yearly_rows)
+                    country_rows = []
+                    continent_rows = []
+                    yearly_rows = []
+
+            self.insert_rows(country_rows, continent_rows, yearly_rows)
+
+        fobj.close()
+
+        return num_of_lines
+
+
+    def insert_rows(self, country_rows, continent_rows, yearly_rows):
+
+        """ (list, list, list) -> void
+        This instance method takes lists of tuples (iso, name), (iso, continent) and (iso, year, co2, population) and
+        inserts them in the database with one executemany per table. The first name seen for an ISO code is kept.
+
+        """
+
+        self.connection.executemany("INSERT OR IGNORE INTO countries (iso, name) VALUES (?, ?)", country_rows)
+        self.connection.executemany("INSERT OR IGNORE INTO country_continents (iso, continent) VALUES (?, ?)", continent_rows)
+        self.connection.executemany(insert_yearly_data, yearly_rows)
+
+
+    def get_num_countries(self):
+
+        """ () -> int
+        This instance method returns the number of countries in the database.
+
+        """
+
+        return self.connection.execute("SELECT COUNT(*) FROM countries").fetchone()[0]
+
+
+    def get_co2_emissions_by_year(self, iso_code, country_year):
+
+        """ (str, int) -> float
+        This instance method takes an ISO code and a year and returns the co2 emissions of the country in that year if
+        available, 0.0 otherwise (like Country.get_co2_emissions_by_year).
+
+        >>> s = CountryStore(':memory:')
+        >>> n = s.load_file('data/small_co2_data.tsv')
+        >>> s.get_co2_emissions_by_year('QAT', 2001)
+        41.215
+        >>> s.get_co2_emissions_by_year('QAT', 1900)
+        0.0
+
+        """
+
+        row = self.connection.execute("SELECT co2 FROM yearly_data WHERE iso = ? AND year = ? AND co2 IS NOT NULL",
+                                      (iso_code, country_year)).fetchone()
+
+        if row == None:
+            return 0.0
+
+        return row[0]
+
+
+    def get_co2_per_capita_by_year(self, iso_code, country_year):
+
+        """ (str, int) -> float
+        This instance method takes an ISO code and a year and returns the co2 emissions per capita in tonnes of the country
+        in that year if available, None otherwise (like Country.get_co2_per_capita_by_year).
+
+        >>> s = CountryStore(':memory:')
+        >>> n = s.load_file('data/small_co2_data.tsv')
+        >>> round(s.get_co2_per_capita_by_year('QAT', 2001), 3)
+        67.016
+        >>> print(s.get_co2_per_capita_by_year('QAT', 1900))
+        None
+
+        """
+
+        row = self.connection.execute("SELECT co2 * 1000000.0 / population FROM yearly_data "
+                                      "WHERE iso = ? AND year = ? AND co2 IS NOT NULL AND population IS NOT NULL AND population != 0",
+                                      (iso_code, country_year)).fetchone()
+
+        if row == None:
+            return None
+
+        return row[0]
+
+
+    def get_historical_co2(self, iso_code, country_year):
+
+        """ (str, int) -> float
+        This instance method takes an ISO code and a year and returns the total co2 emissions in millions of tonnes of the
+        country for all years up to and including that year (like Country.get_historical_co2).
+
+        >>> s = CountryStore(':memory:')
+        >>> n = s.load_file('data/small_co2_data.tsv')
+        >>> s.get_historical_co2('QAT', 2018)
+        41.215
+        >>> s.get_historical_co2('QAT', 1900)
+        0.0
+
+        """
+
+        return self.connection.execute("SELECT TOTAL(co2) FROM yearly_data WHERE iso = ? AND year <= ?",
+                                       (iso_code, country_year)).fetchone()[0]
+
+
+    def get_total_co2_emissions_per_capita_by_year(self, continent, country_year):
+
+        """ (str, int) -> float
+        This instance method takes a continent and a year and returns the co2 emissions per capita in tonnes produced by
+        all the countries of the continent that have both co2 emissions and population in that year, 0.0 if there is none
+        (like Country.get_total_co2_emissions_per_capita_by_year on the continent's countries).
+
+        >>> s = CountryStore(':memory:')
+        >>> n = s.load_file('data/small_co2_data.tsv')
+        >>> s.get_total_co2_emissions_per_capita_by_year('OCEANIA', 2001)
+        0.0
+
+        """
+
+        row = self.connection.execute("SELECT TOTAL(y.co2), TOTAL(y.population) FROM country_continents c "
+                                      "JOIN yearly_data y ON y.iso = c.iso AND y.year = ? "
+                                      "WHERE c.continent = ? AND y.co2 IS NOT NULL AND y.population IS NOT NULL",
+                                      (country_year, continent)).fetchone()
+
+        # If the total population is 0
+        if row[1] == 0:
+            return 0.0
+
+        return (row[0] / row[1]) * 1000000
+
+
+    def get_total_historical_co2_emissions(self, continent, country_year):
+
+        """ (str, int) -> float
+        This instance method takes a continent and a year and returns the total co2 emissions in millions of tonnes produced
+        by all the countries of the continent for all years up to and including that year (like
+        Country.get_total_historical_co2_emissions on the continent's countries).
+
+        >>> s = CountryStore(':memory:')
+        >>> n = s.load_file('data/small_co2_data.tsv')
+        >>> s.get_total_historical_co2_emissions('OCEANIA', 2018)
+        0.0
+
+        """
+
+        return self.connection.execute("SELECT TOTAL(y.co2) FROM country_continents c "
+                                       "JOIN yearly_data y ON y.iso = c.iso AND y.year <= ? WHERE c.continent = ?",
+                                       (country_year, continent)).fetchone()[0]
+
+
+    def get_co2_emissions_per_capita_by_year(self, country_year, continent=None):
+
+        """ (int, str) -> dict
+        This instance method takes a year and an optional continent and returns a dictionary mapping the ISO codes of the
+        countries (of the continent, if given) to their co2 emissions per capita in tonnes in that year, None if not
+        available (like Country.get_co2_emissions_per_capita_by_year, with ISO codes as keys).
+
+        >>> s = CountryStore(':memory:')
+        >>> n = s.load_file('data/small_co2_data.tsv')
+        >>> d = s.get_co2_emissions_per_capita_by_year(2001, 'ASIA')
+        >>> round(d['QAT'], 3)
+        67.016
+
+        """
+
+        query = ("SELECT c.iso, y.co2 * 1000000.0 / NULLIF(y.population, 0) FROM countries c "
+                 "LEFT JOIN yearly_data y ON y.iso = c.iso AND y.year = ?")
+        params = [country_year]
+
+        if continent != None:
+            query += " WHERE c.iso IN (SELECT iso FROM country_continents WHERE continent = ?)"
+            params.append(continent)
+
+        country_co2_dict = {}
+
+        for iso_code, country_co2 in self.connection.execute(query, params):
+            country_co2_dict[iso_code] = country_co2
+
+        return country_co2_dict
+
+
+    def get_historical_co2_emissions(self, country_year, continent=None):
+
+        """ (int, str) -> dict
+        This instance method takes a year and an optional continent and returns a dictionary mapping the ISO codes of the
+        countries (of the continent, if given) to their total co2 emissions for all years up to and including that year
+        (like Country.get_historical_co2_emissions, with ISO codes as keys).
+
+        >>> s = CountryStore(':memory:')
+        >>> n = s.load_file('data/small_co2_data.tsv')
+        >>> s.get_historical_co2_emissions(2018, 'ASIA')['QAT']
+        41.215
+
+        """
+
+        query = ("SELECT c.iso, TOTAL(y.co2) FROM countries c "
+                 "LEFT JOIN yearly_data y ON y.iso = c.iso AND y.year <= ?")
+        params = [country_year]
+
+        if continent != None:
+            query += " WHERE c.iso IN (SELECT iso FROM country_continents WHERE continent = ?)"
+            params.append(continent)
+
+        country_co2_dict = {}
+
+        for iso_code, country_co2 in self.connection.execute(query + " GROUP BY c.iso", params):
+            country_co2_dict[iso_code] = country_co2
+
+        return country_co2_dict
+
+
+    def get_top_n(self, metric, country_year, n):
+
+        """ (str, int, int) -> list
+        This instance method takes a metric ('per-capita' or 'historical'), a year and an integer n and returns a list of
+        the n tuples (ISO code, value) with the highest values, ties sorted by country name (like Country.get_top_n).
+        Countries without per capita emissions that year are left out.
+
+        >>> s = CountryStore(':memory:')
+        >>> n = s.load_file('data/small_co2_data.tsv')
+        >>> [iso for iso, value in s.get_top_n('historical', 2018, 2)]
+        ['POL', 'PAK']
+
+        """
+
+        if metric == 'per-capita':
+            query = ("SELECT c.iso, y.co2 * 1000000.0 / y.population AS value FROM countries c "
+                     "JOIN yearly_data y ON y.iso = c.iso AND y.year = ? "
+                     "WHERE y.co2 IS NOT NULL AND y.population IS NOT NULL AND y.population != 0")
+        elif metric == 'historical':
+            query = ("SELECT c.iso, TOTAL(y.co2) AS value FROM countries c "
+                     "LEFT JOIN yearly_data y ON y.iso = c.iso AND y.year <= ? GROUP BY c.iso")
+        else:
+            raise ValueError("unknown metric '" + metric + "'")
+
+        return self.connection.execute("SELECT iso, value FROM (" + query + ") JOIN countries USING (iso) "
+                                       "ORDER BY value DESC, name LIMIT ?", (country_year, n)).fetchall()
+
+
+    def close(self):
+
+        """ () -> void
+        This instance method closes the connection to the database.
+
+        """
+
+        self.connection.close()
+
+
+if __name__ == '__main__':
+
+    # Usage: python sqlite_store.py data_file.tsv database.sqlite
+    store = CountryStore(sys.argv[2])
+    print(store.load_file(sys.argv[1]))
+    store.close()
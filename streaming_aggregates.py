@@ -0,0 +1,279 @@
+# Author: Sandy Nguyen
+
+import heapq
+import sys
+
+# Same continents, in the same order, as the continent bar plots of plot_data
+continents_list = ['AFRICA', 'ASIA', 'EUROPE', 'NORTH AMERICA', 'OCEANIA', 'SOUTH AMERICA']
+
+
+def get_name_key(name):
+
+    """ (str) -> tuple
+    This function takes a country name and returns a key that sorts names in reverse alphabetical order, so that a min
+    heap on (value, name key) drops the lowest value first and, among equal values, the name that comes last (like
+    Country.get_top_n keeps the first names).
+
+    >>> get_name_key('Albania') > get_name_key('Austria')
+    True
+
+    >>> get_name_key('Niger') > get_name_key('Nigeria')
+    True
+
+    """
+
+    return tuple([-ord(char) for char in name] + [1])
+
+
+class StreamingAggregator:
+
+    """
+    Represents running totals of a cleaned co2 data file with continents, read one line at a time. Memory only grows with
+    the number of continents and years (plus the number of countries for the top n historical emissions), not with
+    the number of lines.
+
+    Instance Attributes: top_n (int), top_n_years (list), continent_year_co2 (dict), continent_year_pc (dict),
+    year_totals (dict), per_capita_heaps (dict), historical_sums (dict), country_names (dict), num_of_lines (int)
+
+    """
+
+    def __init__(self, top_n=10, top_n_years=None):
+
+        """ (int, list) -> void
+        This constructor will initialize empty totals. Top n countries are only kept for the years in top_n_years.
+
+        >>> a = StreamingAggregator(10, [2000])
+        >>> a.num_of_lines
+        0
+
+        """
+
+        self.top_n = top_n
+        self.top_n_years = [] if top_n_years == None else list(top_n_years)
+
+        # continent -> year -> co2 emissions of every line (for historical totals)
+        self.continent_year_co2 = {}
+
+        # continent -> year -> [co2 emissions, population] of the lines having both (for per capita totals)
+        self.continent_year_pc = {}
+
+        # year -> [co2 emissions, population] of every country
+        self.year_totals = {}
+
+        # year -> heap of the top n (per capita co2 emissions, name key, ISO code)
+        self.per_capita_heaps = {}
+
+        # year -> ISO code -> historical co2 emissions up to that year
+        self.historical_sums = {}
+        self.country_names = {}
+
+        for year in self.top_n_years:
+            self.per_capita_heaps[year] = []
+            self.historical_sums[year] = {}
+
+        self.num_of_lines = 0
+
+
+    def add_line(self, line):
+
+        """ (str) -> void
+        This instance method takes a line with format 'ISO\tname\tcontinents\tyear\tco2\tpopulation' and adds it to
+        the totals. Missing values are empty (or -1, like for the Country constructor).
+
+        >>> a = StreamingAggregator(10, [2007])
+        >>> a.add_line('RUS\\tRussia\\tASIA,EUROPE\\t2007\\t1604.778\\t14266000')
+        >>> a.get_historical_co2_by_continent(2007)
+        [1604.778, 1604.778]
+
+        """
+
+        line_list = line.rstrip('\r\n').split('\t')
+        iso_code = line_list[0]
+        year = int(line_list[3])
+        country_co2 = float(line_list[4]) if line_list[4] not in ['', '-1'] else None
+        country_pop = int(line_list[5]) if line_list[5] not in ['', '-1'] else None
+        self.num_of_lines += 1
+
+        for continent in line_list[2].split(','):
+
+            if country_co2 != None:
+                year_co2 = self.continent_year_co2.setdefault(continent, {})
+                year_co2[year] = year_co2.get(year, 0.0) + country_co2
+
+            if country_co2 != None and country_pop != None:
+                year_pc = self.continent_year_pc.setdefault(continent, {}).setdefault(year, [0.0, 0])
+                year_pc[0] += country_co2
+                year_pc[1] += country_pop
+
+        if country_co2 != None or country_pop != None:
+            year_total = self.year_totals.setdefault(year, [0.0, 0])
+            year_total[0] += country_co2 if country_co2 != None else 0.0
+            year_total[1] += country_pop if country_pop != None else 0
+
+        # Every country counts in the top n historical emissions, even with 0.0
+        for top_year in self.top_n_years:
+
+            if iso_code not in self.historical_sums[top_year]:
+                self.historical_sums[top_year][iso_code] = 0.0
+                self.country_names[iso_code] = line_list[1]
+
+            if country_co2 != None and year <= top_year:
+                self.historical_sums[top_year][iso_code] += country_co2
+
+        # Keeping only the n highest per capita emissions of the year
+        if year in self.per_capita_heaps and country_co2 != None and country_pop not in [None, 0]:
+            heap_item = ((country_co2 / country_pop) * 1000000, get_name_key(line_list[1]), iso_code)
+
+            if len(self.per_capita_heaps[year]) < self.top_n:
+                heapq.heappush(self.per_capita_heaps[year], heap_item)
+            elif heap_item > self.per_capita_heaps[year][0]:
+                heapq.heapreplace(self.per_capita_heaps[year], heap_item)
+
+
+    def add_file(self, filename):
+
+        """ (str) -> int
+        This instance method takes a string representing a cleaned co2 data file with continents, adds every line of it
+        to the totals and returns the number of lines read.
+
+        >>> a = StreamingAggregator()
+        >>> a.add_file('data/small_co2_data.tsv')
+        10
+
+        """
+
+        num_of_lines = 0
+        fobj = open(filename, "r", encoding="utf-8")
+
+        for line in fobj:
+            self.add_line(line)
+            num_of_lines += 1
+
+        fobj.close()
+
+        return num_of_lines
+
+
+    def get_co2_pc_by_continent(self, country_year):
+
+        """ (int) -> list
+        This instance method takes a year and returns the co2 emissions per capita in tonnes of each continent in that year,
+        the same list of values as get_bar_co2_pc_by_continent (continents without emissions are left out).
+
+        >>> a = StreamingAggregator()
+        >>> n = a.add_file('data/small_co2_data.tsv')
+        >>> [round(value, 3) for value in a.get_co2_pc_by_continent(2001)]
+        [0.203, 67.016, 7.661, 1.42]
+
+        """
+
+        continents_co2_list = []
+
+        for continent in continents_list:
+
+            continent_co2, continent_pop = self.continent_year_pc.get(continent, {}).get(country_year, [0.0, 0])
+
+            # Like get_total_co2_emissions_per_capita_by_year, a continent without population gets 0.0
+            if continent_pop != 0 and continent_co2 != 0:
+                continents_co2_list.append((continent_co2 / continent_pop) * 1000000)
+
+        return continents_co2_list
+
+
+    def get_historical_co2_by_continent(self, country_year):
+
+        """ (int) -> list
+        This instance method takes a year and returns the total co2 emissions in millions of tonnes of each continent for
+        all years up to and including that year, the same list of values as get_bar_historical_co2_by_continent
+        (continents without emissions are left out).
+
+        >>> a = StreamingAggregator()
+        >>> n = a.add_file('data/small_co2_data.tsv')
+        >>> [round(value, 3) for value in a.get_historical_co2_by_continent(2018)]
+        [4.877, 207.545, 359.367, 149.343]
+
+        """
+
+        continents_co2_list = []
+
+        for continent in continents_list:
+
+            continent_co2 = 0.0
+
+            for year, year_co2 in self.continent_year_co2.get(continent, {}).items():
+                if year <= country_year:
+                    continent_co2 += year_co2
+
+            if continent_co2 != 0:
+                continents_co2_list.append(continent_co2)
+
+        return continents_co2_list
+
+
+    def get_global_totals_by_year(self):
+
+        """ () -> dict
+        This instance method returns a dictionary mapping each year to a tuple (co2 emissions, population) summed over
+        every country, sorted by year.
+
+        >>> a = StreamingAggregator()
+        >>> n = a.add_file('data/small_co2_data.tsv')
+        >>> a.get_global_totals_by_year()[2015]
+        (93.084, 47521000)
+
+        """
+
+        totals_dict = {}
+
+        for year in sorted(self.year_totals):
+            totals_dict[year] = tuple(self.year_totals[year])
+
+        return totals_dict
+
+
+    def get_top_co2_pc(self, country_year):
+
+        """ (int) -> list
+        This instance method takes one of the top_n_years and returns the list of tuples (ISO code, co2 emissions per
+        capita) of the top n countries that year, like Country.get_top_n (ties sorted by country name).
+
+        >>> a = StreamingAggregator(2, [2001])
+        >>> n = a.add_file('data/small_co2_data.tsv')
+        >>> [(iso, round(value, 3)) for iso, value in a.get_top_co2_pc(2001)]
+        [('QAT', 67.016), ('POL', 7.968)]
+
+        """
+
+        heap_items = sorted(self.per_capita_heaps[country_year], reverse=True)
+
+        return [(iso_code, value) for value, name_key, iso_code in heap_items]
+
+
+    def get_top_historical_co2(self, country_year):
+
+        """ (int) -> list
+        This instance method takes one of the top_n_years and returns the list of tuples (ISO code, historical co2
+        emissions) of the top n countries up to that year, like Country.get_top_n (ties sorted by country name).
+
+        >>> a = StreamingAggregator(2, [2018])
+        >>> n = a.add_file('data/small_co2_data.tsv')
+        >>> a.get_top_historical_co2(2018)
+        [('POL', 306.696), ('PAK', 166.33)]
+
+        """
+
+        heap_items = heapq.nlargest(self.top_n, [(value, get_name_key(self.country_names[iso_code]), iso_code)
+                                                 for iso_code, value in self.historical_sums[country_year].items()])
+
+        return [(iso_code, value) for value, name_key, iso_code in heap_items]
+
+
+if __name__ == '__main__':
+
+    # Usage: python streaming_aggregates.py data_file.tsv year
+    aggregator = StreamingAggregator(10, [int(sys.argv[2])])
+    aggregator.add_file(sys.argv[1])
+    print(aggregator.get_co2_pc_by_continent(int(sys.argv[2])))
+    print(aggregator.get_historical_co2_by_continent(int(sys.argv[2])))
+    print(aggregator.get_top_co2_pc(int(sys.argv[2])))
+    print(aggregator.get_top_historical_co2(int(sys.argv[2])))
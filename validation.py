@@ -0,0 +1,302 @@
+# Author: Sandy Nguyen
+
+from add_continents import get_iso_codes_by_continent
+
+# Reason codes written in the quarantine file
+reason_no_delimiter = 'NO_DELIMITER'
+reason_bad_columns = 'BAD_COLUMNS'
+reason_bad_iso = 'BAD_ISO'
+reason_bad_year = 'BAD_YEAR'
+reason_bad_co2 = 'BAD_CO2'
+reason_bad_population = 'BAD_POPULATION'
+reason_unknown_continent = 'UNKNOWN_CONTINENT'
+reason_duplicate = 'DUPLICATE'
+
+raw_delimiters = ['\t', ',', ' ', '-']
+
+
+def is_valid_iso(iso_code):
+
+    """ (str) -> bool
+    This function takes a string and returns True if it is a valid ISO code: 3 uppercase letters, or 'OWID_KOS', the
+    only longer code Country accepts.
+
+    >>> is_valid_iso('QAT'), is_valid_iso('OWID_KOS'), is_valid_iso('qat'), is_valid_iso('QA')
+    (True, True, False, False)
+
+    >>> is_valid_iso('OWID_WRL')
+    False
+
+    """
+
+    if iso_code == 'OWID_KOS':
+        return True
+
+    return len(iso_code) == 3 and iso_code.isalpha() and iso_code.isupper()
+
+
+def is_valid_number(value, is_integer):
+
+    """ (str, bool) -> bool
+    This function takes a string and a boolean and returns True if the string is empty (missing value), '-1' (also a
+    missing value for Country) or a non negative number (an integer if is_integer is True).
+
+    >>> is_valid_number('', True), is_valid_number('-1', True), is_valid_number('41.215', False), is_valid_number('41.2', True)
+    (True, True, True, False)
+
+    >>> is_valid_number('nan', False), is_valid_number('-3.5', False)
+    (False, False)
+
+    """
+
+    if value in ['', '-1']:
+        return True
+
+    try:
+        if is_integer:
+            number = int(value)
+        else:
+            number = float(value)
+    except ValueError:
+        return False
+
+    # Rejecting negative numbers, NaN and infinity
+    return 0 <= number < float('inf')
+
+
+def validate_records(records, known_iso_codes=None, known_continents=None, min_year=1700, max_year=2100):
+
+    """ (list, set, set, int, int) -> list
+    This function takes a batch of records (lists of columns, either 'ISO, name, year, co2, population' as written by
+    final_clean or 'ISO, name, continents, year, co2, population' as written by add_continents_to_data), the known ISO
+    codes and continents (not checked if None) and the range of valid years, and returns a list with, for each record,
+    None if it is valid or the reason code of its first problem. Each check runs over a whole column of the batch.
+
+    >>> records = [['QAT', 'Qatar', '2001', '41.215', '615000'], ['QA', 'Qatar', '2001', '41.215', '615000'],
+    ...            ['QAT', 'Qatar', '1201', '41.215', '615000'], ['QAT', 'Qatar', '2001', 'x', '615000'],
+    ...            ['XYZ', 'Nowhere', '2001', '1.0', '5'], ['QAT', 'Qatar', '2001']]
+    >>> validate_records(records, {'QAT'})
+    [None, 'BAD_ISO', 'BAD_YEAR', 'BAD_CO2', 'UNKNOWN_CONTINENT', 'BAD_COLUMNS']
+
+    >>> validate_records([['RUS', 'Russia', 'ASIA,EUROPE', '2007', '1604.778', '14266000']], None, {'ASIA', 'EUROPE'})
+    [None]
+
+    """
+
+    reasons = [None] * len(records)
+
+    # Records without 5 or 6 columns can't be checked any further
+    num_columns = len(records[0]) if records != [] else 5
+    column_offset = num_columns - 5
+
+    for i in range(len(records)):
+        if len(records[i]) not in [5, 6] or len(records[i]) != num_columns:
+            reasons[i] = reason_bad_columns
+
+    # Going through the batch one column at a time
+    checks = [(0, reason_bad_iso, is_valid_iso),
+              (2 + column_offset, reason_bad_year, lambda year: year.isdigit() and min_year <= int(year) <= max_year),
+              (3 + column_offset, reason_bad_co2, lambda country_co2: is_valid_number(country_co2, False)),
+              (4 + column_offset, reason_bad_population, lambda country_pop: is_valid_number(country_pop, True))]
+
+    if known_iso_codes != None and column_offset == 0:
+        checks.append((0, reason_unknown_continent, lambda iso_code: iso_code in known_iso_codes))
+
+    if known_continents != None and column_offset == 1:
+        checks.append((2, reason_unknown_continent, lambda continents: set(continents.split(',')) <= known_continents))
+
+    for column_index, reason, check in checks:
+
+        column = [record[column_index] if reasons[i] == None else None for i, record in enumerate(records)]
+        results = [value == None or check(value) for value in column]
+
+        for i in range(len(records)):
+            if not results[i]:
+                reasons[i] = reason
+
+    return reasons
+
+
+def write_quarantine(fobj_quarantine, stage_name, line_number, reason, line):
+
+    """ (file, str, int, str, str) -> void
+    This function writes one rejected line to the quarantine file, with format
+    'reason code\tstage\tline number\toriginal line'.
+
+    """
+
+    fobj_quarantine.write(reason + '\t' + stage_name + '\t' + str(line_number) + '\t' + line.rstrip('\r\n') + '\n')
+
+
+def quarantine_raw_lines(input_filename, output_filename, quarantine_filename):
+
+    """ (str, str, str) -> int
+    This function takes three strings representing files, copies every line of the raw input_filename that has at least
+    one delimiter (so that find_delim and clean_one can handle it) to output_filename, appends the other lines to the
+    quarantine file with reason code NO_DELIMITER, and returns the number of lines written to output_filename.
+
+    """
+
+    fobj_input = open(input_filename, "r", encoding="utf-8")
+    fobj_output = open(output_filename, "w", encoding="utf-8")
+    fobj_quarantine = open(quarantine_filename, "a", encoding="utf-8")
+    num_of_lines = 0
+    line_number = 0
+
+    for line in fobj_input:
+
+        line_number += 1
+
+        # Same delimiters as find_delim
+        for delim in raw_delimiters:
+            if delim in line:
+                fobj_output.write(line)
+                num_of_lines += 1
+                break
+
+        else:
+            write_quarantine(fobj_quarantine, 'raw', line_number, reason_no_delimiter, line)
+
+    fobj_input.close()
+    fobj_output.close()
+    fobj_quarantine.close()
+
+    return num_of_lines
+
+
+def validate_file(input_filename, output_filename, quarantine_filename, continents_filename=None, batch_size=10000, min_year=1700, max_year=2100, duplicate_tracker=None, stage_name=None):
+
+    """ (str, str, str, str, int, int, int, DuplicateTracker, str) -> int
+    This function takes strings representing a cleaned file (written by final_clean or add_continents_to_data), the file
+    to write the valid lines to, the quarantine file and an optional continents file, checks the lines by batches of
+    batch_size with validate_records and returns the number of lines written to output_filename. The rejected lines are
+    appended to the quarantine file with their reason code, so one bad line doesn't stop the rest of the pipeline.
+    With a continents file, ISO codes missing from it (which would make add_continents_to_data fail) and unknown
+    continents are rejected as UNKNOWN_CONTINENT. Rejected lines are recorded under stage_name, or if None under the
+    stage that wrote them: 'clean' (final_clean) for 5 columns, 'continents' (add_continents_to_data) for 6.
+    With a DuplicateTracker, the valid lines are recorded in it, and a line repeating an ISO code and year without
+    changing the values its policy keeps ('keep_first' or 'keep_last') is rejected as DUPLICATE. The 'error' policy
+    raises a DuplicateError on different values, and 'average' keeps every line.
+
+    """
+
+    known_iso_codes = None
+    known_continents = None
+
+    if continents_filename != None:
+        continents_dict = get_iso_codes_by_continent(continents_filename)
+        known_continents = set(continents_dict)
+        known_iso_codes = set()
+
+        for countries in continents_dict.values():
+            known_iso_codes.update(countries)
+
+    fobj_input = open(input_filename, "r", encoding="utf-8")
+    fobj_output = open(output_filename, "w", encoding="utf-8")
+    fobj_quarantine = open(quarantine_filename, "a", encoding="utf-8")
+    num_of_lines = 0
+    line_number = 0
+    batch_lines = []
+
+    for line in fobj_input:
+
+        batch_lines.append(line)
+
+        if len(batch_lines) == batch_size:
+            num_of_lines += validate_batch(batch_lines, line_number, fobj_output, fobj_quarantine, known_iso_codes, known_continents, min_year, max_year, duplicate_tracker, stage_name)
+            line_number += len(batch_lines)
+            batch_lines = []
+
+    num_of_lines += validate_batch(batch_lines, line_number, fobj_output, fobj_quarantine, known_iso_codes, known_continents, min_year, max_year, duplicate_tracker, stage_name)
+
+    fobj_input.close()
+    fobj_output.close()
+    fobj_quarantine.close()
+
+    return num_of_lines
+
+
+def get_stage_name(line, stage_name=None):
+
+    """ (str, str) -> str
+    This function takes a line being validated and the stage it comes from (None if not known), and returns the stage
+    to record it under in the quarantine file: stage_name, or the stage that writes lines with as many columns.
+
+    >>> get_stage_name('QAT\\tQatar\\t2001\\t41.215\\t615000\\n'), get_stage_name('QAT\\tQatar\\tASIA\\t2001\\t41.215\\t615000\\n')
+    ('clean', 'continents')
+
+    """
+
+    if stage_name != None:
+        return stage_name
+
+    if line.count('\t') == 5:
+        return 'continents'
+
+    return 'clean'
+
+
+def add_tracked_records(batch_lines, first_line_number, reasons, duplicate_tracker):
+
+    """ (list, int, list, DuplicateTracker) -> void
+    This function takes a batch of lines, the number of lines before it and the reason code of each line (None if
+    valid), records the valid lines in duplicate_tracker and sets the reason of the redundant ones to DUPLICATE: lines
+    repeating an ISO code and year without changing the values kept by 'keep_first' or 'keep_last'.
+
+    >>> from duplicates import DuplicateTracker
+    >>> lines = ['QAT\\tQatar\\t2001\\t41.215\\t615000\\n', 'QAT\\tQatar\\t2001\\t41.215\\t\\n', 'QAT\\tQatar\\t2001\\t40.0\\t\\n']
+    >>> reasons = [None, None, None]
+    >>> add_tracked_records(lines, 0, reasons, DuplicateTracker('keep_first'))
+    >>> reasons
+    [None, 'DUPLICATE', 'DUPLICATE']
+
+    """
+
+    for i in range(len(batch_lines)):
+        if reasons[i] == None and duplicate_tracker.is_redundant_line(batch_lines[i], first_line_number + i + 1):
+            reasons[i] = reason_duplicate
+
+
+def validate_batch(batch_lines, first_line_number, fobj_output, fobj_quarantine, known_iso_codes, known_continents, min_year, max_year, duplicate_tracker=None, stage_name=None):
+
+    """ (list, int, file, file, set, set, int, int, DuplicateTracker, str) -> int
+    This function takes a batch of lines and the number of lines before it, writes the valid lines to fobj_output and the
+    others to fobj_quarantine under stage_name (see validate_file), and returns the number of valid lines. The valid
+    lines are recorded in duplicate_tracker (if not None), in order.
+
+    """
+
+    # Records are grouped by number of columns, since the columns to check depend on it
+    records_by_width = {}
+
+    for i in range(len(batch_lines)):
+        record = batch_lines[i].rstrip('\r\n').split('\t')
+        records_by_width.setdefault(len(record) if len(record) in [5, 6] else 0, []).append((i, record))
+
+    reasons = [None] * len(batch_lines)
+
+    for width, indexed_records in records_by_width.items():
+
+        if width == 0:
+            for i, record in indexed_records:
+                reasons[i] = reason_bad_columns
+        else:
+            width_reasons = validate_records([record for i, record in indexed_records], known_iso_codes, known_continents, min_year, max_year)
+
+            for j in range(len(indexed_records)):
+                reasons[indexed_records[j][0]] = width_reasons[j]
+
+    if duplicate_tracker != None:
+        add_tracked_records(batch_lines, first_line_number, reasons, duplicate_tracker)
+
+    num_of_lines = 0
+
+    for i in range(len(batch_lines)):
+
+        if reasons[i] == None:
+            fobj_output.write(batch_lines[i])
+            num_of_lines += 1
+        else:
+            write_quarantine(fobj_quarantine, get_stage_name(batch_lines[i], stage_name), first_line_number + i + 1, reasons[i], batch_lines[i])
+
+    return num_of_lines